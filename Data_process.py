@@ -1,6 +1,20 @@
+import concurrent.futures
+import hashlib
+import json
+import os
+import time
 import pandas as pd
 from sqlalchemy import create_engine
 
+from instrumentacion import medir_etapa, registrar_etapa
+
+# ---- Formato del caché en disco: Parquet si pyarrow está disponible, si no pickle ----
+try:
+    import pyarrow  # noqa: F401
+    FORMATO_CACHE = "parquet"
+except ImportError:
+    FORMATO_CACHE = "pkl"
+
 def _read_sql_from_file(sql_file_path):
     """
     Lee una consulta SQL desde un archivo de texto.
@@ -14,13 +28,281 @@ def _read_sql_from_file(sql_file_path):
     except Exception as e:
         raise
 
+def _clave_cache(config):
+    """
+    Calcula la clave del caché de un DataFrame a partir de su fuente y de sus reglas de procesamiento.
+
+    Para CSV la clave incluye la ruta absoluta, la fecha de modificación y el tamaño del archivo;
+    para Oracle, el texto de la consulta SQL (la vigencia se controla con el TTL). En ambos casos
+    se incluyen las reglas de 'cols_to_process' y la proyección de columnas, de modo que
+    cambiarlas invalida el caché.
+
+    Args:
+        config (dict): Configuración del archivo ('id', 'location', 'data_source', 'cols_to_process').
+
+    Returns:
+        str: Hash SHA-256 hexadecimal de la fuente y las reglas.
+    """
+    location = config["location"]
+    if config["data_source"] == 'csv':
+        stat = os.stat(location)
+        fuente = f"{os.path.abspath(location)}|{stat.st_mtime_ns}|{stat.st_size}"
+    else:
+        fuente = _read_sql_from_file(location)
+    reglas = json.dumps([config["cols_to_process"], config.get("solo_columnas_barrido", False)], sort_keys=True)
+    return hashlib.sha256(f"{config['id']}|{fuente}|{reglas}".encode("utf-8")).hexdigest()
+
+
+def _ruta_cache(directorio_cache, file_id, clave):
+    """Ruta del archivo de caché de un DataFrame para una clave dada."""
+    return os.path.join(directorio_cache, f"{file_id}_{clave[:16]}.{FORMATO_CACHE}")
+
+
+def _leer_cache(config, directorio_cache, ttl_oracle_horas, verbose=False):
+    """
+    Lee del caché en disco un DataFrame ya preprocesado, si existe y sigue vigente.
+
+    Args:
+        config (dict): Configuración del archivo (ver `_clave_cache`).
+        directorio_cache (str): Carpeta del caché.
+        ttl_oracle_horas (float): Vigencia máxima, en horas, de los datos cargados desde Oracle.
+        verbose (bool): Si es True, informa los fallos de lectura.
+
+    Returns:
+        pd.DataFrame or None: El DataFrame en caché, o None si no hay caché válido.
+    """
+    try:
+        ruta = _ruta_cache(directorio_cache, config["id"], _clave_cache(config))
+    except OSError:
+        return None  # La fuente no existe; el error se reporta al cargarla
+    if not os.path.exists(ruta):
+        return None
+    if config["data_source"] == 'oracle' and time.time() - os.path.getmtime(ruta) > ttl_oracle_horas * 3600:
+        return None
+    try:
+        return pd.read_parquet(ruta) if FORMATO_CACHE == "parquet" else pd.read_pickle(ruta)
+    except Exception as e:
+        if verbose: print(f"⚠️ Advertencia: No se pudo leer el caché '{ruta}': {e}")
+        return None
+
+
+def _escribir_cache(df, config, directorio_cache, verbose=False):
+    """
+    Guarda en el caché en disco un DataFrame preprocesado y elimina sus versiones anteriores.
+
+    Un fallo al escribir no interrumpe la carga; solo se informa.
+
+    Args:
+        df (pd.DataFrame): DataFrame ya preprocesado.
+        config (dict): Configuración del archivo (ver `_clave_cache`).
+        directorio_cache (str): Carpeta del caché.
+        verbose (bool): Si es True, informa la ruta escrita.
+    """
+    try:
+        os.makedirs(directorio_cache, exist_ok=True)
+        ruta = _ruta_cache(directorio_cache, config["id"], _clave_cache(config))
+        for nombre in os.listdir(directorio_cache):
+            if nombre.startswith(f"{config['id']}_") and os.path.join(directorio_cache, nombre) != ruta:
+                os.remove(os.path.join(directorio_cache, nombre))
+        if FORMATO_CACHE == "parquet":
+            df.to_parquet(ruta, index=False)
+        else:
+            df.to_pickle(ruta)
+        if verbose: print(f"    💾 Caché de '{config['id']}' guardado en '{ruta}'.")
+    except Exception as e:
+        print(f"⚠️ Advertencia: No se pudo guardar el caché de '{config['id']}': {e}")
+
+
+def _leer_lotes(config, db_connection=None, tamano_lote=None, solo_columnas_barrido=False):
+    """
+    Lee una fuente (CSV u Oracle) por lotes de filas.
+
+    Las columnas que se procesan como 'str' se leen del CSV directamente como texto, sin
+    inferir tipos que luego se descartan. Con `solo_columnas_barrido` solo se conservan las
+    columnas de 'cols_to_process' (en CSV con `usecols`; en Oracle se descartan las demás
+    en cada lote, antes de acumularlo).
+
+    Args:
+        config (dict): Configuración del archivo ('id', 'location', 'data_source', 'cols_to_process').
+        db_connection (sqlalchemy.engine.Engine, optional): Engine compartido para las fuentes 'oracle'.
+        tamano_lote (int, optional): Filas por lote. Si es None, la fuente se lee en un solo lote.
+        solo_columnas_barrido (bool): Si es True, proyecta solo las columnas de 'cols_to_process'.
+
+    Yields:
+        pd.DataFrame: Lotes crudos de la fuente, con los nombres de columna de Oracle en mayúsculas.
+    """
+    location = config["location"]
+    columnas = list(config["cols_to_process"])
+    if config["data_source"] == 'csv':
+        tipos = {col: str for col, reglas in config["cols_to_process"].items() if reglas["type"] == "str"}
+        lector = pd.read_csv(
+            location, delimiter=";", dtype=tipos, chunksize=tamano_lote,
+            usecols=(lambda col: col in columnas) if solo_columnas_barrido else None
+        )
+        if tamano_lote is None:
+            yield lector
+        else:
+            with lector:
+                yield from lector
+    else:
+        sql_query = _read_sql_from_file(location)
+        lotes = pd.read_sql_query(sql_query, db_connection, chunksize=tamano_lote)
+        for lote in ([lotes] if tamano_lote is None else lotes):
+            lote.columns = [col.upper() for col in lote.columns]
+            if solo_columnas_barrido:
+                lote = lote[[col for col in lote.columns if col in columnas]]
+            yield lote
+
+
+def _procesar_fuente(df, config, verbose=False):
+    """
+    Valida las columnas esperadas de un DataFrame y aplica sus reglas de 'cols_to_process'.
+
+    Args:
+        df (pd.DataFrame): Lote crudo de `_leer_lotes` (se modifica).
+        config (dict): Configuración del archivo ('id', 'location', 'expected_cols', 'cols_to_process').
+        verbose (bool): Si es True, imprime mensajes detallados.
+
+    Returns:
+        pd.DataFrame or None: El DataFrame procesado, o None si hubo un error (ya informado).
+    """
+    file_id = config["id"]
+    original_location = config["location"] # Para mensajes de error más claros
+    if verbose: print(f"  Procesando DataFrame '{file_id}' (cargado desde: {original_location})")
+
+    # 2a. Validar columnas esperadas
+    missing_cols = [col for col in config["expected_cols"] if col not in df.columns]
+    if missing_cols:
+        print(f"❌ Error: Faltan columnas cruciales en los datos de '{file_id}' (desde {original_location}).")
+        print(f"  Columnas del DataFrame: {list(df.columns)}")
+        print(f"  Columnas esperadas: {config['expected_cols']}")
+        print(f"  Columnas faltantes detectadas: {missing_cols}")
+        return None
+    if verbose: print(f"    ✅ Validación de columnas para '{file_id}' exitosa.")
+
+    # 2b. Procesar columnas: convertir tipos y aplicar transformaciones
+    if verbose: print(f"    🔄 Aplicando transformaciones y tipos de datos para '{file_id}'...")
+    for col_name, processing_rules in config["cols_to_process"].items():
+        if col_name not in df.columns:
+            print(f"⚠️ Advertencia: Columna '{col_name}' para procesar no encontrada en '{file_id}'. Se omite.")
+            continue
+
+        target_type_str = processing_rules["type"]
+        if verbose: print(f"      Procesando columna '{col_name}' al tipo '{target_type_str}'...")
+        try:
+            if target_type_str == "str":
+                df[col_name] = df[col_name].astype(str)
+                if processing_rules.get("strip", False): df[col_name] = df[col_name].str.strip()
+                if processing_rules.get("to_upper", False): df[col_name] = df[col_name].str.upper()
+
+            elif target_type_str == "int":
+                numeric_col = pd.to_numeric(df[col_name], errors='raise')
+                if numeric_col.notna().any() and not numeric_col.dropna().apply(lambda x: x == int(x)).all():
+                     raise ValueError(f"contiene valores flotantes (ej. {numeric_col.dropna().iloc[0]}) que no son enteros exactos.")
+                df[col_name] = numeric_col.astype('Int64')
+
+            elif target_type_str == "float":
+                df[col_name] = pd.to_numeric(df[col_name], errors='raise').astype(float)
+
+            elif target_type_str == "bool":
+                if pd.api.types.is_string_dtype(df[col_name]) or df[col_name].dtype == object:
+                    s_col_str = df[col_name].astype(str).str.lower().str.strip()
+                    bool_map = {
+                        'true': True, '1': True, 'yes': True, 't': True, 'verdadero': True, 'si': True, 's': True,
+                        'false': False, '0': False, 'no': False, 'f': False, 'falso': False,
+                        '': pd.NA, 'nan': pd.NA, 'none': pd.NA, '<na>': pd.NA
+                    }
+                    df[col_name] = s_col_str.map(bool_map)
+                df[col_name] = df[col_name].astype('boolean')
+            else:
+                df[col_name] = df[col_name].astype(target_type_str)
+            if verbose: print(f"        ✅ Columna '{col_name}' convertida a '{df[col_name].dtype}'.")
+
+        except Exception as e_conv:
+            print(f"❌ Error de Conversión en '{file_id}' (desde {original_location}):")
+            print(f"  No se pudo convertir la columna '{col_name}' al tipo '{target_type_str}'.")
+            print(f"  Error detallado: {e_conv}")
+            return None
+    return df
+
+
+def _cargar_y_procesar_fuente(config, db_connection, verbose, usar_cache, directorio_cache,
+                              tamano_lote=None, solo_columnas_barrido=False, instrumentacion=None):
+    """
+    Carga una fuente por lotes, procesa cada lote y (opcionalmente) guarda el resultado en caché.
+
+    Cada lote se valida y convierte (`_procesar_fuente`) apenas se lee, de modo que las columnas
+    crudas sin convertir nunca coexisten completas con las convertidas. Con `instrumentacion` se
+    registran por separado el tiempo de lectura y el de preprocesamiento de los lotes.
+
+    Returns:
+        pd.DataFrame or None: El DataFrame procesado, o None si hubo un error (ya informado).
+    """
+    file_id = config["id"]
+    location = config["location"]
+    current_data_source = config["data_source"]
+    if verbose: print(f"  Intentando cargar datos para '{file_id}' desde '{current_data_source.upper()}' en: {location}")
+
+    lotes_procesados = []
+    segundos_lectura, segundos_preproceso = 0.0, 0.0
+    try:
+        lotes = _leer_lotes(config, db_connection, tamano_lote, solo_columnas_barrido)
+        while True:
+            inicio = time.perf_counter()
+            lote = next(lotes, None)
+            segundos_lectura += time.perf_counter() - inicio
+            if lote is None:
+                break
+            inicio = time.perf_counter()
+            lote = _procesar_fuente(lote, config, verbose and not lotes_procesados)
+            segundos_preproceso += time.perf_counter() - inicio
+            if lote is None:
+                return None
+            lotes_procesados.append(lote)
+    except FileNotFoundError:
+        tipo_archivo = "CSV" if current_data_source == 'csv' else "SQL"
+        print(f"❌ Error: Archivo {tipo_archivo} no encontrado - {location}")
+        return None
+    except Exception as e:
+        if current_data_source == 'csv':
+            print(f"❌ Error al leer el archivo CSV '{location}': {e}")
+        else:
+            print(f"❌ Error al cargar datos desde Oracle para '{file_id}' (SQL file: {location}): {e}")
+        return None
+
+    if not lotes_procesados:
+        # Fuente sin filas: se valida igual con un DataFrame vacío de las columnas esperadas
+        lotes_procesados.append(_procesar_fuente(pd.DataFrame(columns=config["expected_cols"]), config, verbose))
+        if lotes_procesados[0] is None:
+            return None
+    df = lotes_procesados[0] if len(lotes_procesados) == 1 else pd.concat(lotes_procesados, ignore_index=True)
+    origen = f"Archivo CSV '{location}'" if current_data_source == 'csv' else f"Datos para '{file_id}' desde Oracle"
+    print(f"  ✅ {origen} leido y procesado exitosamente ({len(lotes_procesados)} lote(s), {len(df)} filas).")
+    registrar_etapa(instrumentacion, f"carga/{file_id}/lectura", segundos_lectura,
+                    fuente=current_data_source, lotes=len(lotes_procesados), filas=len(df))
+    registrar_etapa(instrumentacion, f"carga/{file_id}/preproceso", segundos_preproceso)
+
+    if usar_cache:
+        with medir_etapa(instrumentacion, f"carga/{file_id}/escritura_cache"):
+            _escribir_cache(df, config, directorio_cache, verbose)
+    return df
+
+
 def cargar_datos(
     file_circuitos_location,
     file_elementos_corte_location,
     file_lineas_location,
     file_trafos_location,
     source_types: list, # Ejemplo: ['csv', 'oracle', 'oracle', 'oracle']
-    verbose = False
+    verbose = False,
+    usar_cache = False,
+    forzar_recarga = False,
+    directorio_cache = "Data/cache",
+    ttl_cache_oracle_horas = 12,
+    max_hilos = 4,
+    tamano_lote = 100000,
+    solo_columnas_barrido = False,
+    instrumentacion = None
 ):
     """
     Carga y procesa datos, especificando la fuente (CSV u Oracle) para cada archivo individualmente.
@@ -37,6 +319,23 @@ def cargar_datos(
                              Cada string puede ser 'csv' o 'oracle'.
         db_connection (cx_Oracle.Connection, optional): Conexión activa a Oracle.
                                                        Requerida si alguna fuente es 'oracle'.
+        usar_cache (bool): Si es True, los DataFrames ya preprocesados se guardan en `directorio_cache`
+                           (Parquet si pyarrow está instalado, si no pickle) y se reutilizan mientras la
+                           fuente no cambie: para CSV mientras no cambie el archivo, para Oracle mientras
+                           no cambie la consulta y el caché tenga menos de `ttl_cache_oracle_horas`.
+        forzar_recarga (bool): Si es True, ignora el caché existente y lo reescribe con datos frescos.
+        directorio_cache (str): Carpeta del caché en disco.
+        ttl_cache_oracle_horas (float): Vigencia máxima del caché de fuentes Oracle, en horas.
+        max_hilos (int): Cantidad máxima de fuentes que se cargan y preprocesan en paralelo
+                         (1 para cargarlas en secuencia).
+        tamano_lote (int): Filas por lote al leer cada fuente; cada lote se procesa apenas se lee.
+                           None lee cada fuente completa de una vez.
+        solo_columnas_barrido (bool): Si es True, solo se conservan las columnas usadas por el
+                                      barrido ('cols_to_process'); las demás (p. ej. coordenadas
+                                      de las líneas) no llegan a los resultados ni a los reportes.
+        instrumentacion (dict): Registro de `crear_instrumentacion` (instrumentacion.py). Si se indica,
+                                se registran por fuente los tiempos de lectura del caché, lectura
+                                y preprocesamiento.
 
     Returns:
         tuple: (df_circuitos, df_elementos_corte, df_lineas) o (None, None, None, None) si hay error.
@@ -61,24 +360,6 @@ def cargar_datos(
         "df_trafos": source_types[3].lower()
     }
 
-    # Verificar si se necesita conexión a Oracle y si está disponible
-    is_oracle_in_sources = any(st == 'oracle' for st in source_types_map.values())
-    if is_oracle_in_sources:
-        try:
-            # Detalles de tu conexión
-            user = 'USER'
-            password = 'PASS'
-            host = 'HOST'
-            port = 1234
-            service_name = 'SERVICE'
-            # Crea la URI de conexión
-            database_uri = f'oracle+cx_oracle://{user}:{password}@{host}:{port}/?service_name={service_name}'
-            # Crea el engine usando SQLAlchemy
-            db_connection = create_engine(database_uri)
-        except Exception:
-            print("❌ Error: Al menos un archivo se especificó con fuente 'oracle', pero no se proporcionó 'db_connection'.")
-            return None, None, None, None
-
     # Plantillas de configuración base (igual que en cargar_datos_flexible)
     # Define aquí los tipos de datos esperados y las transformaciones.
     base_configs_templates = [
@@ -132,6 +413,7 @@ def cargar_datos(
 
         current_config["location"] = locations_map[file_id]
         current_config["data_source"] = source_types_map[file_id]
+        current_config["solo_columnas_barrido"] = solo_columnas_barrido
 
         if current_config["data_source"] not in ['csv', 'oracle']:
             print(f"❌ Error: Tipo de fuente '{current_config['data_source']}' para el archivo '{file_id}' no es válido. Use 'csv' o 'oracle'.")
@@ -139,108 +421,57 @@ def cargar_datos(
         
         file_processing_configs.append(current_config)
 
-    loaded_dataframes = {}
-
-    # --- PASO 1: Cargar todos los DataFrames según data_source individual ---
     print(f"🔄 Iniciando carga de datos...")
-    for config in file_processing_configs:
-        file_id = config["id"]
-        location = config["location"]
-        current_data_source = config["data_source"]
-        if verbose: print(f"  Intentando cargar datos para '{file_id}' desde '{current_data_source.upper()}' en: {location}")
 
-        if current_data_source == 'csv':
-            try:
-                loaded_dataframes[file_id] = pd.read_csv(location, delimiter=";")
-                print(f"  ✅ Archivo CSV '{location}' leido exitosamente.")
-            except FileNotFoundError:
-                print(f"❌ Error: Archivo CSV no encontrado - {location}")
-                return None, None, None, None
-            except Exception as e:
-                print(f"❌ Error al leer el archivo CSV '{location}': {e}")
-                return None, None, None, None
-        elif current_data_source == 'oracle':
-            # La comprobación de db_connection ya se hizo si 'oracle' está en las fuentes
-            try:
-                sql_query = _read_sql_from_file(location)
-                if verbose: print(f"    Consulta SQL leída desde '{location}'. Ejecutando...")
-                loaded_dataframes[file_id] = pd.read_sql_query(sql_query, db_connection)
-                
-                loaded_dataframes[file_id].columns = [col.upper() for col in loaded_dataframes[file_id].columns]
-
-                print(f"  ✅ Datos para '{file_id}' leidos exitosamente desde Oracle.")
-            except FileNotFoundError:
-                print(f"❌ Error: Archivo SQL no encontrado - {location}")
-                return None, None, None, None
-            except Exception as e:
-                print(f"❌ Error al cargar datos desde Oracle para '{file_id}' (SQL file: {location}): {e}")
-                return None, None, None, None
-    print("👍 Todos los datos fueron cargados inicialmente.")
-
-    # --- PASO 2: Validar columnas y Procesar (convertir tipos, transformar) ---
-    # Esta sección es idéntica a la de cargar_datos_flexible, solo se ajustan los mensajes
-    # para incluir la 'location' de donde se cargó el archivo para mayor claridad.
-    print("\n🔄 Iniciando preprocesamiento de DataFrames cargados...")
-    for config in file_processing_configs:
-        file_id = config["id"]
-        df = loaded_dataframes[file_id]
-        original_location = config["location"] # Para mensajes de error más claros
-        if verbose: print(f"  Procesando DataFrame '{file_id}' (cargado desde: {original_location})")
-
-        # 2a. Validar columnas esperadas
-        missing_cols = [col for col in config["expected_cols"] if col not in df.columns]
-        if missing_cols:
-            print(f"❌ Error: Faltan columnas cruciales en los datos de '{file_id}' (desde {original_location}).")
-            print(f"  Columnas del DataFrame: {list(df.columns)}")
-            print(f"  Columnas esperadas: {config['expected_cols']}")
-            print(f"  Columnas faltantes detectadas: {missing_cols}")
+    # --- PASO 0: Tomar del caché en disco los DataFrames vigentes ---
+    cached_dataframes = {}
+    if usar_cache and not forzar_recarga:
+        for config in file_processing_configs:
+            with medir_etapa(instrumentacion, f"carga/{config['id']}/lectura_cache"):
+                df_cache = _leer_cache(config, directorio_cache, ttl_cache_oracle_horas, verbose)
+            if df_cache is not None:
+                cached_dataframes[config["id"]] = df_cache
+                print(f"  ⚡ Datos para '{config['id']}' tomados del caché.")
+
+    # Verificar si se necesita conexión a Oracle y si está disponible
+    # (solo para las fuentes que no se tomaron del caché)
+    is_oracle_in_sources = any(config["data_source"] == 'oracle' and config["id"] not in cached_dataframes
+                               for config in file_processing_configs)
+    db_connection = None
+    if is_oracle_in_sources:
+        try:
+            # Detalles de tu conexión
+            user = 'USER'
+            password = 'PASS'
+            host = 'HOST'
+            port = 1234
+            service_name = 'SERVICE'
+            # Crea la URI de conexión
+            database_uri = f'oracle+cx_oracle://{user}:{password}@{host}:{port}/?service_name={service_name}'
+            # Crea el engine usando SQLAlchemy; su pool admite una conexión por hilo de carga
+            # arraysize define cuántas filas trae cx_Oracle en cada viaje al servidor
+            db_connection = create_engine(database_uri, pool_size=max(1, max_hilos), arraysize=10000)
+        except Exception:
+            print("❌ Error: Al menos un archivo se especificó con fuente 'oracle', pero no se proporcionó 'db_connection'.")
+            return None, None, None, None
+
+    # --- PASOS 1 y 2: Cargar, validar y procesar cada fuente pendiente ---
+    # Cada fuente se carga y preprocesa en su propio hilo; las consultas a Oracle comparten el
+    # mismo engine (y su pool de conexiones). Si cualquier fuente falla, no se retorna ninguna.
+    configs_pendientes = [config for config in file_processing_configs if config["id"] not in cached_dataframes]
+    loaded_dataframes = dict(cached_dataframes)
+    if configs_pendientes:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(max_hilos, len(configs_pendientes)))) as executor:
+            futuros = {
+                config["id"]: executor.submit(_cargar_y_procesar_fuente, config, db_connection, verbose,
+                                              usar_cache, directorio_cache, tamano_lote, solo_columnas_barrido,
+                                              instrumentacion)
+                for config in configs_pendientes
+            }
+            for file_id, futuro in futuros.items():
+                loaded_dataframes[file_id] = futuro.result()
+        if any(loaded_dataframes[config["id"]] is None for config in configs_pendientes):
             return None, None, None, None
-        if verbose: print(f"    ✅ Validación de columnas para '{file_id}' exitosa.")
-
-        # 2b. Procesar columnas: convertir tipos y aplicar transformaciones
-        if verbose: print(f"    🔄 Aplicando transformaciones y tipos de datos para '{file_id}'...")
-        for col_name, processing_rules in config["cols_to_process"].items():
-            if col_name not in df.columns:
-                print(f"⚠️ Advertencia: Columna '{col_name}' para procesar no encontrada en '{file_id}'. Se omite.")
-                continue
-
-            target_type_str = processing_rules["type"]
-            if verbose: print(f"      Procesando columna '{col_name}' al tipo '{target_type_str}'...")
-            try:
-                if target_type_str == "str":
-                    df[col_name] = df[col_name].astype(str)
-                    if processing_rules.get("strip", False): df[col_name] = df[col_name].str.strip()
-                    if processing_rules.get("to_upper", False): df[col_name] = df[col_name].str.upper()
-                
-                elif target_type_str == "int":
-                    numeric_col = pd.to_numeric(df[col_name], errors='raise')
-                    if numeric_col.notna().any() and not numeric_col.dropna().apply(lambda x: x == int(x)).all():
-                         raise ValueError(f"contiene valores flotantes (ej. {numeric_col.dropna().iloc[0]}) que no son enteros exactos.")
-                    df[col_name] = numeric_col.astype('Int64')
-
-                elif target_type_str == "float":
-                    df[col_name] = pd.to_numeric(df[col_name], errors='raise').astype(float)
-
-                elif target_type_str == "bool":
-                    if pd.api.types.is_string_dtype(df[col_name]) or df[col_name].dtype == object:
-                        s_col_str = df[col_name].astype(str).str.lower().str.strip()
-                        bool_map = {
-                            'true': True, '1': True, 'yes': True, 't': True, 'verdadero': True, 'si': True, 's': True,
-                            'false': False, '0': False, 'no': False, 'f': False, 'falso': False,
-                            '': pd.NA, 'nan': pd.NA, 'none': pd.NA, '<na>': pd.NA
-                        }
-                        df[col_name] = s_col_str.map(bool_map)
-                    df[col_name] = df[col_name].astype('boolean')
-                else:
-                    df[col_name] = df[col_name].astype(target_type_str)
-                if verbose: print(f"        ✅ Columna '{col_name}' convertida a '{df[col_name].dtype}'.")
-
-            except Exception as e_conv:
-                print(f"❌ Error de Conversión en '{file_id}' (desde {original_location}):")
-                print(f"  No se pudo convertir la columna '{col_name}' al tipo '{target_type_str}'.")
-                print(f"  Error detallado: {e_conv}")
-                return None, None, None, None
-        print(f"    ✅ Transformaciones para '{file_id}' completadas.")
 
     print("\n👍 ¡Todos los DataFrames han sido cargados y preprocesados exitosamente")
     return loaded_dataframes["df_circuitos"], loaded_dataframes["df_elementos_corte"], loaded_dataframes["df_lineas"], loaded_dataframes["df_trafos"]
\ No newline at end of file
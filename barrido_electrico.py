@@ -1,8 +1,20 @@
 # barrido_electrico_core.py
+import concurrent.futures
+import multiprocessing
+import os
+import numpy as np
 import pandas as pd
 import sys
 import time
 
+from modelo_red import (
+    construir_modelo_red, construir_secciones_lineas, codigo_circuito, codigo_nodo, posicion_ec_por_co,
+    posiciones_en_nodo, posiciones_en_nodos,
+    NODO_NULO, EST_CERRADO, EST_ABIERTO
+)
+from topologia_red import abrir_snapshot_modelo_red, guardar_snapshot_modelo_red, huella_datos_modelo_red
+from instrumentacion import medir_etapa, registrar_circuito, registrar_etapa
+
 # ---- Dependencias de la Barra de Progreso y Colorama ----
 try:
     from colorama import Fore, Style, init
@@ -85,14 +97,157 @@ def print_progress_bar(iteration, total, prefix='', suffix='Completado', length=
     
     sys.stdout.flush()  # Asegura que la salida se escriba inmediatamente en la consola.
 
+def crear_resultados_barrido():
+    """
+    Crea el acumulador columnar de resultados del barrido de conectividad.
+
+    En lugar de un diccionario por elemento visitado, el barrido registra solo la posición
+    (iloc) del elemento en su DataFrame global y las columnas calculadas, cada una en su propia
+    lista. Los DataFrames finales se materializan al final con `materializar_resultados_barrido`.
+
+    La jerarquía de ECs se guarda como un árbol de punteros al padre ('arbol'): cada EC cerrado
+    que el barrido atraviesa es un nodo del árbol con su CO, el índice de su padre y su camino
+    aguas arriba, calculado una sola vez al crearlo. Líneas, trafos y ECs solo guardan el índice
+    del nodo del árbol bajo el que cuelgan ('nodo_arbol'), de modo que todos comparten el mismo
+    string de 'Elementos_Aguas_Arriba'.
+
+    Retorna:
+        dict: Diccionario con las llaves 'arbol', 'ecs', 'lineas' y 'trafos', cada una con listas por columna.
+              'pos' contiene las posiciones de fila; en 'trafos', 'pos_linea_conexion' contiene la
+              posición de la línea de conexión y en 'ecs', 'interconexion' marca los ECs de otro circuito
+              (el EC de arranque se registra con 'nodo_arbol' = -1). En 'arbol', 'pos_ec' es la posición
+              del EC que origina cada nodo del árbol.
+    """
+    return {
+        'arbol': {'co': [], 'padre': [], 'camino': [], 'pos_ec': []},
+        'ecs': {'pos': [], 'nodo_arbol': [], 'Circuito_Origen_Barrido': [],
+                'Nodo_No_Explorado_Anillo': [], 'interconexion': []},
+        'lineas': {'pos': [], 'nodo_arbol': [], 'Circuito_Origen_Barrido': []},
+        'trafos': {'pos': [], 'pos_linea_conexion': [], 'nodo_arbol': [], 'Circuito_Origen_Barrido': []},
+    }
+
+
+def crear_marcas_visitados(modelo_red):
+    """
+    Crea los arreglos de visitados de los barridos, indexados por el FID codificado de cada tabla.
+
+    Cada barrido toma una época nueva (`_nueva_epoca`) y marca sus elementos con ella: un elemento
+    está visitado si su marca es mayor o igual a la época actual. Así los arreglos se reservan una
+    sola vez y no se limpian entre circuitos.
+
+    Parámetros:
+        modelo_red (dict): Modelo generado por `construir_modelo_red`.
+
+    Retorna:
+        dict: 'epoca' (int) y, por tabla ('ecs', 'lineas', 'trafos'), un np.ndarray int32 de marcas.
+    """
+    marcas = {'epoca': 0}
+    for tabla in ('ecs', 'lineas', 'trafos'):
+        fids = modelo_red[tabla]['fid']
+        marcas[tabla] = np.zeros(int(fids.max()) + 1 if len(fids) else 0, dtype=np.int32)
+    return marcas
+
+
+def _nueva_epoca(marcas):
+    """Avanza la época de las marcas; si se agotan las épocas, reinicia todas las marcas."""
+    if marcas['epoca'] >= np.iinfo(np.int32).max:
+        for tabla in ('ecs', 'lineas', 'trafos'):
+            marcas[tabla].fill(0)
+        marcas['epoca'] = 0
+    marcas['epoca'] += 1
+    return marcas['epoca']
+
+
+def _agregar_nodo_arbol(arbol, co, padre, pos_ec, circuito_co_inicial):
+    """
+    Agrega un EC al árbol de punteros al padre y calcula una sola vez su camino aguas arriba.
+
+    Parámetros:
+        arbol (dict): Entrada 'arbol' del acumulador de resultados.
+        co (str): CODIGO_OPERATIVO del EC.
+        padre (int): Índice del nodo padre en el árbol (-1 para la raíz del circuito).
+        pos_ec (int): Posición del EC en el DataFrame global de ECs.
+        circuito_co_inicial (str): Circuito del barrido; es el camino de la raíz.
+
+    Retorna:
+        int: Índice del nuevo nodo del árbol.
+    """
+    camino = circuito_co_inicial if padre < 0 else arbol['camino'][padre] + "," + co
+    arbol['co'].append(co)
+    arbol['padre'].append(padre)
+    arbol['camino'].append(camino)
+    arbol['pos_ec'].append(pos_ec)
+    return len(arbol['co']) - 1
+
+
+def _tomar_filas(df_global, posiciones):
+    """Selecciona filas por posición en una sola operación y reinicia el índice."""
+    return df_global.take(np.asarray(posiciones, dtype=np.intp)).reset_index(drop=True)
+
+
+def materializar_resultados_barrido(resultados_barrido, df_elementos_corte_global, df_lineas_global, df_trafos_global):
+    """
+    Construye los DataFrames de resultados a partir del acumulador columnar del barrido.
+
+    Cada DataFrame se obtiene con un único `take` sobre el DataFrame global correspondiente,
+    al que se agregan las columnas calculadas durante el barrido.
+
+    Parámetros:
+        resultados_barrido (dict): Acumulador generado por `crear_resultados_barrido`.
+        df_elementos_corte_global (pd.DataFrame): DataFrame con todos los elementos de corte.
+        df_lineas_global (pd.DataFrame): DataFrame con todas las líneas.
+        df_trafos_global (pd.DataFrame): DataFrame con todos los transformadores.
+
+    Retorna:
+        tuple: (df_elementos_corte, df_lineas, df_trafos) con una fila por elemento visitado.
+    """
+    # El CO y el camino aguas arriba de cada fila se obtienen del árbol de ECs con un take
+    arbol = resultados_barrido['arbol']
+    cos_arbol = np.asarray(arbol['co'] + [None], dtype=object)  # La posición -1 apunta a None
+    caminos_arbol = np.asarray(arbol['camino'] + [None], dtype=object)
+
+    res_ecs = resultados_barrido['ecs']
+    df_ecs = _tomar_filas(df_elementos_corte_global, res_ecs['pos'])
+    nodos_arbol_ecs = np.asarray(res_ecs['nodo_arbol'], dtype=np.intp)
+    circuitos_ecs = np.asarray(res_ecs['Circuito_Origen_Barrido'], dtype=object)
+    df_ecs['Equipo_Padre'] = cos_arbol[nodos_arbol_ecs]  # El arranque no tiene padre en el barrido
+    # El camino aguas arriba del arranque es su propio circuito
+    df_ecs['Elementos_Aguas_Arriba'] = np.where(nodos_arbol_ecs >= 0, caminos_arbol[nodos_arbol_ecs], circuitos_ecs)
+    df_ecs['Circuito_Origen_Barrido'] = circuitos_ecs
+    df_ecs['Nodo_No_Explorado_Anillo'] = pd.Series(res_ecs['Nodo_No_Explorado_Anillo'], index=df_ecs.index, dtype=object)
+    # Los ECs de interconexión se reportan como 'OPEN' conservando su estado original
+    interconexion = np.asarray(res_ecs['interconexion'], dtype=bool)
+    if interconexion.any():
+        df_ecs['EST_ESTABLE_ORIGINAL'] = df_ecs['EST_ESTABLE'].where(interconexion, np.nan)
+        df_ecs.loc[interconexion, 'EST_ESTABLE'] = 'OPEN'
+
+    res_lineas = resultados_barrido['lineas']
+    df_lineas = _tomar_filas(df_lineas_global, res_lineas['pos'])
+    nodos_arbol_lineas = np.asarray(res_lineas['nodo_arbol'], dtype=np.intp)
+    df_lineas['Equipo_Padre'] = cos_arbol[nodos_arbol_lineas]
+    df_lineas['Elementos_Aguas_Arriba'] = caminos_arbol[nodos_arbol_lineas]
+    df_lineas['Circuito_Origen_Barrido'] = np.asarray(res_lineas['Circuito_Origen_Barrido'], dtype=object)
+
+    res_trafos = resultados_barrido['trafos']
+    df_trafos = _tomar_filas(df_trafos_global, res_trafos['pos'])
+    fids_lineas = df_lineas_global['G3E_FID'].astype(str).to_numpy(dtype=object)
+    df_trafos['Linea_Conexion_FID'] = fids_lineas[np.asarray(res_trafos['pos_linea_conexion'], dtype=np.intp)]
+    nodos_arbol_trafos = np.asarray(res_trafos['nodo_arbol'], dtype=np.intp)
+    df_trafos['Elementos_Aguas_Arriba'] = caminos_arbol[nodos_arbol_trafos]
+    df_trafos['Circuito_Origen_Barrido'] = np.asarray(res_trafos['Circuito_Origen_Barrido'], dtype=object)
+    df_trafos['Equipo_Padre_Linea'] = cos_arbol[nodos_arbol_trafos]
+
+    return df_ecs, df_lineas, df_trafos
+
 def barrido_conectividad_por_circuito(
     circuito_co_inicial,
     df_elementos_corte_global,  # DataFrame global, no pre-filtrado por circuito aquí
     df_lineas_global,           # DataFrame global
     df_trafos_global,           # DataFrame global
-    resultados_elementos_corte_global_lista,
-    resultados_lineas_global_lista,
-    resultados_transformadores_global_lista
+    resultados_barrido,
+    modelo_red=None,
+    marcas_visitados=None,
+    contadores=None
     ):
     """
     Realiza un barrido de conectividad eléctrica para un circuito específico.
@@ -101,6 +256,8 @@ def barrido_conectividad_por_circuito(
     y explora la red eléctrica aguas abajo, identificando la conexión entre elementos de corte (EC)
     y líneas. También identifica transformadores conectados a las líneas energizadas.
     Utiliza un algoritmo de búsqueda en profundidad (DFS) implementado con una pila.
+    La exploración se hace sobre el modelo codificado de la red (nodos y FIDs enteros) y
+    solo se registran posiciones de fila y columnas calculadas, sin copiar filas de los DataFrames.
 
     Parámetros:
         circuito_co_inicial (str): El CODIGO_OPERATIVO del elemento de arranque del circuito.
@@ -111,194 +268,848 @@ def barrido_conectividad_por_circuito(
                                          Debe contener 'G3E_FID', 'NODO1_ID', 'NODO2_ID'.
         df_trafos_global (pd.DataFrame): DataFrame con todos los transformadores de la red.
                                          Debe contener 'G3E_FID', 'NODO1_ID', 'NODO2_ID'.
-        resultados_elementos_corte_global_lista (list): Lista para acumular los diccionarios de los EC encontrados.
-        resultados_lineas_global_lista (list): Lista para acumular los diccionarios de las líneas encontradas.
-        resultados_transformadores_global_lista (list): Lista para acumular los diccionarios de los trafos encontrados.
+        resultados_barrido (dict): Acumulador columnar creado con `crear_resultados_barrido`, donde se
+                                   registran las posiciones y columnas calculadas de los elementos encontrados.
+        modelo_red (dict, optional): Modelo codificado generado por `construir_modelo_red`.
+                                     Si es None se construye aquí; al barrer varios circuitos
+                                     conviene construirlo una sola vez y reutilizarlo.
+        marcas_visitados (dict, optional): Marcas de visitados de `crear_marcas_visitados`. Al barrer
+                                           varios circuitos conviene crearlas una sola vez y reutilizarlas;
+                                           si es None se crean aquí.
+        contadores (dict, optional): Si se indica, se le suman 'nodos_explorados' (nodos sacados de la
+                                     pila), 'consultas_indice' (consultas a la adyacencia del modelo) y
+                                     se actualiza 'max_profundidad_pila'. Por defecto None.
 
     Retorna:
-        None: La función modifica las listas de resultados directamente.
+        None: La función modifica el acumulador de resultados directamente.
     """
+    if modelo_red is None:
+        modelo_red = construir_modelo_red(df_elementos_corte_global, df_lineas_global, df_trafos_global)
+    if marcas_visitados is None:
+        marcas_visitados = crear_marcas_visitados(modelo_red)
+
     # Encuentra el elemento de arranque específico para este circuito_co_inicial
     # Se asume que el df_elementos_corte_global contiene todos los elementos.
-    elementos_arranque = df_elementos_corte_global[df_elementos_corte_global['CODIGO_OPERATIVO'] == circuito_co_inicial]
-    if elementos_arranque.empty:
+    pos_arranque = posicion_ec_por_co(modelo_red, circuito_co_inicial)
+    if pos_arranque < 0:
         # No se imprime advertencia aquí para no interferir con la barra de progreso.
         # El manejo de circuitos no encontrados se puede hacer antes de llamar a esta función o al revisar resultados.
         return
 
-    elemento_arranque = elementos_arranque.iloc[0].copy()
-    fid_arranque = str(elemento_arranque['G3E_FID'])
+    # Arreglos codificados del modelo usados en el bucle principal
+    nodos_red = modelo_red['nodos']
+    ecs, lineas, trafos = modelo_red['ecs'], modelo_red['lineas'], modelo_red['trafos']
+    ec_nodo1, ec_nodo2, ec_fid = ecs['nodo1'], ecs['nodo2'], ecs['fid']
+    ec_estado, ec_circuito, ec_co = ecs['estado'], ecs['circuito'], ecs['co']
+    lin_nodo1, lin_nodo2, lin_fid = lineas['nodo1'], lineas['nodo2'], lineas['fid']
+    trafo_fid = trafos['fid']
+    arbol = resultados_barrido['arbol']
+    res_ecs, res_lineas, res_trafos = resultados_barrido['ecs'], resultados_barrido['lineas'], resultados_barrido['trafos']
+    codigo_circuito_inicial = codigo_circuito(modelo_red, circuito_co_inicial)
+
+    fid_arranque = ec_fid[pos_arranque]
 
-    # Conjuntos para rastrear elementos visitados DENTRO de ESTE barrido de circuito específico
-    visitados_ec_fids_este_circuito = set()
-    visitados_lineas_fids_este_circuito = set()
-    visitados_trafos_fids_este_circuito = set()
+    # Marcas de visitados DENTRO de ESTE barrido de circuito específico: un elemento está visitado
+    # si su marca es >= la época del barrido
+    epoca = _nueva_epoca(marcas_visitados)
+    # Vistas de memoria sobre los mismos arreglos: el acceso por elemento es más rápido que con NumPy
+    marcas_ecs, marcas_lineas, marcas_trafos = (memoryview(marcas_visitados[tabla]) for tabla in ('ecs', 'lineas', 'trafos'))
 
-    # Prepara y añade el elemento de arranque a los resultados
-    elemento_arranque_dict = elemento_arranque.to_dict()
-    elemento_arranque_dict['Equipo_Padre'] = None  # El arranque no tiene padre en el barrido
-    elemento_arranque_dict['Elementos_Aguas_Arriba'] = circuito_co_inicial # El camino aguas arriba es él mismo
-    elemento_arranque_dict['Circuito_Origen_Barrido'] = circuito_co_inicial # Circuito que originó este barrido
-    elemento_arranque_dict['Nodo_No_Explorado_Anillo'] = pd.NA  # Para análisis de anillos posterior
-    resultados_elementos_corte_global_lista.append(elemento_arranque_dict)
-    visitados_ec_fids_este_circuito.add(fid_arranque)
+    # Registra el elemento de arranque en los resultados
+    res_ecs['pos'].append(pos_arranque)
+    res_ecs['nodo_arbol'].append(-1)  # El arranque no tiene padre en el barrido
+    res_ecs['Circuito_Origen_Barrido'].append(circuito_co_inicial) # Circuito que originó este barrido
+    res_ecs['Nodo_No_Explorado_Anillo'].append(pd.NA)  # Para análisis de anillos posterior
+    res_ecs['interconexion'].append(False)
+    marcas_ecs[fid_arranque] = epoca
 
-    # Inicializa la pila de exploración para el DFS
+    # Inicializa la pila de exploración para el DFS.
+    # La raíz del árbol de ECs es el arranque, con el circuito como CO y como camino aguas arriba.
     pila_exploracion = []
-    camino_co_aguas_arriba_para_hijos_de_arranque = [circuito_co_inicial]
+    nodo_arbol_arranque = _agregar_nodo_arbol(arbol, circuito_co_inicial, -1, pos_arranque, circuito_co_inicial)
 
     # Inicia la exploración desde NODO2 del interruptor de arranque (según regla de negocio)
-    if pd.notna(elemento_arranque['NODO2_ID']) and str(elemento_arranque['NODO2_ID']).lower() != 'nan':
+    if ec_nodo2[pos_arranque] != NODO_NULO:
         pila_exploracion.append((
-            str(elemento_arranque['G3E_FID']),      # FID del elemento actual (padre en la exploración)
-            elemento_arranque['TIPO'],              # Tipo del elemento actual
-            str(elemento_arranque['NODO2_ID']),     # Nodo desde el cual explorar
-            circuito_co_inicial,                    # CO del EC padre directo en la jerarquía del barrido
-            list(camino_co_aguas_arriba_para_hijos_de_arranque) # Camino de COs aguas arriba
+            fid_arranque,                           # FID codificado del EC padre en la exploración (-1 si es línea)
+            ec_nodo2[pos_arranque],                 # Nodo (codificado) desde el cual explorar
+            nodo_arbol_arranque                     # Nodo del árbol del EC padre directo en la jerarquía del barrido
         ))
 
+    # Contadores locales de la exploración (se entregan a `contadores` al final)
+    nodos_explorados, consultas_trafos, max_profundidad_pila = 0, 0, len(pila_exploracion)
+
     # Bucle principal del DFS
     while pila_exploracion:
-        fid_padre_dfs, tipo_padre_dfs, nodo_a_explorar, co_ec_padre_jerarquico, camino_co_actual = pila_exploracion.pop()
+        if len(pila_exploracion) > max_profundidad_pila:
+            max_profundidad_pila = len(pila_exploracion)
+        fid_ec_padre_dfs, nodo_a_explorar, nodo_arbol_padre = pila_exploracion.pop()
+        nodos_explorados += 1
 
         # 1. Explorar Líneas conectadas al nodo_a_explorar
-        # Se busca en el DataFrame global de líneas.
-        lineas_conectadas = df_lineas_global[
-            (df_lineas_global['NODO1_ID'] == nodo_a_explorar) | (df_lineas_global['NODO2_ID'] == nodo_a_explorar)
-        ]
-        for _, linea_conectada_row_original in lineas_conectadas.iterrows():
-            linea_conectada_row = linea_conectada_row_original.copy()
-            linea_fid = str(linea_conectada_row['G3E_FID'])
-            
-            if linea_fid not in visitados_lineas_fids_este_circuito:
-                visitados_lineas_fids_este_circuito.add(linea_fid)
-                
-                linea_dict = linea_conectada_row.to_dict()
-                linea_dict['Equipo_Padre'] = co_ec_padre_jerarquico
-                elementos_aguas_arriba_linea_str = ",".join(camino_co_actual)
-                linea_dict['Elementos_Aguas_Arriba'] = elementos_aguas_arriba_linea_str
-                linea_dict['Circuito_Origen_Barrido'] = circuito_co_inicial
-                resultados_lineas_global_lista.append(linea_dict)
-                
-                # Determinar el otro nodo de la línea para continuar la exploración
-                otro_nodo_de_linea_para_explorar = None
-                if str(linea_conectada_row['NODO1_ID']) == nodo_a_explorar and \
-                   pd.notna(linea_conectada_row['NODO2_ID']) and str(linea_conectada_row['NODO2_ID']).lower() != 'nan':
-                    otro_nodo_de_linea_para_explorar = str(linea_conectada_row['NODO2_ID'])
-                elif str(linea_conectada_row['NODO2_ID']) == nodo_a_explorar and \
-                     pd.notna(linea_conectada_row['NODO1_ID']) and str(linea_conectada_row['NODO1_ID']).lower() != 'nan':
-                    otro_nodo_de_linea_para_explorar = str(linea_conectada_row['NODO1_ID'])
-                
-                # Identificar transformadores conectados a esta línea
-                nodos_de_conexion_en_linea = {nodo_a_explorar, otro_nodo_de_linea_para_explorar}
-                nodos_de_conexion_en_linea.discard(None) # Remover None si 'otro_nodo' era None
-                nodos_de_conexion_en_linea = {n for n in nodos_de_conexion_en_linea if str(n).lower() != 'nan'}
-
-
-                for nodo_valido_en_linea in nodos_de_conexion_en_linea:
-                    trafos_encontrados_en_nodo = df_trafos_global[
-                        (df_trafos_global['NODO1_ID'] == nodo_valido_en_linea) | \
-                        (df_trafos_global['NODO2_ID'] == nodo_valido_en_linea)
-                    ]
-                    for _, trafo_row_original in trafos_encontrados_en_nodo.iterrows():
-                        trafo_row = trafo_row_original.copy()
-                        trafo_fid = str(trafo_row['G3E_FID'])
-                        if trafo_fid not in visitados_trafos_fids_este_circuito:
-                            visitados_trafos_fids_este_circuito.add(trafo_fid)
-                            
-                            trafo_dict = trafo_row.to_dict()
-                            trafo_dict['Linea_Conexion_FID'] = linea_fid
-                            trafo_dict['Elementos_Aguas_Arriba'] = elementos_aguas_arriba_linea_str
-                            trafo_dict['Circuito_Origen_Barrido'] = circuito_co_inicial
-                            trafo_dict['Equipo_Padre_Linea'] = co_ec_padre_jerarquico
-                            resultados_transformadores_global_lista.append(trafo_dict)
-                                
-                # Si la línea tiene un "otro extremo", añadirlo a la pila para continuar exploración
-                if otro_nodo_de_linea_para_explorar: 
-                    pila_exploracion.append((
-                        linea_fid, 
-                        'LINEA', # Tipo del elemento desde donde se origina esta exploración
-                        otro_nodo_de_linea_para_explorar, 
-                        co_ec_padre_jerarquico, # El padre jerárquico no cambia al pasar por una línea
-                        list(camino_co_actual)
-                    ))
+        # Se consulta la adyacencia del modelo en lugar de recorrer el DataFrame global de líneas.
+        for pos_linea in posiciones_en_nodo(lineas, nodo_a_explorar).tolist():
+            fid_linea_cod = lin_fid[pos_linea]
+            if marcas_lineas[fid_linea_cod] >= epoca:
+                continue
+            marcas_lineas[fid_linea_cod] = epoca
+
+            res_lineas['pos'].append(pos_linea)
+            res_lineas['nodo_arbol'].append(nodo_arbol_padre)
+            res_lineas['Circuito_Origen_Barrido'].append(circuito_co_inicial)
+
+            # Determinar el otro nodo de la línea para continuar la exploración (NODO_NULO si no existe)
+            otro_nodo_de_linea_para_explorar = NODO_NULO
+            if lin_nodo1[pos_linea] == nodo_a_explorar:
+                otro_nodo_de_linea_para_explorar = lin_nodo2[pos_linea]
+            elif lin_nodo2[pos_linea] == nodo_a_explorar:
+                otro_nodo_de_linea_para_explorar = lin_nodo1[pos_linea]
+
+            # Identificar transformadores conectados a esta línea
+            nodos_de_conexion_en_linea = [nodo_a_explorar]
+            if otro_nodo_de_linea_para_explorar != NODO_NULO and otro_nodo_de_linea_para_explorar != nodo_a_explorar:
+                nodos_de_conexion_en_linea.append(otro_nodo_de_linea_para_explorar)
+
+            consultas_trafos += len(nodos_de_conexion_en_linea)
+            for nodo_valido_en_linea in nodos_de_conexion_en_linea:
+                for pos_trafo in posiciones_en_nodo(trafos, nodo_valido_en_linea).tolist():
+                    fid_trafo_cod = trafo_fid[pos_trafo]
+                    if marcas_trafos[fid_trafo_cod] >= epoca:
+                        continue
+                    marcas_trafos[fid_trafo_cod] = epoca
+                    res_trafos['pos'].append(pos_trafo)
+                    res_trafos['pos_linea_conexion'].append(pos_linea)
+                    res_trafos['nodo_arbol'].append(nodo_arbol_padre)
+                    res_trafos['Circuito_Origen_Barrido'].append(circuito_co_inicial)
+
+            # Si la línea tiene un "otro extremo", añadirlo a la pila para continuar exploración
+            if otro_nodo_de_linea_para_explorar != NODO_NULO:
+                pila_exploracion.append((
+                    -1, # Una línea no es EC padre
+                    otro_nodo_de_linea_para_explorar,
+                    nodo_arbol_padre # El padre jerárquico no cambia al pasar por una línea
+                ))
 
         # 2. Explorar Elementos de Corte (EC) conectados al nodo_a_explorar
-        # Se busca en el DataFrame global de ECs.
-        ecs_conectados = df_elementos_corte_global[
-            ((df_elementos_corte_global['NODO1_ID'] == nodo_a_explorar) | (df_elementos_corte_global['NODO2_ID'] == nodo_a_explorar)) &
-            (df_elementos_corte_global['G3E_FID'] != fid_padre_dfs) # Evitar volver inmediatamente al EC padre por el mismo nodo
-        ]
-        for _, ec_conectado_row_original in ecs_conectados.iterrows():
-            ec_conectado_row = ec_conectado_row_original.copy() # Trabajar con una copia para modificaciones temporales
-            ec_fid = str(ec_conectado_row['G3E_FID'])
-            
-            if ec_fid not in visitados_ec_fids_este_circuito:
-                visitados_ec_fids_este_circuito.add(ec_fid)
-                
-                ec_dict = ec_conectado_row.to_dict()
-                ec_dict['Equipo_Padre'] = co_ec_padre_jerarquico
-                ec_dict['Elementos_Aguas_Arriba'] = ",".join(camino_co_actual)
-                ec_dict['Circuito_Origen_Barrido'] = circuito_co_inicial
-                ec_dict['Nodo_No_Explorado_Anillo'] = pd.NA 
-
-                # Lógica para manejo de ECs de interconexión (posibles puntos de anillo)
-                # Si un EC pertenece a un circuito diferente al del barrido actual,
-                # se trata como 'OPEN' para el análisis de anillos, conservando su estado original.
-                estado_operativo_ec = ec_conectado_row['EST_ESTABLE'] # Estado original para la exploración
-                if ('CIRCUITO' in ec_conectado_row and ec_conectado_row['CIRCUITO'] != circuito_co_inicial):
-                    # Este EC es un potencial punto de transferencia o anillo con otro circuito
-                    estado_operativo_ec = 'OPEN' # Tratar como OPEN para análisis de anillo
-                    ec_dict['EST_ESTABLE_ORIGINAL'] = ec_conectado_row_original['EST_ESTABLE']
-                    ec_dict['EST_ESTABLE'] = 'OPEN' # Para el DataFrame final y lógica de anillo
-                
-                # Si el EC está (o se considera) 'OPEN', identificar el nodo no explorado para el barrido de anillos
-                if estado_operativo_ec == 'OPEN': 
-                    nodo_no_explorado_para_anillo = pd.NA
-                    if str(ec_conectado_row['NODO1_ID']) == nodo_a_explorar and \
-                       pd.notna(ec_conectado_row['NODO2_ID']) and str(ec_conectado_row['NODO2_ID']).lower() != 'nan':
-                        nodo_no_explorado_para_anillo = str(ec_conectado_row['NODO2_ID'])
-                    elif str(ec_conectado_row['NODO2_ID']) == nodo_a_explorar and \
-                         pd.notna(ec_conectado_row['NODO1_ID']) and str(ec_conectado_row['NODO1_ID']).lower() != 'nan':
-                        nodo_no_explorado_para_anillo = str(ec_conectado_row['NODO1_ID'])
-                    ec_dict['Nodo_No_Explorado_Anillo'] = nodo_no_explorado_para_anillo
-                
-                resultados_elementos_corte_global_lista.append(ec_dict)
-
-                # Si el EC está efectivamente CERRADO (y no es de interconexión tratado como OPEN), continuar barrido
-                if estado_operativo_ec == 'CLOSED': 
-                    nuevo_co_ec_padre_jerarquico_para_hijos = str(ec_conectado_row['CODIGO_OPERATIVO'])
-                    nuevo_camino_co_para_hijos = list(camino_co_actual) + [nuevo_co_ec_padre_jerarquico_para_hijos]
-                    
-                    otro_nodo_de_ec_para_explorar = pd.NA
-                    if str(ec_conectado_row['NODO1_ID']) == nodo_a_explorar and \
-                       pd.notna(ec_conectado_row['NODO2_ID']) and str(ec_conectado_row['NODO2_ID']).lower() != 'nan':
-                        otro_nodo_de_ec_para_explorar = str(ec_conectado_row['NODO2_ID'])
-                    elif str(ec_conectado_row['NODO2_ID']) == nodo_a_explorar and \
-                         pd.notna(ec_conectado_row['NODO1_ID']) and str(ec_conectado_row['NODO1_ID']).lower() != 'nan':
-                        otro_nodo_de_ec_para_explorar = str(ec_conectado_row['NODO1_ID'])
-                    
-                    if pd.notna(otro_nodo_de_ec_para_explorar):
-                         pila_exploracion.append((
-                             ec_fid, 
-                             ec_conectado_row['TIPO'], 
-                             otro_nodo_de_ec_para_explorar, 
-                             nuevo_co_ec_padre_jerarquico_para_hijos, 
-                             nuevo_camino_co_para_hijos
-                        ))
+        # Se consulta la adyacencia del modelo en lugar de recorrer el DataFrame global de ECs.
+        for pos_ec in posiciones_en_nodo(ecs, nodo_a_explorar).tolist():
+            ec_fid_cod = ec_fid[pos_ec]
+            if ec_fid_cod == fid_ec_padre_dfs: # Evitar volver inmediatamente al EC padre por el mismo nodo
+                continue
+            if marcas_ecs[ec_fid_cod] >= epoca:
+                continue
+            marcas_ecs[ec_fid_cod] = epoca
+
+            # Lógica para manejo de ECs de interconexión (posibles puntos de anillo)
+            # Si un EC pertenece a un circuito diferente al del barrido actual,
+            # se trata como 'OPEN' para el análisis de anillos, conservando su estado original.
+            estado_operativo_ec = ec_estado[pos_ec] # Estado original para la exploración
+            es_interconexion = ec_circuito[pos_ec] != codigo_circuito_inicial
+            if es_interconexion:
+                # Este EC es un potencial punto de transferencia o anillo con otro circuito.
+                # Se reporta como 'OPEN' en el DataFrame final (ver materializar_resultados_barrido).
+                estado_operativo_ec = EST_ABIERTO # Tratar como OPEN para análisis de anillo
+
+            # Nodo opuesto del EC respecto al nodo explorado (NODO_NULO si no existe)
+            otro_nodo_de_ec = NODO_NULO
+            if ec_nodo1[pos_ec] == nodo_a_explorar:
+                otro_nodo_de_ec = ec_nodo2[pos_ec]
+            elif ec_nodo2[pos_ec] == nodo_a_explorar:
+                otro_nodo_de_ec = ec_nodo1[pos_ec]
+
+            # Si el EC está (o se considera) 'OPEN', identificar el nodo no explorado para el barrido de anillos
+            nodo_no_explorado_para_anillo = pd.NA
+            if estado_operativo_ec == EST_ABIERTO and otro_nodo_de_ec != NODO_NULO:
+                nodo_no_explorado_para_anillo = nodos_red[otro_nodo_de_ec]
+
+            res_ecs['pos'].append(pos_ec)
+            res_ecs['nodo_arbol'].append(nodo_arbol_padre)
+            res_ecs['Circuito_Origen_Barrido'].append(circuito_co_inicial)
+            res_ecs['Nodo_No_Explorado_Anillo'].append(nodo_no_explorado_para_anillo)
+            res_ecs['interconexion'].append(es_interconexion)
+
+            # Si el EC está efectivamente CERRADO (y no es de interconexión tratado como OPEN), continuar barrido
+            if estado_operativo_ec == EST_CERRADO and otro_nodo_de_ec != NODO_NULO:
+                nuevo_nodo_arbol_para_hijos = _agregar_nodo_arbol(
+                    arbol, ec_co[pos_ec], nodo_arbol_padre, pos_ec, circuito_co_inicial
+                )
+                pila_exploracion.append((
+                    ec_fid_cod,
+                    otro_nodo_de_ec,
+                    nuevo_nodo_arbol_para_hijos
+                ))
+
+    if contadores is not None:
+        contadores['nodos_explorados'] = contadores.get('nodos_explorados', 0) + nodos_explorados
+        # Cada nodo explorado consulta la adyacencia de líneas y de ECs; cada línea, la de trafos
+        contadores['consultas_indice'] = contadores.get('consultas_indice', 0) + 2 * nodos_explorados + consultas_trafos
+        contadores['max_profundidad_pila'] = max(contadores.get('max_profundidad_pila', 0), max_profundidad_pila)
+
+def _primeras_ocurrencias(claves):
+    """Retorna un filtro booleano con la primera aparición de cada clave, conservando el orden."""
+    filtro = np.zeros(len(claves), dtype=bool)
+    filtro[np.unique(claves, return_index=True)[1]] = True
+    return filtro
+
+
+def _filtrar_no_visitados(claves, visitados, *columnas):
+    """Descarta las claves ya visitadas o repetidas (conserva la primera), las marca y filtra las columnas."""
+    validas = ~visitados[claves]
+    validas[validas] = _primeras_ocurrencias(claves[validas])
+    visitados[claves[validas]] = True
+    return [columna[validas] for columna in columnas]
+
+
+def _otro_extremo(nodo1, nodo2, nodos_desde):
+    """Nodo opuesto de cada elemento respecto al nodo desde el que se alcanza (NODO_NULO si no coincide)."""
+    return np.where(nodo1 == nodos_desde, nodo2, np.where(nodo2 == nodos_desde, nodo1, NODO_NULO))
+
+
+def _posiciones_claves(claves_ordenadas, orden_claves, claves):
+    """Busca claves en un arreglo ordenado; retorna su posición original (-1 si no están)."""
+    if not len(claves_ordenadas):
+        return np.full(len(claves), -1, dtype=np.int64)
+    ubicacion = np.minimum(np.searchsorted(claves_ordenadas, claves), len(claves_ordenadas) - 1)
+    return np.where(claves_ordenadas[ubicacion] == claves, orden_claves[ubicacion], -1)
+
+
+def _rangos_preorden_dfs(padre, secuencia, nivel):
+    """
+    Calcula el orden en que el DFS de pila sacaría cada nodo del árbol de exploración del BFS.
+
+    Sin mallas, el árbol de exploración es el mismo en ambos motores. La pila del DFS recorre el
+    subárbol completo del último hijo apilado antes que el de los anteriores, así que el rango de
+    un nodo es el de su padre + 1 + el tamaño de los subárboles de los hermanos apilados después.
+
+    Parámetros:
+        padre (np.ndarray): Índice del nodo desde el que se apiló cada nodo (-1 para los arranques).
+        secuencia (np.ndarray): Orden en que se apiló cada nodo.
+        nivel (np.ndarray): Nivel del BFS de cada nodo (0 para los arranques).
+
+    Retorna:
+        np.ndarray: Rango de preorden de cada nodo (comparable entre nodos del mismo circuito).
+    """
+    n = len(padre)
+    orden_nivel = np.argsort(nivel, kind='stable')
+    limites = np.searchsorted(nivel[orden_nivel], np.arange(int(nivel.max()) + 2 if n else 1))
+    por_nivel = [orden_nivel[limites[k]:limites[k + 1]] for k in range(len(limites) - 1)]
+
+    # Tamaño de cada subárbol, de las hojas hacia los arranques
+    tamano = np.ones(n, dtype=np.int64)
+    for nodos_nivel in por_nivel[:0:-1]:
+        np.add.at(tamano, padre[nodos_nivel], tamano[nodos_nivel])
+
+    # Nodos que el DFS saca antes que cada hijo dentro de su padre: hermanos apilados después
+    hijos = np.flatnonzero(padre >= 0)
+    hijos = hijos[np.lexsort((-secuencia[hijos], padre[hijos]))]
+    acumulado = np.cumsum(tamano[hijos]) - tamano[hijos]
+    inicio_grupo = np.ones(len(hijos), dtype=bool)
+    inicio_grupo[1:] = padre[hijos[1:]] != padre[hijos[:-1]]
+    desplazamiento = np.zeros(n, dtype=np.int64)
+    desplazamiento[hijos] = acumulado - np.maximum.accumulate(np.where(inicio_grupo, acumulado, 0))
+
+    rango = np.zeros(n, dtype=np.int64)
+    for nodos_nivel in por_nivel[1:]:
+        rango[nodos_nivel] = rango[padre[nodos_nivel]] + 1 + desplazamiento[nodos_nivel]
+    return rango
+
+
+def _barrer_lote_frontera(circuitos, modelo_red):
+    """
+    Barre un lote de circuitos a la vez, expandiendo en cada nivel el frente de todos ellos.
+
+    Cada circuito conserva sus propios visitados: las claves combinan el índice del circuito en el
+    lote con el código del nodo o del FID, sobre arreglos booleanos de tamaño lote × tabla. Al final,
+    los ECs no atravesados y los trafos con ambos nodos alcanzados se asignan al lado que el DFS
+    habría explorado primero (ver `_rangos_preorden_dfs`).
+
+    Retorna:
+        dict: Filas de cada tabla ordenadas por circuito ('filas', con arreglos por columna e
+              'indptr' por circuito), el árbol local de ECs ('arbol', con 'circuito' por nodo), el
+              filtro 'ambiguo' por circuito (mallas o FIDs repetidos) y los contadores por circuito.
+    """
+    nodos_red = modelo_red['nodos']
+    ecs, lineas, trafos = modelo_red['ecs'], modelo_red['lineas'], modelo_red['trafos']
+    ec_nodo1, ec_nodo2, ec_fid = ecs['nodo1'], ecs['nodo2'], ecs['fid']
+    ec_estado, ec_circuito, ec_co = ecs['estado'], ecs['circuito'], ecs['co']
+    lin_nodo1, lin_nodo2, lin_fid = lineas['nodo1'], lineas['nodo2'], lineas['fid']
+    trafo_nodo1, trafo_nodo2, trafo_fid = trafos['nodo1'], trafos['nodo2'], trafos['fid']
+
+    n_circuitos, n_nodos = len(circuitos), len(nodos_red)
+    fids_tablas = {'ecs': ec_fid, 'lineas': lin_fid, 'trafos': trafo_fid}
+    n_fids = {tabla: (int(fids.max()) + 1 if len(fids) else 0) for tabla, fids in fids_tablas.items()}
+    visitados = {tabla: np.zeros(n_circuitos * n, dtype=bool) for tabla, n in n_fids.items()}
+    expandidos = np.zeros(n_circuitos * n_nodos, dtype=bool)
+    ambiguo = np.zeros(n_circuitos, dtype=bool)
+    contadores = {nombre: np.zeros(n_circuitos, dtype=np.int64)
+                  for nombre in ('nodos_explorados', 'consultas_trafos', 'niveles', 'max_ancho_frente')}
+    codigos_circuito = np.asarray([codigo_circuito(modelo_red, c) for c in circuitos], dtype=np.int64)
+    arbol = {'co': [], 'padre': [], 'camino': [], 'pos_ec': [], 'circuito': []}
+    filas = {'ecs': [], 'lineas': [], 'trafos': []}
+    # Nodos expandidos (árbol de exploración) y extremos de los ECs registrados, para la etapa final
+    expansion = {'clave': [], 'arbol': [], 'clave_padre': [], 'secuencia': [], 'linea': [], 'nivel': []}
+    extremos_ecs = {'desde': [], 'otro': []}
+
+    # 1. Arranques: fila del EC, raíz del árbol y frente inicial desde su NODO2 (según regla de negocio)
+    frente = {'nodo': [], 'arbol': [], 'circuito': []}
+    for j, circuito in enumerate(circuitos):
+        pos_arranque = posicion_ec_por_co(modelo_red, circuito)
+        if pos_arranque < 0:
+            continue
+        visitados['ecs'][j * n_fids['ecs'] + ec_fid[pos_arranque]] = True
+        arbol['co'].append(circuito)
+        arbol['padre'].append(-1)
+        arbol['camino'].append(circuito)
+        arbol['pos_ec'].append(pos_arranque)
+        arbol['circuito'].append(j)
+        # El arranque no tiene padre en el barrido (nodo_arbol = -1)
+        filas['ecs'].append({'pos': np.asarray([pos_arranque]), 'nodo_arbol': np.asarray([-1]),
+                             'circuito': np.asarray([j]), 'Nodo_No_Explorado_Anillo': np.asarray([pd.NA], dtype=object),
+                             'interconexion': np.asarray([False])})
+        extremos_ecs['desde'].append(np.asarray([-1]))
+        extremos_ecs['otro'].append(np.asarray([-1]))
+        if ec_nodo2[pos_arranque] != NODO_NULO:
+            frente['nodo'].append(ec_nodo2[pos_arranque])
+            frente['arbol'].append(len(arbol['co']) - 1)
+            frente['circuito'].append(j)
+    frente_nodos = np.asarray(frente['nodo'], dtype=np.int64)
+    frente_arbol = np.asarray(frente['arbol'], dtype=np.int64)
+    frente_circuitos = np.asarray(frente['circuito'], dtype=np.int64)
+    frente_padres = np.full(len(frente_nodos), -1, dtype=np.int64)
+    frente_lineas = np.full(len(frente_nodos), -1, dtype=np.int64)
+    frente_secuencia = np.arange(len(frente_nodos), dtype=np.int64)
+    siguiente_secuencia, nivel = len(frente_nodos), 0
+
+    # 2. Expansión por niveles
+    while len(frente_nodos):
+        # Un nodo que llega dos veces al frente (o ya expandido) indica una malla: el resultado
+        # dependería del orden de exploración y el circuito se marca como ambiguo
+        claves = frente_circuitos * n_nodos + frente_nodos
+        nuevos = _primeras_ocurrencias(claves) & ~expandidos[claves]
+        ambiguo[frente_circuitos[~nuevos]] = True
+        claves, frente_nodos, frente_arbol, frente_circuitos = claves[nuevos], frente_nodos[nuevos], \
+            frente_arbol[nuevos], frente_circuitos[nuevos]
+        if not len(frente_nodos):
+            break
+        expandidos[claves] = True
+        for llave, valores in (('clave', claves), ('arbol', frente_arbol), ('clave_padre', frente_padres[nuevos]),
+                               ('secuencia', frente_secuencia[nuevos]), ('linea', frente_lineas[nuevos]),
+                               ('nivel', np.full(len(claves), nivel, dtype=np.int64))):
+            expansion[llave].append(valores)
+        nivel += 1
+        ancho = np.bincount(frente_circuitos, minlength=n_circuitos)
+        contadores['nodos_explorados'] += ancho
+        contadores['niveles'] += ancho > 0
+        np.maximum(contadores['max_ancho_frente'], ancho, out=contadores['max_ancho_frente'])
+
+        # 2.1 Líneas incidentes no visitadas
+        pos_lineas, origen = posiciones_en_nodos(lineas, frente_nodos)
+        pos_lineas, origen = _filtrar_no_visitados(
+            frente_circuitos[origen] * n_fids['lineas'] + lin_fid[pos_lineas], visitados['lineas'], pos_lineas, origen)
+        nodos_desde, arbol_lineas, circuitos_lineas = frente_nodos[origen], frente_arbol[origen], frente_circuitos[origen]
+        claves_lineas = claves[origen]
+        otros_nodos = _otro_extremo(lin_nodo1[pos_lineas], lin_nodo2[pos_lineas], nodos_desde)
+        filas['lineas'].append({'pos': pos_lineas, 'nodo_arbol': arbol_lineas, 'circuito': circuitos_lineas})
+
+        # 2.2 Transformadores en los extremos de cada línea (nodo explorado y luego el otro extremo)
+        con_otro = (otros_nodos != NODO_NULO) & (otros_nodos != nodos_desde)
+        nodos_conexion = np.column_stack([nodos_desde, otros_nodos]).ravel()
+        lineas_conexion = np.repeat(np.arange(len(pos_lineas), dtype=np.int64), 2)
+        validos = np.column_stack([np.ones(len(pos_lineas), dtype=bool), con_otro]).ravel()
+        nodos_conexion, lineas_conexion = nodos_conexion[validos], lineas_conexion[validos]
+        contadores['consultas_trafos'] += np.bincount(circuitos_lineas[lineas_conexion], minlength=n_circuitos)
+        pos_trafos, origen_trafos = posiciones_en_nodos(trafos, nodos_conexion)
+        lineas_trafos = lineas_conexion[origen_trafos]
+        pos_trafos, lineas_trafos = _filtrar_no_visitados(
+            circuitos_lineas[lineas_trafos] * n_fids['trafos'] + trafo_fid[pos_trafos], visitados['trafos'],
+            pos_trafos, lineas_trafos)
+        filas['trafos'].append({'pos': pos_trafos, 'pos_linea_conexion': pos_lineas[lineas_trafos],
+                                'nodo_arbol': arbol_lineas[lineas_trafos], 'circuito': circuitos_lineas[lineas_trafos]})
+
+        # 2.3 ECs incidentes no visitados; los de otro circuito se tratan como 'OPEN'
+        pos_ecs, origen = posiciones_en_nodos(ecs, frente_nodos)
+        pos_ecs, origen = _filtrar_no_visitados(
+            frente_circuitos[origen] * n_fids['ecs'] + ec_fid[pos_ecs], visitados['ecs'], pos_ecs, origen)
+        nodos_desde_ecs, arbol_ecs, circuitos_ecs = frente_nodos[origen], frente_arbol[origen], frente_circuitos[origen]
+        claves_ecs = claves[origen]
+        otros_nodos_ecs = _otro_extremo(ec_nodo1[pos_ecs], ec_nodo2[pos_ecs], nodos_desde_ecs)
+        interconexion = ec_circuito[pos_ecs] != codigos_circuito[circuitos_ecs]
+        estados = np.where(interconexion, EST_ABIERTO, ec_estado[pos_ecs])
+        con_otro_ec = otros_nodos_ecs != NODO_NULO
+        nodos_anillo = np.full(len(pos_ecs), pd.NA, dtype=object)
+        abiertos = (estados == EST_ABIERTO) & con_otro_ec
+        nodos_anillo[abiertos] = nodos_red[otros_nodos_ecs[abiertos]]
+        filas['ecs'].append({'pos': pos_ecs, 'nodo_arbol': arbol_ecs, 'circuito': circuitos_ecs,
+                             'Nodo_No_Explorado_Anillo': nodos_anillo, 'interconexion': interconexion})
+        atravesados = (estados == EST_CERRADO) & con_otro_ec
+        no_atravesados = ~atravesados & con_otro_ec & (otros_nodos_ecs != nodos_desde_ecs)
+        extremos_ecs['desde'].append(claves_ecs)
+        extremos_ecs['otro'].append(np.where(no_atravesados, circuitos_ecs * n_nodos + otros_nodos_ecs, -1))
+
+        # 2.4 Siguiente frente: otro extremo de las líneas y de los ECs cerrados (nuevos nodos del árbol),
+        #     en el orden en que el DFS los apilaría
+        cerrados = np.flatnonzero(atravesados & (otros_nodos_ecs != nodos_desde_ecs))
+        nodos_arbol_hijos = []
+        for pos_ec, nodo_arbol_padre, j in zip(pos_ecs[cerrados].tolist(), arbol_ecs[cerrados].tolist(),
+                                               circuitos_ecs[cerrados].tolist()):
+            arbol['co'].append(ec_co[pos_ec])
+            arbol['padre'].append(nodo_arbol_padre)
+            arbol['camino'].append(arbol['camino'][nodo_arbol_padre] + "," + ec_co[pos_ec])
+            arbol['pos_ec'].append(pos_ec)
+            arbol['circuito'].append(j)
+            nodos_arbol_hijos.append(len(arbol['co']) - 1)
+        frente_nodos = np.concatenate([otros_nodos[con_otro], otros_nodos_ecs[cerrados]]).astype(np.int64)
+        frente_arbol = np.concatenate([arbol_lineas[con_otro], np.asarray(nodos_arbol_hijos, dtype=np.int64)])
+        frente_circuitos = np.concatenate([circuitos_lineas[con_otro], circuitos_ecs[cerrados]])
+        frente_padres = np.concatenate([claves_lineas[con_otro], claves_ecs[cerrados]])
+        frente_lineas = np.concatenate([pos_lineas[con_otro], np.full(len(cerrados), -1, dtype=np.int64)])
+        frente_secuencia = siguiente_secuencia + np.arange(len(frente_nodos), dtype=np.int64)
+        siguiente_secuencia += len(frente_nodos)
+
+    for tabla in filas:
+        filas[tabla] = {col: np.concatenate([bloque[col] for bloque in filas[tabla]]) for col in filas[tabla][0]} \
+            if filas[tabla] else {}
+    expansion = {llave: (np.concatenate(valores) if valores else np.zeros(0, dtype=np.int64))
+                 for llave, valores in expansion.items()}
+    extremos_ecs = {llave: np.concatenate(valores) if valores else np.zeros(0, dtype=np.int64)
+                    for llave, valores in extremos_ecs.items()}
+
+    # 3. Rangos del DFS sobre el árbol de exploración
+    orden_claves = np.argsort(expansion['clave'])
+    claves_ordenadas = expansion['clave'][orden_claves]
+    padres = _posiciones_claves(claves_ordenadas, orden_claves, expansion['clave_padre'])
+    rango = _rangos_preorden_dfs(padres, expansion['secuencia'], expansion['nivel'])
+
+    # 3.1 ECs no atravesados con el otro extremo también alcanzado: se registran desde el extremo que
+    #     el DFS saca primero de la pila
+    columnas_ecs = filas['ecs']
+    if columnas_ecs:
+        con_otro = np.flatnonzero(extremos_ecs['otro'] >= 0)
+        desde = _posiciones_claves(claves_ordenadas, orden_claves, extremos_ecs['desde'][con_otro])
+        otro = _posiciones_claves(claves_ordenadas, orden_claves, extremos_ecs['otro'][con_otro])
+        cambian = (otro >= 0) & (desde >= 0)
+        cambian[cambian] = rango[otro[cambian]] < rango[desde[cambian]]
+        filas_cambio, desde, otro = con_otro[cambian], desde[cambian], otro[cambian]
+        columnas_ecs['nodo_arbol'][filas_cambio] = expansion['arbol'][otro]
+        es_abierto = pd.notna(columnas_ecs['Nodo_No_Explorado_Anillo'][filas_cambio])
+        columnas_ecs['Nodo_No_Explorado_Anillo'][filas_cambio[es_abierto]] = \
+            nodos_red[expansion['clave'][desde[es_abierto]] % n_nodos]
+
+    # 3.2 Trafos con sus dos nodos alcanzados: los registra la primera línea que el DFS procesa en
+    #     alguno de ellos (la que descubrió el nodo, o la primera línea del nodo si llegó por un EC)
+    columnas_trafos = filas['trafos']
+    if columnas_trafos and len(columnas_trafos['pos']):
+        pos_trafos, circuitos_trafos = columnas_trafos['pos'], columnas_trafos['circuito']
+        nodo1, nodo2 = trafo_nodo1[pos_trafos], trafo_nodo2[pos_trafos]
+        dos_nodos = np.flatnonzero((nodo1 != NODO_NULO) & (nodo2 != NODO_NULO) & (nodo1 != nodo2))
+        base = circuitos_trafos[dos_nodos] * n_nodos
+        eventos = []
+        for nodos_trafo in (nodo1[dos_nodos], nodo2[dos_nodos]):
+            nodo_exp = _posiciones_claves(claves_ordenadas, orden_claves, base + nodos_trafo)
+            alcanzado = nodo_exp >= 0
+            nodo_exp = np.maximum(nodo_exp, 0)
+            linea = expansion['linea'][nodo_exp]
+            por_linea = linea >= 0
+            padre_exp = np.maximum(padres[nodo_exp], 0)
+            inicio, fin = lineas['indptr'][nodos_trafo], lineas['indptr'][nodos_trafo + 1]
+            primera_linea = np.where(fin > inicio, lineas['indices'][np.minimum(inicio, len(lineas['indices']) - 1)], -1)
+            linea_evento = np.where(por_linea, linea, primera_linea)
+            valido = alcanzado & (linea_evento >= 0)
+            eventos.append({
+                'rango': np.where(valido, np.where(por_linea, rango[padre_exp], rango[nodo_exp]), np.iinfo(np.int64).max),
+                'linea': linea_evento,
+                'arbol': np.where(por_linea, expansion['arbol'][padre_exp], expansion['arbol'][nodo_exp]),
+                'valido': valido,
+            })
+        ambos = eventos[0]['valido'] & eventos[1]['valido']
+        segundo = ambos & ((eventos[1]['rango'] < eventos[0]['rango']) |
+                           ((eventos[1]['rango'] == eventos[0]['rango']) & (eventos[1]['linea'] < eventos[0]['linea'])))
+        for k, seleccion in ((0, ambos & ~segundo), (1, segundo)):
+            columnas_trafos['pos_linea_conexion'][dos_nodos[seleccion]] = eventos[k]['linea'][seleccion]
+            columnas_trafos['nodo_arbol'][dos_nodos[seleccion]] = eventos[k]['arbol'][seleccion]
+
+    # 3.3 FIDs compartidos por varias filas: cuál se registra depende del orden de exploración
+    for tabla, columnas in filas.items():
+        if columnas:
+            fids = fids_tablas[tabla]
+            repetido = np.bincount(fids, minlength=n_fids[tabla])[fids[columnas['pos']]] > 1
+            ambiguo[columnas['circuito'][repetido]] = True
+
+    # 4. Filas agrupadas por circuito (orden estable dentro de cada circuito)
+    for tabla, columnas in filas.items():
+        if not columnas:
+            continue
+        orden = np.argsort(columnas['circuito'], kind='stable')
+        filas[tabla] = {col: valores[orden] for col, valores in columnas.items()}
+        filas[tabla]['indptr'] = np.searchsorted(filas[tabla]['circuito'], np.arange(n_circuitos + 1))
+    arbol['circuito'] = np.asarray(arbol['circuito'], dtype=np.int64)
+    return {'filas': filas, 'arbol': arbol, 'ambiguo': ambiguo, 'contadores': contadores}
+
+
+def _agregar_circuito_lote(resultados_barrido, lote, j, circuito_co_inicial):
+    """Copia al acumulador las filas del circuito j de un lote de `_barrer_lote_frontera`."""
+    arbol_lote, arbol = lote['arbol'], resultados_barrido['arbol']
+    nodos_circuito = np.flatnonzero(arbol_lote['circuito'] == j)
+    # Traducción de índices locales del árbol del lote a índices del acumulador (-1 se conserva)
+    mapa = np.full(len(arbol_lote['co']) + 1, -1, dtype=np.int64)
+    mapa[nodos_circuito] = len(arbol['co']) + np.arange(len(nodos_circuito))
+    for pos in nodos_circuito.tolist():
+        arbol['co'].append(arbol_lote['co'][pos])
+        arbol['padre'].append(int(mapa[arbol_lote['padre'][pos]]))
+        arbol['camino'].append(arbol_lote['camino'][pos])
+        arbol['pos_ec'].append(arbol_lote['pos_ec'][pos])
+
+    for tabla, columnas in lote['filas'].items():
+        if not columnas:
+            continue
+        inicio, fin = columnas['indptr'][j], columnas['indptr'][j + 1]
+        destino = resultados_barrido[tabla]
+        for col, valores in columnas.items():
+            if col in ('indptr', 'circuito'):
+                continue
+            valores = valores[inicio:fin]
+            if col == 'nodo_arbol':
+                valores = mapa[valores]
+            destino[col].extend(valores.tolist())
+        destino['Circuito_Origen_Barrido'].extend([circuito_co_inicial] * int(fin - inicio))
+
+
+def barrido_conectividad_frontera(
+    circuitos,
+    df_elementos_corte_global,
+    df_lineas_global,
+    df_trafos_global,
+    resultados_barrido,
+    modelo_red=None,
+    circuitos_por_lote=64,
+    al_completar_circuito=None,
+    contadores_por_circuito=None
+    ):
+    """
+    Realiza el barrido de conectividad de varios circuitos expandiendo frentes completos de nodos (BFS).
+
+    Aplica las mismas reglas que `barrido_conectividad_por_circuito` (ECs 'OPEN', de interconexión y
+    transformadores), pero en lugar de sacar nodos de una pila de uno en uno, cada nivel consulta con
+    `posiciones_en_nodos` la adyacencia CSR de todo el frente y filtra los visitados con operaciones
+    de NumPy. Los circuitos de un lote se expanden juntos, cada uno con sus propios visitados, así que
+    el frente es ancho aunque cada alimentador sea largo y angosto.
+
+    Sin mallas, el árbol de exploración es el mismo del DFS y el resultado es idéntico, salvo el orden
+    de las filas dentro de cada circuito: los ECs 'OPEN' y los trafos alcanzados por ambos lados se
+    asignan al lado que el DFS exploraría primero. Los circuitos con mallas cerradas (o con FIDs
+    repetidos) se re-barren con `barrido_conectividad_por_circuito`.
+
+    Parámetros:
+        circuitos (list): Lista de CODIGO_OPERATIVO de arranque de los circuitos a barrer.
+        df_elementos_corte_global (pd.DataFrame): DataFrame con todos los elementos de corte de la red.
+        df_lineas_global (pd.DataFrame): DataFrame con todas las líneas de la red.
+        df_trafos_global (pd.DataFrame): DataFrame con todos los transformadores de la red.
+        resultados_barrido (dict): Acumulador creado con `crear_resultados_barrido` (se modifica).
+        modelo_red (dict, optional): Modelo codificado generado por `construir_modelo_red`.
+                                     Si es None se construye aquí.
+        circuitos_por_lote (int, optional): Circuitos expandidos juntos. Los visitados ocupan
+                                            lote × (nodos + FIDs) bytes. Por defecto 64.
+        al_completar_circuito (callable, optional): Función llamada como `f(i, circuito)` al agregar
+                                                    los resultados del circuito i (0-based).
+        contadores_por_circuito (dict, optional): Si se indica, recibe por circuito 'nodos_explorados',
+                                                  'consultas_indice', 'niveles', 'max_ancho_frente' y,
+                                                  en los re-barridos con DFS, 'respaldo_dfs' y los
+                                                  contadores del DFS. Por defecto None.
+
+    Retorna:
+        None: La función modifica el acumulador de resultados directamente.
+    """
+    if modelo_red is None:
+        modelo_red = construir_modelo_red(df_elementos_corte_global, df_lineas_global, df_trafos_global)
+
+    marcas_visitados = None  # Solo se crean si algún circuito vuelve al DFS
+    for inicio in range(0, len(circuitos), circuitos_por_lote):
+        circuitos_lote = circuitos[inicio:inicio + circuitos_por_lote]
+        lote = _barrer_lote_frontera(circuitos_lote, modelo_red)
+        for j, circuito_co_inicial in enumerate(circuitos_lote):
+            contadores = None if contadores_por_circuito is None else contadores_por_circuito.setdefault(circuito_co_inicial, {})
+            if lote['ambiguo'][j]:
+                if marcas_visitados is None:
+                    marcas_visitados = crear_marcas_visitados(modelo_red)
+                barrido_conectividad_por_circuito(
+                    circuito_co_inicial, df_elementos_corte_global, df_lineas_global, df_trafos_global,
+                    resultados_barrido, modelo_red, marcas_visitados=marcas_visitados, contadores=contadores
+                )
+                if contadores is not None:
+                    contadores['respaldo_dfs'] = contadores.get('respaldo_dfs', 0) + 1
+            else:
+                _agregar_circuito_lote(resultados_barrido, lote, j, circuito_co_inicial)
+                if contadores is not None:
+                    valores = {nombre: int(arreglo[j]) for nombre, arreglo in lote['contadores'].items()}
+                    contadores['nodos_explorados'] = contadores.get('nodos_explorados', 0) + valores['nodos_explorados']
+                    contadores['consultas_indice'] = contadores.get('consultas_indice', 0) + \
+                        2 * valores['nodos_explorados'] + valores['consultas_trafos']
+                    contadores['niveles'] = contadores.get('niveles', 0) + valores['niveles']
+                    contadores['max_ancho_frente'] = max(contadores.get('max_ancho_frente', 0), valores['max_ancho_frente'])
+            if al_completar_circuito is not None:
+                al_completar_circuito(inicio + j, circuito_co_inicial)
+
+
+def _fusionar_resultados_barrido(resultados_destino, resultados_parciales):
+    """
+    Agrega al final de un acumulador los resultados de otro, ajustando los índices del árbol de ECs.
+
+    Parámetros:
+        resultados_destino (dict): Acumulador que recibe los resultados (se modifica).
+        resultados_parciales (dict): Acumulador con los resultados de uno o más circuitos.
+
+    Retorna:
+        None
+    """
+    desplazamiento = len(resultados_destino['arbol']['co'])
+    for tabla, columnas in resultados_parciales.items():
+        for col, valores in columnas.items():
+            if col in ('nodo_arbol', 'padre'):
+                # -1 (arranque o raíz) se conserva; el resto se desplaza al nuevo índice del árbol
+                valores = [v + desplazamiento if v >= 0 else v for v in valores]
+            resultados_destino[tabla][col].extend(valores)
+
+
+# Modelo de la red y marcas de visitados disponibles en cada proceso trabajador del barrido en paralelo
+_MODELO_RED_WORKER = None
+_MARCAS_VISITADOS_WORKER = None
+
+def _inicializar_worker_barrido(modelo_red, carpeta_snapshot=None, huella_snapshot=None):
+    """
+    Guarda el modelo de la red en el proceso trabajador (se hereda sin copia con 'fork').
+    Con un snapshot, cada proceso lo abre con memory-map y todos comparten las mismas páginas;
+    si el snapshot ya no existe o su huella no es la que validó el proceso padre, el trabajador
+    falla (y con él el pool) en lugar de barrer con otro modelo.
+    """
+    global _MODELO_RED_WORKER, _MARCAS_VISITADOS_WORKER
+    if carpeta_snapshot is not None:
+        modelo_red = abrir_snapshot_modelo_red(carpeta_snapshot, huella_snapshot)[0]
+        if modelo_red is None:
+            raise RuntimeError(f"El snapshot '{carpeta_snapshot}' no existe o cambió durante el barrido.")
+    _MODELO_RED_WORKER = modelo_red
+    _MARCAS_VISITADOS_WORKER = crear_marcas_visitados(modelo_red)
+
+
+def _barrer_circuito_worker(circuito_co_inicial):
+    """Barre un circuito en un proceso trabajador y devuelve su acumulador de resultados."""
+    resultados_circuito = crear_resultados_barrido()
+    barrido_conectividad_por_circuito(
+        circuito_co_inicial, None, None, None, resultados_circuito, _MODELO_RED_WORKER,
+        marcas_visitados=_MARCAS_VISITADOS_WORKER
+    )
+    return resultados_circuito
+
+
+def barrer_circuitos_en_paralelo(circuitos, modelo_red, resultados_barrido, n_procesos=None, al_completar_circuito=None,
+                                 carpeta_snapshot=None, huella_snapshot=None):
+    """
+    Ejecuta el barrido de conectividad de varios circuitos en un pool de procesos.
+
+    Cada barrido de circuito es independiente (marcas de visitados por proceso y modelo de solo
+    lectura), así que los circuitos se reparten entre procesos trabajadores. El modelo de la red
+    se entrega una sola vez a cada proceso: con el método de inicio 'fork' (Linux) se comparte
+    la memoria del proceso padre; con 'spawn' (Windows) se serializa una vez por proceso.
+    Los resultados se fusionan en el orden de `circuitos`, por lo que la salida es idéntica
+    a la del barrido secuencial.
+
+    Parámetros:
+        circuitos (list): Lista de CODIGO_OPERATIVO de arranque de los circuitos a barrer.
+        modelo_red (dict): Modelo codificado generado por `construir_modelo_red`.
+        resultados_barrido (dict): Acumulador creado con `crear_resultados_barrido` (se modifica).
+        n_procesos (int, optional): Cantidad de procesos trabajadores. Si es None se usan
+                                    todos los núcleos disponibles. Por defecto None.
+        al_completar_circuito (callable, optional): Función llamada como `f(i, circuito)` cada vez
+                                                    que se fusiona el resultado del circuito i (0-based).
+        carpeta_snapshot (str, optional): Snapshot de `modelo_red` (ver `guardar_snapshot_modelo_red`).
+                                          Si se indica, cada proceso abre el snapshot con memory-map en
+                                          lugar de recibir el modelo serializado. Si algún proceso no lo
+                                          puede abrir, el barrido se repite con `modelo_red`. Por defecto None.
+        huella_snapshot (str, optional): Huella con la que el proceso padre validó el snapshot; los
+                                         procesos solo lo abren si conserva esa huella. Por defecto None.
+
+    Retorna:
+        None: La función modifica el acumulador de resultados directamente.
+    """
+    n_procesos = n_procesos or os.cpu_count() or 1
+    metodos_inicio = multiprocessing.get_all_start_methods()
+    contexto = multiprocessing.get_context('fork' if 'fork' in metodos_inicio else None)
+    # Lotes pequeños reducen la sobrecarga de comunicación sin desbalancear la carga
+    tamano_lote = max(1, len(circuitos) // (4 * n_procesos))
+
+    # Longitudes del acumulador antes del barrido, para descartar lo fusionado si el pool falla
+    longitudes = {tabla: {col: len(valores) for col, valores in columnas.items()}
+                  for tabla, columnas in resultados_barrido.items()}
+    try:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=n_procesos,
+            mp_context=contexto,
+            initializer=_inicializar_worker_barrido,
+            initargs=(None if carpeta_snapshot is not None else modelo_red, carpeta_snapshot, huella_snapshot)
+        ) as executor:
+            resultados_por_circuito = executor.map(_barrer_circuito_worker, circuitos, chunksize=tamano_lote)
+            for i, (circuito, resultados_circuito) in enumerate(zip(circuitos, resultados_por_circuito)):
+                _fusionar_resultados_barrido(resultados_barrido, resultados_circuito)
+                if al_completar_circuito is not None:
+                    al_completar_circuito(i, circuito)
+    except concurrent.futures.process.BrokenProcessPool:
+        if carpeta_snapshot is None:
+            raise
+        print(f"\n⚠️ Advertencia: Los procesos no pudieron abrir el snapshot '{carpeta_snapshot}'. "
+              "Se repite el barrido con el modelo en memoria.")
+        for tabla, columnas in resultados_barrido.items():
+            for col, valores in columnas.items():
+                del valores[longitudes[tabla][col]:]
+        barrer_circuitos_en_paralelo(circuitos, modelo_red, resultados_barrido, n_procesos, al_completar_circuito)
+
+
+def _dfs_anillo(modelo_red, co_ec_open_original, nodo_inicio_cod, marcas_visitados=None):
+    """
+    DFS de líneas desde un nodo hasta el primer EC distinto del EC 'OPEN' de origen.
+
+    Reproduce el orden de exploración del análisis de anillos (pila de nodos, líneas en orden de
+    fila) para desempatar cuando la componente del EC 'OPEN' tiene varios ECs candidatos.
+
+    Parámetros:
+        modelo_red (dict): Modelo generado por `construir_modelo_red`.
+        co_ec_open_original (str): CODIGO_OPERATIVO del EC 'OPEN' que origina el análisis.
+        nodo_inicio_cod (int): Código del nodo no explorado del EC 'OPEN'.
+        marcas_visitados (dict, optional): Marcas de `crear_marcas_visitados` (solo se usan las de
+                                           líneas). Si es None se crean aquí.
+
+    Retorna:
+        int: Posición (iloc) del primer EC encontrado, o -1 si no se encuentra ninguno.
+    """
+    ecs, lineas = modelo_red['ecs'], modelo_red['lineas']
+    ec_co = ecs['co']
+    lin_nodo1, lin_nodo2, lin_fid = lineas['nodo1'], lineas['nodo2'], lineas['fid']
+
+    if marcas_visitados is None:
+        marcas_visitados = crear_marcas_visitados(modelo_red)
+    epoca = _nueva_epoca(marcas_visitados)
+    marcas_lineas = memoryview(marcas_visitados['lineas'])
+    pila_exploracion_anillo = [nodo_inicio_cod]
+    while pila_exploracion_anillo:
+        nodo_actual_anillo = pila_exploracion_anillo.pop()
+
+        # 1. ECs conectados directamente al nodo: candidatos a cerrar el anillo
+        for pos_ec in posiciones_en_nodo(ecs, nodo_actual_anillo):
+            if ec_co[pos_ec] != co_ec_open_original:
+                return int(pos_ec)
+
+        # 2. Si no hay EC directo, seguir por las líneas conectadas al nodo
+        for pos_linea in posiciones_en_nodo(lineas, nodo_actual_anillo).tolist():
+            fid_linea_cod = lin_fid[pos_linea]
+            if marcas_lineas[fid_linea_cod] >= epoca:
+                continue
+            marcas_lineas[fid_linea_cod] = epoca
+
+            otro_nodo_linea_anillo = NODO_NULO
+            if lin_nodo1[pos_linea] == nodo_actual_anillo:
+                otro_nodo_linea_anillo = lin_nodo2[pos_linea]
+            elif lin_nodo2[pos_linea] == nodo_actual_anillo:
+                otro_nodo_linea_anillo = lin_nodo1[pos_linea]
+            if otro_nodo_linea_anillo != NODO_NULO:
+                pila_exploracion_anillo.append(otro_nodo_linea_anillo)
+    return -1
+
+
+def _resolver_anillo(modelo_red, secciones, co_ec_open_original, nodo_inicio_cod, marcas_visitados=None):
+    """
+    Resuelve el EC que cierra el anillo de un EC 'OPEN' a partir de las secciones de líneas.
+
+    Si el nodo de inicio ya aloja otro EC, se toma el primero en orden de fila. En caso contrario
+    se expanden las secciones alcanzables: los nodos terminales que solo alojan al propio EC
+    'OPEN' son transparentes y se atraviesan, y los que alojan otro EC son candidatos. Sin
+    candidatos no hay anillo y con uno solo la respuesta es inmediata; con varios se desempata
+    con `_dfs_anillo` para conservar el "primer EC encontrado".
+
+    Parámetros:
+        modelo_red (dict): Modelo generado por `construir_modelo_red`.
+        secciones (dict): Secciones generadas por `construir_secciones_lineas`.
+        co_ec_open_original (str): CODIGO_OPERATIVO del EC 'OPEN' que origina el análisis.
+        nodo_inicio_cod (int): Código del nodo no explorado del EC 'OPEN'.
+        marcas_visitados (dict, optional): Marcas de `crear_marcas_visitados` para `_dfs_anillo`.
+
+    Retorna:
+        int: Posición (iloc) del EC que cierra el anillo, o -1 si no se encuentra ninguno.
+    """
+    ecs, lineas = modelo_red['ecs'], modelo_red['lineas']
+    ec_co = ecs['co']
+    seccion_linea = secciones['seccion_linea']
+    frontera_indptr, frontera_nodos = secciones['frontera_indptr'], secciones['frontera_nodos']
+
+    def primer_ec_candidato(nodo):
+        for pos_ec in posiciones_en_nodo(ecs, nodo):
+            if ec_co[pos_ec] != co_ec_open_original:
+                return int(pos_ec)
+        return -1
+
+    pos_candidato = primer_ec_candidato(nodo_inicio_cod)
+    if pos_candidato >= 0:
+        return pos_candidato
+
+    candidatos = []
+    nodos_visitados = {nodo_inicio_cod}
+    secciones_visitadas = set()
+    pila_nodos = [nodo_inicio_cod]
+    while pila_nodos:
+        nodo_actual = pila_nodos.pop()
+        for pos_linea in posiciones_en_nodo(lineas, nodo_actual):
+            seccion = seccion_linea[pos_linea]
+            if seccion < 0 or seccion in secciones_visitadas:
+                continue
+            secciones_visitadas.add(seccion)
+            for nodo_frontera in frontera_nodos[frontera_indptr[seccion]:frontera_indptr[seccion + 1]].tolist():
+                if nodo_frontera in nodos_visitados:
+                    continue
+                nodos_visitados.add(nodo_frontera)
+                pos_candidato = primer_ec_candidato(nodo_frontera)
+                if pos_candidato < 0:
+                    pila_nodos.append(nodo_frontera) # Terminal transparente: solo aloja al EC de origen
+                else:
+                    candidatos.append(pos_candidato)
+
+    if len(candidatos) <= 1:
+        return candidatos[0] if candidatos else -1
+    return _dfs_anillo(modelo_red, co_ec_open_original, nodo_inicio_cod, marcas_visitados)
+
+
+def indexar_resultados_por_co(df_resultados_ecs_completos):
+    """
+    Construye el índice CODIGO_OPERATIVO → resultado del barrido principal usado por el análisis de anillos.
+
+    Para cada código se conserva la primera fila de los resultados, que es la que consultaba la
+    búsqueda lineal original.
+
+    Parámetros:
+        df_resultados_ecs_completos (pd.DataFrame): Resultados del primer barrido de conectividad.
+
+    Retorna:
+        pd.DataFrame: 'Elementos_Aguas_Arriba' y 'Circuito_Origen_Barrido' indexados por
+                      CODIGO_OPERATIVO (índice único).
+    """
+    columnas = [col for col in ('Elementos_Aguas_Arriba', 'Circuito_Origen_Barrido')
+                if col in df_resultados_ecs_completos.columns]
+    return df_resultados_ecs_completos.drop_duplicates(subset=['CODIGO_OPERATIVO'], keep='first') \
+        .set_index('CODIGO_OPERATIVO')[columnas]
+
 
 def barrido_anillos_especifico(
     co_ec_open_original,
     nodo_inicio_anillo,
     df_elementos_corte_global, 
     df_lineas_global,         
-    df_resultados_ecs_completos 
+    df_resultados_ecs_completos,
+    modelo_red=None,
+    secciones=None,
+    indice_resultados=None
     ):
     """
     Realiza un barrido simplificado desde un nodo de un EC 'OPEN'.
 
     El objetivo es encontrar el primer EC con el que se conecta este nodo no explorado,
-    para determinar la formación de un anillo o una transferencia.
+    para determinar la formación de un anillo o una transferencia. Para analizar todos los
+    ECs 'OPEN' de una vez use `barrido_anillos_por_secciones`.
 
     Parámetros:
         co_ec_open_original (str): CODIGO_OPERATIVO del EC 'OPEN' que origina este barrido de anillo.
@@ -307,104 +1118,108 @@ def barrido_anillos_especifico(
         df_lineas_global (pd.DataFrame): DataFrame con todas las líneas.
         df_resultados_ecs_completos (pd.DataFrame): Resultados del primer barrido de conectividad,
                                                    usado para obtener información del EC que cierra el anillo.
+        modelo_red (dict, optional): Modelo codificado generado por `construir_modelo_red`.
+                                     Si es None se construye aquí.
+        secciones (dict, optional): Secciones generadas por `construir_secciones_lineas`.
+                                    Si es None se construyen aquí.
+        indice_resultados (pd.DataFrame, optional): Índice generado por `indexar_resultados_por_co`
+                                                    a partir de `df_resultados_ecs_completos`.
+                                                    Si es None se construye aquí.
     Retorna:
         tuple: (co_ec_encontrado, elementos_aguas_arriba_anillo, circuito_origen_anillo)
                Retorna (pd.NA, pd.NA, pd.NA) si no se encuentra un EC que cierre el anillo.
     """
-    pila_exploracion_anillo = []
-    # Conjunto para evitar ciclos dentro de ESTE barrido de anillo específico
-    visitados_fids_este_anillo_dfs = set() 
-    # No queremos "encontrar" el mismo EC 'OPEN' como el otro extremo del anillo inmediatamente.
-    # El G3E_FID del co_ec_open_original se podría usar si se tiene, pero el CO es más directo aquí.
-    # visitados_fids_este_anillo_dfs.add(co_ec_open_original) # Esto sería si co_ec_open_original fuera FID
+    if modelo_red is None:
+        modelo_red = construir_modelo_red(df_elementos_corte_global, df_lineas_global)
+    if secciones is None:
+        secciones = construir_secciones_lineas(modelo_red)
 
-    # La tupla en la pila: (FID_del_elemento_anterior, TIPO_elemento_anterior, nodo_a_explorar_ahora)
-    pila_exploracion_anillo.append( (None, "NODO_INICIAL_ANILLO", nodo_inicio_anillo) )
-    
-    max_iteraciones_anillo = 100 # Límite para prevenir bucles infinitos en topologías complejas
-    iter_count = 0
-
-    while pila_exploracion_anillo and iter_count < max_iteraciones_anillo:
-        iter_count += 1
-        _, _, nodo_actual_anillo = pila_exploracion_anillo.pop()
-
-        # Marcar el nodo como visitado en este contexto de barrido de anillo para evitar reprocesarlo
-        # (Esto es una simplificación, normalmente se marcan FIDs de elementos, no nodos)
-        # Es mejor marcar los FIDs de las líneas/ECs atravesados.
-
-        # 1. Buscar ECs Conectados directamente al nodo_actual_anillo
-        #    Estos son los candidatos a cerrar el anillo.
-        ecs_conectados_directo_anillo = df_elementos_corte_global[
-            ((df_elementos_corte_global['NODO1_ID'] == nodo_actual_anillo) | \
-             (df_elementos_corte_global['NODO2_ID'] == nodo_actual_anillo)) & \
-            (df_elementos_corte_global['CODIGO_OPERATIVO'] != co_ec_open_original) 
-        ]
-        for _, ec_row in ecs_conectados_directo_anillo.iterrows():
-            co_ec_encontrado_anillo = str(ec_row['CODIGO_OPERATIVO'])
-            
-            # Se encontró un EC. Obtener su información del barrido principal.
-            info_ec_encontrado_barrido1 = df_resultados_ecs_completos[
-                df_resultados_ecs_completos['CODIGO_OPERATIVO'] == co_ec_encontrado_anillo
-            ]
-            if not info_ec_encontrado_barrido1.empty:
-                data_ec_encontrado = info_ec_encontrado_barrido1.iloc[0]
-                elementos_aguas_arriba_anillo = data_ec_encontrado.get('Elementos_Aguas_Arriba', pd.NA)
-                circuito_origen_anillo = data_ec_encontrado.get('Circuito_Origen_Barrido', pd.NA)
-                return co_ec_encontrado_anillo, elementos_aguas_arriba_anillo, circuito_origen_anillo
-            else: 
-                # EC encontrado en la red física pero no en los resultados del barrido1 (poco común si los datos son consistentes)
-                return co_ec_encontrado_anillo, pd.NA, pd.NA 
-
-        # 2. Si no hay EC directo, buscar Líneas Conectadas al nodo_actual_anillo para seguir explorando
-        lineas_conectadas_anillo = df_lineas_global[
-            ((df_lineas_global['NODO1_ID'] == nodo_actual_anillo) | \
-             (df_lineas_global['NODO2_ID'] == nodo_actual_anillo)) 
-        ]
-        for _, linea_row_anillo in lineas_conectadas_anillo.iterrows():
-            linea_fid_anillo = str(linea_row_anillo['G3E_FID'])
-            if linea_fid_anillo not in visitados_fids_este_anillo_dfs: # Evitar revisitar la misma línea en este barrido
-                visitados_fids_este_anillo_dfs.add(linea_fid_anillo)
-                
-                otro_nodo_linea_anillo = None
-                if str(linea_row_anillo['NODO1_ID']) == nodo_actual_anillo and \
-                   pd.notna(linea_row_anillo['NODO2_ID']) and str(linea_row_anillo['NODO2_ID']).lower() != 'nan':
-                    otro_nodo_linea_anillo = str(linea_row_anillo['NODO2_ID'])
-                elif str(linea_row_anillo['NODO2_ID']) == nodo_actual_anillo and \
-                     pd.notna(linea_row_anillo['NODO1_ID']) and str(linea_row_anillo['NODO1_ID']).lower() != 'nan':
-                    otro_nodo_linea_anillo = str(linea_row_anillo['NODO1_ID'])
-                
-                if otro_nodo_linea_anillo:
-                    pila_exploracion_anillo.append((linea_fid_anillo, 'LINEA_ANILLO', otro_nodo_linea_anillo))
-        
-        # 3. Si no hay línea, buscar ECs CERRADOS para continuar la exploración a través de ellos.
-        ecs_para_atravesar_anillo = df_elementos_corte_global[
-            ((df_elementos_corte_global['NODO1_ID'] == nodo_actual_anillo) | \
-             (df_elementos_corte_global['NODO2_ID'] == nodo_actual_anillo)) & \
-            (df_elementos_corte_global['CODIGO_OPERATIVO'] != co_ec_open_original) & \
-            (df_elementos_corte_global['EST_ESTABLE'] == 'CLOSED') # Solo se puede atravesar ECs cerrados
-        ]
-        for _, ec_row_atravesar in ecs_para_atravesar_anillo.iterrows():
-            ec_fid_atravesar = str(ec_row_atravesar['G3E_FID'])
-            if ec_fid_atravesar not in visitados_fids_este_anillo_dfs: # Evitar revisitar
-                visitados_fids_este_anillo_dfs.add(ec_fid_atravesar)
-                
-                otro_nodo_ec_atravesar = None
-                if str(ec_row_atravesar['NODO1_ID']) == nodo_actual_anillo and \
-                   pd.notna(ec_row_atravesar['NODO2_ID']) and str(ec_row_atravesar['NODO2_ID']).lower() != 'nan':
-                    otro_nodo_ec_atravesar = str(ec_row_atravesar['NODO2_ID'])
-                elif str(ec_row_atravesar['NODO2_ID']) == nodo_actual_anillo and \
-                     pd.notna(ec_row_atravesar['NODO1_ID']) and str(ec_row_atravesar['NODO1_ID']).lower() != 'nan':
-                    otro_nodo_ec_atravesar = str(ec_row_atravesar['NODO1_ID'])
-                
-                if otro_nodo_ec_atravesar:
-                    pila_exploracion_anillo.append((ec_fid_atravesar, ec_row_atravesar['TIPO'], otro_nodo_ec_atravesar))
-    
-    # if iter_count >= max_iteraciones_anillo:
-    #     print(f"⚠️ Advertencia: Barrido de anillo para {co_ec_open_original} desde nodo {nodo_inicio_anillo} alcanzó el límite de iteraciones.")
-    return pd.NA, pd.NA, pd.NA
+    nodo_inicio_cod = codigo_nodo(modelo_red, nodo_inicio_anillo)
+    if nodo_inicio_cod == NODO_NULO:
+        return pd.NA, pd.NA, pd.NA
+
+    pos_ec_anillo = _resolver_anillo(modelo_red, secciones, co_ec_open_original, nodo_inicio_cod)
+    if pos_ec_anillo < 0:
+        return pd.NA, pd.NA, pd.NA
+
+    co_ec_encontrado_anillo = modelo_red['ecs']['co'][pos_ec_anillo]
+    if indice_resultados is None:
+        indice_resultados = indexar_resultados_por_co(df_resultados_ecs_completos)
+    if co_ec_encontrado_anillo not in indice_resultados.index:
+        # EC encontrado en la red física pero no en los resultados del barrido1 (poco común si los datos son consistentes)
+        return co_ec_encontrado_anillo, pd.NA, pd.NA
+    data_ec_encontrado = indice_resultados.loc[co_ec_encontrado_anillo]
+    return (co_ec_encontrado_anillo,
+            data_ec_encontrado.get('Elementos_Aguas_Arriba', pd.NA),
+            data_ec_encontrado.get('Circuito_Origen_Barrido', pd.NA))
+
+
+def barrido_anillos_por_secciones(df_ecs_open, df_resultados_ecs_completos, modelo_red, secciones=None,
+                                  indice_resultados=None, cache_anillos=None):
+    """
+    Resuelve en bloque el EC que cierra el anillo de cada EC 'OPEN'.
+
+    Las secciones de líneas se calculan una sola vez para toda la red, por lo que cada consulta
+    solo recorre las fronteras de las secciones que toca, sin límite de iteraciones. La información
+    del EC encontrado se toma de la primera fila de `df_resultados_ecs_completos` con su
+    CODIGO_OPERATIVO, igual que en `barrido_anillos_especifico`.
+
+    Parámetros:
+        df_ecs_open (pd.DataFrame): ECs 'OPEN' a analizar, con 'CODIGO_OPERATIVO' y 'Nodo_No_Explorado_Anillo'.
+        df_resultados_ecs_completos (pd.DataFrame): Resultados del primer barrido de conectividad.
+        modelo_red (dict): Modelo generado por `construir_modelo_red`.
+        secciones (dict, optional): Secciones generadas por `construir_secciones_lineas`.
+                                    Si es None se construyen aquí.
+        indice_resultados (pd.DataFrame, optional): Índice generado por `indexar_resultados_por_co`.
+                                                    Si es None se construye aquí.
+        cache_anillos (dict, optional): Caché (CODIGO_OPERATIVO, nodo codificado) → posición del EC
+                                        del anillo (-1 sin anillo). El EC encontrado solo depende de la
+                                        topología, así que el caché sigue siendo válido tras cambios de
+                                        estado; se consulta y se completa aquí. Por defecto None.
+
+    Retorna:
+        pd.DataFrame: Con el mismo índice de `df_ecs_open` y las columnas 'Equipo_anillo',
+                      'Elementos_Aguas_Arriba_anillo' y 'Circuito_anillo' (pd.NA donde no hay anillo).
+    """
+    if secciones is None:
+        secciones = construir_secciones_lineas(modelo_red)
+
+    nodos_inicio = modelo_red['indice_nodos'].get_indexer(df_ecs_open['Nodo_No_Explorado_Anillo'].astype(str))
+    cos_open = df_ecs_open['CODIGO_OPERATIVO'].astype(str).tolist()
+    if cache_anillos is None:
+        cache_anillos = {}
+    marcas_visitados = crear_marcas_visitados(modelo_red)  # Compartidas por los desempates de `_dfs_anillo`
+    pos_ecs_anillo = np.full(len(cos_open), -1, dtype=np.int64)
+    for i, (co, nodo) in enumerate(zip(cos_open, nodos_inicio.tolist())):
+        if nodo == NODO_NULO:
+            continue
+        pos_ec_anillo = cache_anillos.get((co, nodo))
+        if pos_ec_anillo is None:
+            pos_ec_anillo = cache_anillos[(co, nodo)] = _resolver_anillo(
+                modelo_red, secciones, co, nodo, marcas_visitados)
+        pos_ecs_anillo[i] = pos_ec_anillo
 
+    con_anillo = pos_ecs_anillo >= 0
+    equipos = pd.Series(pd.NA, index=df_ecs_open.index, dtype=object)
+    equipos[con_anillo] = modelo_red['ecs']['co'][pos_ecs_anillo[con_anillo]]
 
-def generar_dfs_resultados_finales(df_circuitos, df_elementos_corte_global, df_lineas_global, df_trafos_global, verbose=False):
+    # Primera fila de resultados por CODIGO_OPERATIVO, consultada en bloque
+    if indice_resultados is None:
+        indice_resultados = indexar_resultados_por_co(df_resultados_ecs_completos)
+    resultado = pd.DataFrame({'Equipo_anillo': equipos}, index=df_ecs_open.index)
+    for col_destino, col_origen in (('Elementos_Aguas_Arriba_anillo', 'Elementos_Aguas_Arriba'),
+                                    ('Circuito_anillo', 'Circuito_Origen_Barrido')):
+        if col_origen in indice_resultados.columns:
+            valores = indice_resultados[col_origen].reindex(equipos.to_numpy()).to_numpy(dtype=object)
+            serie_valores = pd.Series(valores, index=df_ecs_open.index, dtype=object)
+            resultado[col_destino] = serie_valores.where(con_anillo & serie_valores.notna().to_numpy(), pd.NA)
+        else:
+            resultado[col_destino] = pd.NA
+    return resultado
+
+
+def generar_dfs_resultados_finales(df_circuitos, df_elementos_corte_global, df_lineas_global, df_trafos_global, verbose=False,
+                                   n_procesos=1, motor='dfs', carpeta_snapshot_modelo=None, instrumentacion=None):
     """
     Orquesta el proceso completo de barrido de conectividad y análisis de anillos.
 
@@ -419,6 +1234,22 @@ def generar_dfs_resultados_finales(df_circuitos, df_elementos_corte_global, df_l
         df_trafos_global (pd.DataFrame): DataFrame con todos los transformadores de la red.
         verbose (bool, optional): Si es True, imprime mensajes detallados durante el análisis de anillos.
                                   Por defecto False.
+        n_procesos (int, optional): Cantidad de procesos para el barrido principal. Con 1 los circuitos
+                                    se barren en secuencia; con un valor mayor (o None para usar todos los
+                                    núcleos) se reparten en un pool de procesos. Por defecto 1.
+        motor (str, optional): Motor del barrido principal. 'dfs' barre cada circuito de forma
+                               independiente; 'bfs' barre los circuitos por lotes expandiendo
+                               frentes completos con NumPy (ver `barrido_conectividad_frontera`) e
+                               ignora `n_procesos`. Por defecto 'dfs'.
+        carpeta_snapshot_modelo (str, optional): Carpeta del snapshot del modelo codificado de la red.
+                                                 Si contiene un snapshot de los mismos datos de entrada,
+                                                 el modelo y las secciones de líneas se abren con
+                                                 memory-map en lugar de reconstruirse; si no, se
+                                                 construyen y se guardan ahí. Por defecto None (sin snapshot).
+        instrumentacion (dict, optional): Registro de `crear_instrumentacion` (instrumentacion.py). Si se
+                                          indica, se registran las etapas del barrido y, por circuito, el
+                                          tiempo y los contadores del barrido principal (excepto con el
+                                          pool de procesos) y los ECs 'OPEN' analizados. Por defecto None.
 
     Retorna:
         tuple: Una tupla conteniendo tres DataFrames:
@@ -432,11 +1263,35 @@ def generar_dfs_resultados_finales(df_circuitos, df_elementos_corte_global, df_l
        df_lineas_global is None or df_trafos_global is None:
         print("❌ Error en la carga de datos inicial. No se puede continuar el barrido.")
         return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+    if motor not in ('dfs', 'bfs'):
+        print(f"❌ Error: Motor de barrido '{motor}' no es válido. Use 'dfs' o 'bfs'.")
+        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
         
-    # Listas para acumular resultados de todos los barridos de circuito
-    resultados_elementos_corte_acumulados_lista = []
-    resultados_lineas_acumulados_lista = []
-    resultados_transformadores_acumulados_lista = []
+    # Acumulador columnar de resultados de todos los barridos de circuito
+    resultados_barrido = crear_resultados_barrido()
+
+    # Modelo codificado de la red, construido una sola vez (o abierto desde el snapshot) y compartido por ambos barridos
+    modelo_red, secciones_lineas, snapshot_disponible, origen_modelo = None, None, False, 'construido'
+    inicio_modelo = time.perf_counter()
+    if carpeta_snapshot_modelo is not None:
+        huella_modelo = huella_datos_modelo_red(df_elementos_corte_global, df_lineas_global, df_trafos_global, df_circuitos)
+        modelo_red, secciones_lineas = abrir_snapshot_modelo_red(carpeta_snapshot_modelo, huella_modelo)
+        snapshot_disponible = modelo_red is not None
+        if snapshot_disponible:
+            origen_modelo = 'snapshot'
+            print(f"⚡ Modelo de la red abierto desde el snapshot '{carpeta_snapshot_modelo}'.")
+    if modelo_red is None:
+        modelo_red = construir_modelo_red(df_elementos_corte_global, df_lineas_global, df_trafos_global, df_circuitos)
+        if carpeta_snapshot_modelo is not None:
+            secciones_lineas = construir_secciones_lineas(modelo_red)
+            try:
+                guardar_snapshot_modelo_red(modelo_red, carpeta_snapshot_modelo, secciones_lineas, huella_modelo)
+                snapshot_disponible = True
+                print(f"💾 Snapshot del modelo de la red guardado en '{carpeta_snapshot_modelo}'.")
+            except Exception as e:
+                print(f"⚠️ Advertencia: No se pudo guardar el snapshot del modelo de la red: {e}")
+    registrar_etapa(instrumentacion, 'barrido/modelo_red', time.perf_counter() - inicio_modelo,
+                    origen=origen_modelo)
 
     # --- FASE 1: BARRIDO DE CONECTIVIDAD PRINCIPAL ---
     print("\n🔄 Iniciando primer barrido de conectividad...")
@@ -446,31 +1301,100 @@ def generar_dfs_resultados_finales(df_circuitos, df_elementos_corte_global, df_l
         print_progress_bar(0, total_circuitos_barrido1, prefix='Barrido Principal:', 
                            start_time=start_time_barrido1, current_task_info="Iniciando...")
     
-    for i, (_, row_circuito) in enumerate(df_circuitos.iterrows()):
-        circuito_co_inicial_actual = str(row_circuito['Circuito'])
-        task_info_barrido1 = f"Cto: {circuito_co_inicial_actual}"
-        
-        # Llama a la función de barrido para el circuito actual.
-        # Se pasan los DataFrames globales; la función barrido_conectividad_por_circuito
-        # usa 'circuito_co_inicial_actual' para encontrar el punto de arranque correcto.
-        barrido_conectividad_por_circuito(
-            circuito_co_inicial_actual,
-            df_elementos_corte_global, 
+    circuitos_a_barrer = df_circuitos['Circuito'].astype(str).tolist()
+    en_paralelo = motor == 'dfs' and (n_procesos is None or n_procesos > 1)
+    # Con instrumentación, cada circuito registra su tiempo (desde el circuito anterior) y sus contadores
+    contadores_por_circuito = {} if instrumentacion is not None and not en_paralelo else None
+    marca_circuito = [time.perf_counter()]
+
+    def al_completar_circuito(i, circuito):
+        print_progress_bar(i + 1, total_circuitos_barrido1, prefix='Barrido Principal:',
+                           start_time=start_time_barrido1, current_task_info='')
+        if contadores_por_circuito is not None:
+            ahora = time.perf_counter()
+            registrar_circuito(instrumentacion, circuito, barrido_s=ahora - marca_circuito[0],
+                               **contadores_por_circuito.get(circuito, {}))
+            marca_circuito[0] = ahora
+
+    inicio_barrido = time.perf_counter()
+    if motor == 'bfs':
+        barrido_conectividad_frontera(
+            circuitos_a_barrer,
+            df_elementos_corte_global,
             df_lineas_global,
             df_trafos_global,
-            resultados_elementos_corte_acumulados_lista,
-            resultados_lineas_acumulados_lista,
-            resultados_transformadores_acumulados_lista
+            resultados_barrido,
+            modelo_red,
+            al_completar_circuito=al_completar_circuito,
+            contadores_por_circuito=contadores_por_circuito
         )
-        if total_circuitos_barrido1 > 0:
-            print_progress_bar(i + 1, total_circuitos_barrido1, prefix='Barrido Principal:', 
-                               start_time=start_time_barrido1, current_task_info='')
+    elif not en_paralelo:
+        marcas_visitados = crear_marcas_visitados(modelo_red)
+        for i, circuito_co_inicial_actual in enumerate(circuitos_a_barrer):
+            # Llama a la función de barrido para el circuito actual.
+            # Se pasan los DataFrames globales; la función barrido_conectividad_por_circuito
+            # usa 'circuito_co_inicial_actual' para encontrar el punto de arranque correcto.
+            barrido_conectividad_por_circuito(
+                circuito_co_inicial_actual,
+                df_elementos_corte_global, 
+                df_lineas_global,
+                df_trafos_global,
+                resultados_barrido,
+                modelo_red,
+                marcas_visitados=marcas_visitados,
+                contadores=None if contadores_por_circuito is None else contadores_por_circuito.setdefault(circuito_co_inicial_actual, {})
+            )
+            al_completar_circuito(i, circuito_co_inicial_actual)
+    elif total_circuitos_barrido1 > 0:
+        barrer_circuitos_en_paralelo(
+            circuitos_a_barrer,
+            modelo_red,
+            resultados_barrido,
+            n_procesos=n_procesos,
+            al_completar_circuito=al_completar_circuito,
+            carpeta_snapshot=carpeta_snapshot_modelo if snapshot_disponible else None,
+            huella_snapshot=huella_modelo if snapshot_disponible else None
+        )
+    registrar_etapa(instrumentacion, 'barrido/principal', time.perf_counter() - inicio_barrido,
+                    motor=motor, circuitos=total_circuitos_barrido1)
     
-    # Convertir listas de resultados a DataFrames
-    df_final_elementos_corte = pd.DataFrame(resultados_elementos_corte_acumulados_lista)
-    df_final_lineas = pd.DataFrame(resultados_lineas_acumulados_lista)
-    df_final_trafos = pd.DataFrame(resultados_transformadores_acumulados_lista)
+    # Materializar los resultados acumulados en DataFrames (un único take por tabla)
+    with medir_etapa(instrumentacion, 'barrido/materializacion'):
+        df_final_elementos_corte, df_final_lineas, df_final_trafos = materializar_resultados_barrido(
+            resultados_barrido, df_elementos_corte_global, df_lineas_global, df_trafos_global
+        )
+
+    return completar_resultados_finales(
+        df_final_elementos_corte, df_final_lineas, df_final_trafos, modelo_red, circuitos_a_barrer, verbose,
+        secciones_lineas, instrumentacion=instrumentacion
+    )
+
+
+def completar_resultados_finales(df_final_elementos_corte, df_final_lineas, df_final_trafos, modelo_red,
+                                 circuitos, verbose=False, secciones_lineas=None, cache_anillos=None,
+                                 instrumentacion=None):
+    """
+    Ejecuta el análisis de anillos y la deduplicación sobre los resultados materializados del barrido.
+
+    Es la segunda parte de `generar_dfs_resultados_finales`. El barrido incremental
+    (`barrido_incremental.py`) reproduce esta deduplicación solo para las claves que tocan los
+    circuitos re-barridos; un cambio aquí debe reflejarse allá.
 
+    Parámetros:
+        df_final_elementos_corte (pd.DataFrame): ECs de `materializar_resultados_barrido`.
+        df_final_lineas (pd.DataFrame): Líneas de `materializar_resultados_barrido`.
+        df_final_trafos (pd.DataFrame): Transformadores de `materializar_resultados_barrido`.
+        modelo_red (dict): Modelo codificado generado por `construir_modelo_red`.
+        circuitos (list): Circuitos barridos; solo se analizan los ECs 'OPEN' que pertenecen a ellos.
+        verbose (bool, optional): Si es True, imprime los anillos encontrados. Por defecto False.
+        secciones_lineas (dict, optional): Secciones de `construir_secciones_lineas`. Si es None se construyen aquí.
+        cache_anillos (dict, optional): Caché de anillos resueltos (ver `barrido_anillos_por_secciones`).
+        instrumentacion (dict, optional): Registro de `crear_instrumentacion` para las etapas de anillos
+                                          y deduplicación. Por defecto None.
+
+    Retorna:
+        tuple: (df_final_elementos_corte, df_final_lineas, df_final_trafos) deduplicados.
+    """
     # Inicializar columnas para información de anillos en el DataFrame de ECs
     if not df_final_elementos_corte.empty:
         df_final_elementos_corte['Equipo_anillo'] = pd.NA
@@ -484,73 +1408,50 @@ def generar_dfs_resultados_finales(df_circuitos, df_elementos_corte_global, df_l
 
     # --- FASE 2: ANÁLISIS DE ANILLOS PARA ECs 'OPEN' ---
     print("\n🔄 Iniciando análisis de anillos y transferencias...")
-    total_circuitos_barrido2 = len(df_circuitos) 
     start_time_barrido2 = time.time()
-    if total_circuitos_barrido2 > 0:
-        print_progress_bar(0, total_circuitos_barrido2, prefix='Análisis Anillos:', 
-                           start_time=start_time_barrido2, current_task_info="Iniciando...")
-
-    # Itera nuevamente sobre los circuitos para procesar los ECs 'OPEN' que pertenecen a cada uno.
-    # Esto es para contextualizar el barrido de anillos, aunque la barra muestra el progreso general de circuitos.
-    for i, (_, row_circuito) in enumerate(df_circuitos.iterrows()):
-        circuito_para_analisis_anillo = str(row_circuito['Circuito'])
-        task_info_anillos_fase = f"Cto: {circuito_para_analisis_anillo}"
-
-        # Filtra ECs 'OPEN' con 'Nodo_No_Explorado_Anillo' válido Y que pertenecen
-        # al 'CIRCUITO' original que se está iterando para el análisis de anillos.
-        # Se asume que la columna 'CIRCUITO' en df_final_elementos_corte es el circuito de pertenencia original del EC.
-        if 'CIRCUITO' in df_final_elementos_corte.columns:
-            ecs_open_del_circuito_actual = df_final_elementos_corte[
-                (df_final_elementos_corte['EST_ESTABLE'] == 'OPEN') &
-                (df_final_elementos_corte['Nodo_No_Explorado_Anillo'].notna()) &
-                (df_final_elementos_corte['CIRCUITO'] == circuito_para_analisis_anillo)
-            ].copy() # .copy() para evitar SettingWithCopyWarning en actualizaciones posteriores
-        else:
-            # Si la columna 'CIRCUITO' falta, no se puede filtrar por circuito para los anillos.
-            # Se podría optar por procesar todos los ECs open o mostrar una advertencia más fuerte.
-            if verbose: print(f"⚠️ Advertencia: Columna 'CIRCUITO' no encontrada en df_final_elementos_corte. "
-                              f"Análisis de anillos para {circuito_para_analisis_anillo} podría ser incompleto o global.")
-            ecs_open_del_circuito_actual = df_final_elementos_corte[ # Procesar todos los open si 'CIRCUITO' falta
-                (df_final_elementos_corte['EST_ESTABLE'] == 'OPEN') &
-                (df_final_elementos_corte['Nodo_No_Explorado_Anillo'].notna())
-            ].copy()
-            if ecs_open_del_circuito_actual.empty and verbose : #Solo si no hay ecs_open para procesar.
-                 print(f"    No hay ECs 'OPEN' con nodo no explorado para el circuito {circuito_para_analisis_anillo}.")
-
-
-        # Itera sobre los ECs 'OPEN' identificados para este circuito y realiza el barrido de anillo
-        for index_ec_open, row_ec_open_actual in ecs_open_del_circuito_actual.iterrows():
-            co_ec_open_actual = row_ec_open_actual['CODIGO_OPERATIVO']
-            nodo_a_explorar_anillo = row_ec_open_actual['Nodo_No_Explorado_Anillo']
-            
-            # Mensajes detallados si verbose está activado
-            if verbose: 
-                # Usar \r para intentar sobrescribir mensajes de verbose, aunque puede no ser perfecto.
-                sys.stdout.write(f"\r    Analizando anillo para EC 'OPEN': {co_ec_open_actual} (Cto: {circuito_para_analisis_anillo}) desde nodo {nodo_a_explorar_anillo}...\n")
-                sys.stdout.flush()
-
-            equipo_anillo_encontrado, eaa_anillo_str, circuito_del_anillo = barrido_anillos_especifico(
-                co_ec_open_actual,
-                nodo_a_explorar_anillo,
-                df_elementos_corte_global, # DataFrame global de ECs
-                df_lineas_global,          # DataFrame global de Líneas
-                df_final_elementos_corte   # Resultados del barrido principal para consulta
-            )
-            
-            if pd.notna(equipo_anillo_encontrado):
-                if verbose: 
-                    sys.stdout.write(f"\r      Anillo encontrado para {co_ec_open_actual}: Equipo={equipo_anillo_encontrado}, Cto.Anillo={circuito_del_anillo}\n")
-                    sys.stdout.flush()
-                # Actualizar el DataFrame principal con la información del anillo
-                df_final_elementos_corte.loc[index_ec_open, 'Equipo_anillo'] = equipo_anillo_encontrado
-                df_final_elementos_corte.loc[index_ec_open, 'Elementos_Aguas_Arriba_anillo'] = eaa_anillo_str
-                df_final_elementos_corte.loc[index_ec_open, 'Circuito_anillo'] = circuito_del_anillo
-        
-        # Actualizar la barra de progreso después de procesar todos los ECs 'OPEN' de este circuito
-        if total_circuitos_barrido2 > 0:
-            print_progress_bar(i + 1, total_circuitos_barrido2, prefix='Análisis Anillos:', 
-                               start_time=start_time_barrido2, current_task_info='')
-            
+    inicio_anillos = time.perf_counter()
+
+    # ECs 'OPEN' con 'Nodo_No_Explorado_Anillo' válido que pertenecen (columna 'CIRCUITO')
+    # a alguno de los circuitos procesados.
+    mascara_open = (df_final_elementos_corte['EST_ESTABLE'] == 'OPEN') & \
+                   (df_final_elementos_corte['Nodo_No_Explorado_Anillo'].notna())
+    if 'CIRCUITO' in df_final_elementos_corte.columns:
+        mascara_open &= df_final_elementos_corte['CIRCUITO'].isin(circuitos)
+    elif verbose:
+        # Si la columna 'CIRCUITO' falta, no se puede filtrar por circuito y se procesan todos los ECs open.
+        print("⚠️ Advertencia: Columna 'CIRCUITO' no encontrada en df_final_elementos_corte. "
+              "El análisis de anillos se realiza sobre todos los ECs 'OPEN'.")
+    df_ecs_open = df_final_elementos_corte[mascara_open]
+
+    # Secciones de líneas e índice de resultados por CODIGO_OPERATIVO, calculados una sola vez;
+    # cada EC 'OPEN' se resuelve contra ellos
+    if secciones_lineas is None:
+        secciones_lineas = construir_secciones_lineas(modelo_red)
+    indice_resultados = indexar_resultados_por_co(df_final_elementos_corte)
+    print_progress_bar(0, 1, prefix='Análisis Anillos:', start_time=start_time_barrido2,
+                       current_task_info=f"{len(df_ecs_open)} ECs 'OPEN'")
+    df_anillos = barrido_anillos_por_secciones(
+        df_ecs_open, df_final_elementos_corte, modelo_red, secciones_lineas, indice_resultados, cache_anillos
+    )
+    df_anillos = df_anillos[df_anillos['Equipo_anillo'].notna()]
+    if verbose:
+        for index_ec_open, row_anillo in df_anillos.iterrows():
+            sys.stdout.write(f"\r      Anillo encontrado para {df_ecs_open.at[index_ec_open, 'CODIGO_OPERATIVO']}: "
+                             f"Equipo={row_anillo['Equipo_anillo']}, Cto.Anillo={row_anillo['Circuito_anillo']}\n")
+        sys.stdout.flush()
+
+    # Actualizar el DataFrame principal con la información de todos los anillos de una vez
+    columnas_anillo = ['Equipo_anillo', 'Elementos_Aguas_Arriba_anillo', 'Circuito_anillo']
+    df_final_elementos_corte.loc[df_anillos.index, columnas_anillo] = df_anillos[columnas_anillo].to_numpy()
+    print_progress_bar(1, 1, prefix='Análisis Anillos:', start_time=start_time_barrido2, current_task_info='')
+    registrar_etapa(instrumentacion, 'barrido/anillos', time.perf_counter() - inicio_anillos,
+                    ecs_open=len(df_ecs_open), anillos=len(df_anillos))
+    if instrumentacion is not None:
+        # El análisis de anillos se resuelve en bloque; por circuito se registran los ECs 'OPEN' analizados
+        for circuito, n_ecs_open in df_ecs_open['Circuito_Origen_Barrido'].value_counts(sort=False).items():
+            registrar_circuito(instrumentacion, circuito, ecs_open_anillos=int(n_ecs_open))
+    inicio_deduplicacion = time.perf_counter()
+
     # Eliminar duplicados después de todos los procesamientos.
     # Es importante que las columnas usadas para identificar duplicados existan.
     if not df_final_elementos_corte.empty:
@@ -566,7 +1467,8 @@ def generar_dfs_resultados_finales(df_circuitos, df_elementos_corte_global, df_l
         # 2. Ordenamos el DataFrame.
         # Ordenamos de forma descendente por 'COINCIDENCIA_CIRCUITOS'. Así, True (que es 1) irá antes que False (que es 0).
         # Esto asegura que al eliminar duplicados, la fila con 'COINCIDENCIA_CIRCUITOS' en True sea la que se conserve.
-        df_ordenado_ecs = df_final_elementos_corte.sort_values(by='COINCIDENCIA_CIRCUITOS', ascending=False)
+        # El orden estable conserva, entre filas empatadas, la del primer circuito barrido.
+        df_ordenado_ecs = df_final_elementos_corte.sort_values(by='COINCIDENCIA_CIRCUITOS', ascending=False, kind='stable')
         
         # 3. Eliminamos los duplicados basándonos en 'CODIGO_OPERATIVO', conservando la primera ocurrencia después de ordenar.
         df_limpio_ecs = df_ordenado_ecs.drop_duplicates(subset=['CODIGO_OPERATIVO'], keep='first')
@@ -587,7 +1489,8 @@ def generar_dfs_resultados_finales(df_circuitos, df_elementos_corte_global, df_l
         # 2. Ordenamos el DataFrame.
         # Ordenamos de forma descendente por 'COINCIDENCIA_CIRCUITOS'. Así, True (que es 1) irá antes que False (que es 0).
         # Esto asegura que al eliminar duplicados, la fila con 'COINCIDENCIA_CIRCUITOS' en True sea la que se conserve.
-        df_ordenado_lins = df_final_lineas.sort_values(by='COINCIDENCIA_CIRCUITOS', ascending=False)
+        # El orden estable conserva, entre filas empatadas, la del primer circuito barrido.
+        df_ordenado_lins = df_final_lineas.sort_values(by='COINCIDENCIA_CIRCUITOS', ascending=False, kind='stable')
         
         # 3. Eliminamos los duplicados basándonos en 'CODIGO_OPERATIVO', conservando la primera ocurrencia después de ordenar.
         df_limpio_lins = df_ordenado_lins.drop_duplicates(subset=['G3E_FID'], keep='first')
@@ -608,17 +1511,144 @@ def generar_dfs_resultados_finales(df_circuitos, df_elementos_corte_global, df_l
         # 2. Ordenamos el DataFrame.
         # Ordenamos de forma descendente por 'COINCIDENCIA_CIRCUITOS'. Así, True (que es 1) irá antes que False (que es 0).
         # Esto asegura que al eliminar duplicados, la fila con 'COINCIDENCIA_CIRCUITOS' en True sea la que se conserve.
-        df_ordenado_trafos = df_final_trafos.sort_values(by='COINCIDENCIA_CIRCUITOS', ascending=False)
+        # El orden estable conserva, entre filas empatadas, la del primer circuito barrido.
+        df_ordenado_trafos = df_final_trafos.sort_values(by='COINCIDENCIA_CIRCUITOS', ascending=False, kind='stable')
         
         # 3. Eliminamos los duplicados basándonos en 'CODIGO_OPERATIVO', conservando la primera ocurrencia después de ordenar.
         df_limpio_trafos = df_ordenado_trafos.drop_duplicates(subset=['G3E_FID'], keep='first')
         
         # 4. Eliminamos la columna auxiliar temporal para dejar el DataFrame como estaba originalmente.
         df_final_trafos = df_limpio_trafos.drop(columns=['COINCIDENCIA_CIRCUITOS'])
+    registrar_etapa(instrumentacion, 'barrido/deduplicacion', time.perf_counter() - inicio_deduplicacion)
         
     return df_final_elementos_corte, df_final_lineas, df_final_trafos
 
 
+def _capacidad_nominal_kva(serie_capacidad):
+    """Convierte CAPACIDAD_NOMINAL (texto con coma o punto decimal) a número; los valores inválidos cuentan 0."""
+    texto = serie_capacidad.astype(str).str.strip().str.replace(',', '.', regex=False)
+    return pd.to_numeric(texto, errors='coerce').fillna(0.0).to_numpy(dtype=np.float64)
+
+
+def arbol_ecs_desde_resultados(df_final_elementos_corte, df_final_lineas, df_final_trafos):
+    """
+    Reconstruye el árbol de ECs del barrido a partir de los DataFrames de resultados.
+
+    Los nodos del árbol se identifican por su camino aguas arriba (columna 'Elementos_Aguas_Arriba',
+    que es el 'camino' de cada nodo de `_agregar_nodo_arbol`): el padre de un nodo es su camino sin
+    el último CO. Cada camino distinto se procesa una sola vez, sin importar cuántos elementos
+    cuelguen de él.
+
+    Parámetros:
+        df_final_elementos_corte (pd.DataFrame): Resultados del barrido para ECs.
+        df_final_lineas (pd.DataFrame): Resultados del barrido para líneas.
+        df_final_trafos (pd.DataFrame): Resultados del barrido para transformadores.
+
+    Retorna:
+        dict: Árbol con las llaves:
+              - 'nodos' (list) e 'indice_nodos' (pd.Index): Camino de cada nodo.
+              - 'padre' (np.ndarray): Nodo padre de cada nodo (-1 para las raíces, una por circuito).
+              - 'profundidad' (np.ndarray): Cantidad de ECs entre el nodo y su raíz.
+              - 'nodo_lineas', 'nodo_trafos', 'nodo_ecs' (np.ndarray): Nodo bajo el que cuelga cada fila
+                de los resultados (-1 si no tiene camino; en ECs, -1 para los arranques).
+              - 'nodo_propio_ecs' (np.ndarray): Nodo que origina cada EC (-1 si el barrido no lo atravesó,
+                como los ECs abiertos o de interconexión).
+    """
+    # 1. Camino de cada fila y del nodo propio de cada EC: el del arranque es su propio circuito;
+    #    el de los demás, su camino aguas arriba más su CO (solo es nodo si el barrido lo atravesó)
+    caminos_ecs = df_final_elementos_corte['Elementos_Aguas_Arriba'].astype(str)
+    es_arranque = df_final_elementos_corte['Equipo_Padre'].isna().to_numpy()
+    caminos_propios_ecs = caminos_ecs.where(
+        es_arranque, caminos_ecs + ',' + df_final_elementos_corte['CODIGO_OPERATIVO'].astype(str))
+    caminos_filas = {
+        'lineas': df_final_lineas['Elementos_Aguas_Arriba'].astype(object).where(df_final_lineas['Elementos_Aguas_Arriba'].notna(), None),
+        'trafos': df_final_trafos['Elementos_Aguas_Arriba'].astype(object).where(df_final_trafos['Elementos_Aguas_Arriba'].notna(), None),
+        'ecs': caminos_ecs.astype(object).where(~es_arranque, None),
+    }
+
+    # 2. Nodos: todos los caminos bajo los que cuelga algún elemento y sus ancestros
+    caminos = pd.unique(pd.concat([serie.dropna().astype(str) for serie in caminos_filas.values()],
+                                  ignore_index=True).to_numpy(dtype=object))
+    nodos = list(caminos)
+    nodos_vistos = set(nodos)
+    pendientes = nodos
+    while pendientes:
+        padres = {camino.rsplit(',', 1)[0] for camino in pendientes if ',' in camino}
+        pendientes = [camino for camino in padres if camino not in nodos_vistos]
+        nodos_vistos.update(pendientes)
+        nodos.extend(pendientes)
+    indice_nodos = pd.Index(nodos, dtype=object)
+    serie_nodos = pd.Series(nodos, dtype=object)
+    profundidad = serie_nodos.str.count(',').to_numpy(dtype=np.int64) if nodos else np.zeros(0, dtype=np.int64)
+    padre = indice_nodos.get_indexer(serie_nodos.str.rsplit(',', n=1).str[0].where(profundidad > 0, None)) \
+        if nodos else np.zeros(0, dtype=np.intp)
+
+    arbol = {'nodos': nodos, 'indice_nodos': indice_nodos, 'padre': padre, 'profundidad': profundidad}
+    for tabla, serie in caminos_filas.items():
+        arbol[f'nodo_{tabla}'] = indice_nodos.get_indexer(serie)
+    arbol['nodo_propio_ecs'] = indice_nodos.get_indexer(caminos_propios_ecs)
+    return arbol
+
+
+def agregar_carga_aguas_abajo(df_final_elementos_corte, df_final_lineas, df_final_trafos):
+    """
+    Calcula, para cada EC de los resultados, las líneas, trafos, ECs y la capacidad nominal aguas abajo.
+
+    Sobre el árbol de `arbol_ecs_desde_resultados`, los elementos se cuentan en el nodo bajo el
+    que cuelgan con `np.bincount` y los totales se propagan hacia la raíz en una sola pasada de
+    hojas a raíz (por niveles de profundidad), en lugar de filtrar los resultados por subcadenas
+    de 'Elementos_Aguas_Arriba' para cada EC.
+
+    Parámetros:
+        df_final_elementos_corte (pd.DataFrame): Resultados del barrido para ECs.
+        df_final_lineas (pd.DataFrame): Resultados del barrido para líneas.
+        df_final_trafos (pd.DataFrame): Resultados del barrido para transformadores
+                                        (con 'CAPACIDAD_NOMINAL' si está disponible).
+
+    Retorna:
+        pd.DataFrame: Una fila por EC (mismo índice que df_final_elementos_corte) con 'CODIGO_OPERATIVO',
+                      'Circuito_Origen_Barrido', 'Lineas_Aguas_Abajo', 'Trafos_Aguas_Abajo',
+                      'ECs_Aguas_Abajo' y 'Capacidad_Nominal_Aguas_Abajo'. Los ECs que no se atraviesan
+                      en el barrido (abiertos o de interconexión) tienen totales en 0.
+    """
+    arbol = arbol_ecs_desde_resultados(df_final_elementos_corte, df_final_lineas, df_final_trafos)
+    n_nodos = len(arbol['nodos'])
+
+    # 1. Elementos que cuelgan directamente de cada nodo
+    def contar(nodos_filas, pesos=None):
+        validos = nodos_filas >= 0
+        return np.bincount(nodos_filas[validos], weights=None if pesos is None else pesos[validos],
+                           minlength=n_nodos).astype(np.float64)
+
+    totales = {
+        'Lineas_Aguas_Abajo': contar(arbol['nodo_lineas']),
+        'Trafos_Aguas_Abajo': contar(arbol['nodo_trafos']),
+        'ECs_Aguas_Abajo': contar(arbol['nodo_ecs']),
+        'Capacidad_Nominal_Aguas_Abajo': np.zeros(n_nodos, dtype=np.float64),
+    }
+    if 'CAPACIDAD_NOMINAL' in df_final_trafos.columns:
+        totales['Capacidad_Nominal_Aguas_Abajo'] = contar(
+            arbol['nodo_trafos'], _capacidad_nominal_kva(df_final_trafos['CAPACIDAD_NOMINAL']))
+
+    # 2. Pasada de hojas a raíz: cada nivel suma sus totales (ya completos) a sus padres
+    profundidad, padre = arbol['profundidad'], arbol['padre']
+    for nivel in range(int(profundidad.max()) if n_nodos else 0, 0, -1):
+        nodos_nivel = np.flatnonzero(profundidad == nivel)
+        for valores in totales.values():
+            np.add.at(valores, padre[nodos_nivel], valores[nodos_nivel])
+
+    # 3. Totales de cada EC (0 si no es un nodo del árbol)
+    posiciones = arbol['nodo_propio_ecs']
+    resultado = pd.DataFrame({
+        'CODIGO_OPERATIVO': df_final_elementos_corte['CODIGO_OPERATIVO'],
+        'Circuito_Origen_Barrido': df_final_elementos_corte['Circuito_Origen_Barrido'],
+    }, index=df_final_elementos_corte.index)
+    for columna, valores in totales.items():
+        valores_ecs = np.where(posiciones >= 0, valores[posiciones], 0.0)
+        resultado[columna] = valores_ecs if columna == 'Capacidad_Nominal_Aguas_Abajo' else valores_ecs.astype(np.int64)
+    return resultado
+
+
 def summarize_by_circuito(df_final_elementos_corte, df_final_lineas, df_final_trafos, Equipo_Padre_bandera=True):
     """
     Generate a summary dataframe grouping by CIRCUITO, counting the number of switching elements,
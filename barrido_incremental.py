@@ -0,0 +1,372 @@
+# barrido_incremental.py
+import numpy as np
+import pandas as pd
+
+from barrido_electrico import (
+    barrido_anillos_por_secciones, barrido_conectividad_por_circuito, crear_marcas_visitados,
+    crear_resultados_barrido, indexar_resultados_por_co, materializar_resultados_barrido
+)
+from modelo_red import construir_modelo_red, construir_secciones_lineas, ESTADOS_EC
+
+# ----------------------------------------------------------
+# Barrido Incremental ante Cambios de Estado de ECs
+# ----------------------------------------------------------
+#
+# El estado guarda, por circuito, las filas materializadas de su barrido, y un índice
+# clave → circuitos que la registraron (CODIGO_OPERATIVO para ECs, G3E_FID para líneas y trafos).
+# La deduplicación de `completar_resultados_finales` conserva, por clave, la primera fila con
+# 'CIRCUITO' igual a 'Circuito_Origen_Barrido' (o la primera sin coincidencia) en el orden de los
+# circuitos, así que tras una maniobra solo se recalculan las claves que los circuitos re-barridos
+# tenían antes o tienen después; las demás filas finales no cambian.
+
+# Columna por la que la deduplicación final agrupa las filas de cada tabla
+CLAVES_DEDUPLICACION = {'ecs': 'CODIGO_OPERATIVO', 'lineas': 'G3E_FID', 'trafos': 'G3E_FID'}
+COLUMNAS_ANILLO = ['Equipo_anillo', 'Elementos_Aguas_Arriba_anillo', 'Circuito_anillo']
+# Columnas auxiliares de las filas finales: posición del circuito, fila dentro de su barrido y coincidencia
+COLUMNAS_ORDEN = ['_circuito', '_fila', '_coincidencia']
+
+def crear_estado_barrido(df_circuitos, df_elementos_corte_global, df_lineas_global, df_trafos_global):
+    """
+    Realiza el barrido completo de la red y conserva el estado necesario para actualizarlo por partes.
+
+    Cada circuito se barre de forma independiente (motor 'dfs') y se materializa por separado, de
+    modo que después de una maniobra solo se re-barren los circuitos afectados. El estado guarda además
+    el modelo codificado, las secciones de líneas del análisis de anillos, un caché de anillos
+    resueltos (solo dependen de la topología) y los resultados finales ya deduplicados.
+
+    Parámetros:
+        df_circuitos (pd.DataFrame): DataFrame con la lista de circuitos a procesar (columna 'Circuito').
+        df_elementos_corte_global (pd.DataFrame): DataFrame con todos los ECs de la red. Se copia,
+                                                  así que las maniobras no modifican el original.
+        df_lineas_global (pd.DataFrame): DataFrame con todas las líneas de la red.
+        df_trafos_global (pd.DataFrame): DataFrame con todos los transformadores de la red.
+
+    Retorna:
+        dict: Estado del barrido, para usar con `resultados_estado_barrido` y
+              `actualizar_barrido_incremental`.
+    """
+    df_ecs = df_elementos_corte_global.copy()
+    modelo_red = construir_modelo_red(df_ecs, df_lineas_global, df_trafos_global, df_circuitos)
+    estado = {
+        'df_ecs': df_ecs,
+        'df_lineas': df_lineas_global,
+        'df_trafos': df_trafos_global,
+        'modelo_red': modelo_red,
+        'secciones_lineas': construir_secciones_lineas(modelo_red),
+        'marcas_visitados': crear_marcas_visitados(modelo_red),
+        'cache_anillos': {},
+        'indice_fids_ecs': pd.Index(df_ecs['G3E_FID'].astype(str)),
+        'circuitos': df_circuitos['Circuito'].astype(str).tolist(),
+        'filas_por_circuito': [],
+        # Clave (o posición de EC, en 'pos_ecs') → posiciones de los circuitos que la registraron
+        'circuitos_por_clave': {'ecs': {}, 'lineas': {}, 'trafos': {}, 'pos_ecs': {}},
+        'resultados_finales': None,
+    }
+    for i in range(len(estado['circuitos'])):
+        estado['filas_por_circuito'].append(None)
+        _barrer_circuito_estado(estado, i)
+    _actualizar_resultados_finales(estado, None)
+    return estado
+
+
+def _claves_circuito(filas):
+    """Claves de deduplicación (y posiciones de EC) registradas por un circuito, sin repetir."""
+    return {tabla: set(pd.unique(claves).tolist()) for tabla, claves in filas['claves'].items()}
+
+
+def _barrer_circuito_estado(estado, i):
+    """
+    Barre (o re-barre) el circuito en la posición `i`, materializa sus filas y actualiza el índice de claves.
+
+    Retorna:
+        dict: Claves de cada tabla que el circuito tenía antes o tiene después del barrido.
+    """
+    indice = estado['circuitos_por_clave']
+    anteriores = estado['filas_por_circuito'][i]
+    tocadas = _claves_circuito(anteriores) if anteriores is not None else {tabla: set() for tabla in indice}
+    for tabla, claves in tocadas.items():
+        for clave in claves:
+            indice[tabla][clave].discard(i)
+            if not indice[tabla][clave]:
+                del indice[tabla][clave]
+
+    resultados_circuito = crear_resultados_barrido()
+    barrido_conectividad_por_circuito(
+        estado['circuitos'][i], estado['df_ecs'], estado['df_lineas'], estado['df_trafos'],
+        resultados_circuito, estado['modelo_red'], marcas_visitados=estado['marcas_visitados']
+    )
+    df_ecs, df_lineas, df_trafos = materializar_resultados_barrido(
+        resultados_circuito, estado['df_ecs'], estado['df_lineas'], estado['df_trafos']
+    )
+    filas = {
+        'ecs': df_ecs,
+        'lineas': df_lineas,
+        'trafos': df_trafos,
+        'claves': {
+            'ecs': df_ecs['CODIGO_OPERATIVO'].astype(str).to_numpy(dtype=object),
+            'lineas': df_lineas['G3E_FID'].astype(str).to_numpy(dtype=object),
+            'trafos': df_trafos['G3E_FID'].astype(str).to_numpy(dtype=object),
+            'pos_ecs': np.asarray(resultados_circuito['ecs']['pos'], dtype=np.int64),
+        },
+        # Primera fila por CODIGO_OPERATIVO, para el análisis de anillos
+        'indice_por_co': indexar_resultados_por_co(df_ecs),
+    }
+    estado['filas_por_circuito'][i] = filas
+    for tabla, claves in _claves_circuito(filas).items():
+        for clave in claves:
+            indice[tabla].setdefault(clave, set()).add(i)
+        tocadas[tabla] |= claves
+    return tocadas
+
+
+def _filas_candidatas(estado, tabla, claves):
+    """
+    Reúne las filas materializadas de `tabla` con alguna de las claves, de todos los circuitos que las registraron.
+
+    Si `claves` es None se toman todas las filas. Se agregan las columnas de `COLUMNAS_ORDEN`.
+    """
+    if claves is None:
+        posiciones_circuitos = range(len(estado['circuitos']))
+    else:
+        indice = estado['circuitos_por_clave'][tabla]
+        posiciones_circuitos = sorted(set().union(*(indice.get(clave, ()) for clave in claves)))
+    partes = []
+    for i in posiciones_circuitos:
+        filas = estado['filas_por_circuito'][i]
+        seleccion = np.ones(len(filas[tabla]), dtype=bool) if claves is None else \
+            pd.Index(filas['claves'][tabla]).isin(claves)
+        partes.append(filas[tabla][seleccion].assign(_circuito=i, _fila=np.flatnonzero(seleccion)))
+    if not partes:
+        # Sin filas: el mismo DataFrame vacío (con sus columnas) que materializa un barrido vacío
+        vacios = dict(zip(('ecs', 'lineas', 'trafos'), materializar_resultados_barrido(
+            crear_resultados_barrido(), estado['df_ecs'], estado['df_lineas'], estado['df_trafos'])))
+        partes.append(vacios[tabla].assign(_circuito=0, _fila=0))
+    candidatas = _concatenar_filas(partes)
+    candidatas['_coincidencia'] = (candidatas['CIRCUITO'] == candidatas['Circuito_Origen_Barrido']).astype(bool)
+    return candidatas
+
+
+def _concatenar_filas(partes):
+    """
+    Concatena DataFrames columna por columna, con un índice nuevo.
+
+    `pd.concat` sobre DataFrames con bloques distintos reemplaza por NaN los pd.NA y None de una
+    columna que en alguna parte solo tiene nulos; el resultado completo los conserva. Las columnas
+    que faltan en una parte ('EST_ESTABLE_ORIGINAL') se llenan con NaN, como en
+    `materializar_resultados_barrido`.
+    """
+    columnas = list(dict.fromkeys(col for df in partes for col in df.columns))
+    datos = {
+        col: pd.concat([df[col] if col in df.columns else pd.Series(np.nan, index=df.index, dtype=object)
+                        for df in partes], ignore_index=True)
+        for col in columnas
+    }
+    return pd.DataFrame(datos, columns=columnas)
+
+
+def _seleccionar_ganadoras(candidatas, tabla):
+    """
+    Conserva, por clave de deduplicación, la fila que deja `completar_resultados_finales`.
+
+    Es la primera fila con coincidencia de circuitos, o si no hay, la primera fila, en el orden
+    (circuito, fila) del barrido completo.
+    """
+    orden = np.lexsort((candidatas['_fila'].to_numpy(), candidatas['_circuito'].to_numpy(),
+                        ~candidatas['_coincidencia'].to_numpy(dtype=bool)))
+    candidatas = candidatas.iloc[orden]
+    claves = candidatas[CLAVES_DEDUPLICACION[tabla]].astype(str)
+    return candidatas[~claves.duplicated().to_numpy()]
+
+
+def _primeras_filas_por_co(estado, equipos):
+    """
+    Busca la primera fila del barrido completo (antes de deduplicar) para cada CODIGO_OPERATIVO de `equipos`.
+
+    Retorna:
+        pd.DataFrame: 'Elementos_Aguas_Arriba' y 'Circuito_Origen_Barrido' indexados por CODIGO_OPERATIVO,
+                      como `indexar_resultados_por_co` sobre todos los circuitos.
+    """
+    indice = estado['circuitos_por_clave']['ecs']
+    equipos_por_circuito = {}
+    for equipo in pd.unique(pd.Series(equipos, dtype=object).dropna()).tolist():
+        circuitos = indice.get(str(equipo))
+        if circuitos:
+            equipos_por_circuito.setdefault(min(circuitos), []).append(equipo)
+    partes = [estado['filas_por_circuito'][i]['indice_por_co'].reindex(equipos_circuito)
+              for i, equipos_circuito in equipos_por_circuito.items()]
+    if not partes:
+        return pd.DataFrame(columns=['Elementos_Aguas_Arriba', 'Circuito_Origen_Barrido'], dtype=object)
+    return pd.concat(partes)
+
+
+def _resolver_anillos(estado, df_ecs, verbose=False):
+    """Calcula las columnas de anillos de `df_ecs` (filas finales) igual que `completar_resultados_finales`."""
+    for columna in COLUMNAS_ANILLO:
+        df_ecs[columna] = pd.NA
+    mascara_open = (df_ecs['EST_ESTABLE'] == 'OPEN') & (df_ecs['Nodo_No_Explorado_Anillo'].notna())
+    if 'CIRCUITO' in df_ecs.columns:
+        mascara_open &= df_ecs['CIRCUITO'].isin(estado['circuitos'])
+    df_ecs_open = df_ecs[mascara_open]
+    if df_ecs_open.empty:
+        return df_ecs
+
+    # Primero el EC de cada anillo (con el caché del estado) y después sus resultados, solo para esos COs
+    sin_indice = pd.DataFrame(columns=['Elementos_Aguas_Arriba', 'Circuito_Origen_Barrido'], dtype=object)
+    df_anillos = barrido_anillos_por_secciones(
+        df_ecs_open, None, estado['modelo_red'], estado['secciones_lineas'], sin_indice, estado['cache_anillos']
+    )
+    df_anillos = df_anillos[df_anillos['Equipo_anillo'].notna()]
+    df_anillos = _completar_resultados_anillos(estado, df_anillos)
+    if verbose:
+        for index_ec_open, row_anillo in df_anillos.iterrows():
+            print(f"      Anillo encontrado para {df_ecs_open.at[index_ec_open, 'CODIGO_OPERATIVO']}: "
+                  f"Equipo={row_anillo['Equipo_anillo']}, Cto.Anillo={row_anillo['Circuito_anillo']}")
+    df_ecs.loc[df_anillos.index, COLUMNAS_ANILLO] = df_anillos[COLUMNAS_ANILLO].to_numpy()
+    return df_ecs
+
+
+def _completar_resultados_anillos(estado, df_anillos):
+    """Llena 'Elementos_Aguas_Arriba_anillo' y 'Circuito_anillo' con la primera fila del EC de cada anillo."""
+    df_anillos = df_anillos.copy()
+    indice_resultados = _primeras_filas_por_co(estado, df_anillos['Equipo_anillo'])
+    equipos = df_anillos['Equipo_anillo'].to_numpy(dtype=object)
+    for col_destino, col_origen in (('Elementos_Aguas_Arriba_anillo', 'Elementos_Aguas_Arriba'),
+                                    ('Circuito_anillo', 'Circuito_Origen_Barrido')):
+        valores = pd.Series(indice_resultados[col_origen].reindex(equipos).to_numpy(dtype=object),
+                            index=df_anillos.index, dtype=object)
+        df_anillos[col_destino] = valores.where(valores.notna(), pd.NA)
+    return df_anillos
+
+
+def _actualizar_resultados_finales(estado, claves_tocadas, verbose=False):
+    """
+    Recalcula las filas finales de las claves tocadas y las reemplaza en `estado['resultados_finales']`.
+
+    Con `claves_tocadas` None se calculan todas. Las filas de ECs que no cambian pero cuyo anillo
+    cierra en un CODIGO_OPERATIVO tocado toman de nuevo su camino y circuito de anillo.
+    """
+    anteriores = estado['resultados_finales']
+    finales = {}
+    for tabla in ('ecs', 'lineas', 'trafos'):
+        claves = None if claves_tocadas is None else claves_tocadas[tabla]
+        if claves is not None and not claves:
+            continue
+        ganadoras = _seleccionar_ganadoras(_filas_candidatas(estado, tabla, claves), tabla)
+        if tabla == 'ecs':
+            ganadoras = _resolver_anillos(estado, ganadoras.copy(), verbose)
+        if claves is None:
+            finales[tabla] = ganadoras
+            continue
+        previas = anteriores[tabla]
+        previas = previas[~previas[CLAVES_DEDUPLICACION[tabla]].astype(str).isin(claves).to_numpy()]
+        if tabla == 'ecs':
+            refrescar = previas['Equipo_anillo'].notna().to_numpy() & \
+                previas['Equipo_anillo'].astype(str).isin(claves).to_numpy()
+            if refrescar.any():
+                previas = previas.copy()
+                filas_anillo = _completar_resultados_anillos(estado, previas.loc[refrescar, COLUMNAS_ANILLO])
+                previas.loc[refrescar, COLUMNAS_ANILLO] = filas_anillo[COLUMNAS_ANILLO].to_numpy()
+        finales[tabla] = _concatenar_filas([previas, ganadoras])
+
+    # Orden e índice del barrido completo: coincidencias primero y luego la posición en la fusión de
+    # circuitos. Una tabla sin claves tocadas conserva sus filas y las de sus circuitos no cambian.
+    for tabla, df in finales.items():
+        desplazamientos = np.concatenate(
+            [[0], np.cumsum([len(filas[tabla]) for filas in estado['filas_por_circuito']])]
+        ).astype(np.int64)
+        posiciones = desplazamientos[df['_circuito'].to_numpy(dtype=np.int64)] + df['_fila'].to_numpy(dtype=np.int64)
+        orden = np.lexsort((posiciones, ~df['_coincidencia'].to_numpy(dtype=bool)))
+        df = df.iloc[orden]
+        df.index = pd.Index(posiciones[orden])
+        finales[tabla] = df
+    estado['resultados_finales'] = finales if anteriores is None else {**anteriores, **finales}
+
+
+def resultados_estado_barrido(estado):
+    """
+    Retorna los DataFrames finales (con anillos y deduplicados) guardados en el estado del barrido.
+
+    Son los mismos (filas, orden e índice) que los de `generar_dfs_resultados_finales` con los
+    estados actuales de los ECs.
+
+    Parámetros:
+        estado (dict): Estado generado por `crear_estado_barrido`.
+
+    Retorna:
+        tuple: (df_final_elementos_corte, df_final_lineas, df_final_trafos).
+    """
+    finales = estado['resultados_finales']
+    df_final_elementos_corte = finales['ecs'].drop(columns=COLUMNAS_ORDEN)
+    if df_final_elementos_corte.empty:
+        # Sin ECs no hay análisis de anillos ni deduplicación (ver `completar_resultados_finales`)
+        return df_final_elementos_corte.drop(columns=COLUMNAS_ANILLO), \
+            _filas_sin_deduplicar(estado, 'lineas'), _filas_sin_deduplicar(estado, 'trafos')
+    # La columna 'EST_ESTABLE_ORIGINAL' solo existe en los circuitos con ECs de interconexión;
+    # en el resultado completo va antes de las columnas de anillos si algún circuito la tiene
+    columnas = [col for col in df_final_elementos_corte.columns
+                if col not in COLUMNAS_ANILLO and col != 'EST_ESTABLE_ORIGINAL']
+    if any('EST_ESTABLE_ORIGINAL' in filas['ecs'].columns for filas in estado['filas_por_circuito']):
+        columnas.append('EST_ESTABLE_ORIGINAL')
+    df_final_elementos_corte = df_final_elementos_corte.reindex(columns=columnas + COLUMNAS_ANILLO)
+    return df_final_elementos_corte, finales['lineas'].drop(columns=COLUMNAS_ORDEN), \
+        finales['trafos'].drop(columns=COLUMNAS_ORDEN)
+
+
+def _filas_sin_deduplicar(estado, tabla):
+    """Filas de todos los circuitos en el orden del barrido completo, sin deduplicar."""
+    return _filas_candidatas(estado, tabla, None).drop(columns=COLUMNAS_ORDEN)
+
+
+def actualizar_barrido_incremental(estado, cambios, verbose=False):
+    """
+    Aplica cambios de EST_ESTABLE a algunos ECs y recalcula solo los circuitos y filas afectados.
+
+    Un circuito se ve afectado si su barrido registró alguno de los ECs modificados: el barrido
+    de un circuito solo consulta el estado de los ECs que alcanza, así que los demás circuitos
+    conservan sus filas. La deduplicación y el análisis de anillos se repiten solo para los
+    CODIGO_OPERATIVO y G3E_FID que los circuitos re-barridos tenían antes o tienen después del
+    cambio; los anillos ya resueltos se toman del caché del estado.
+
+    Parámetros:
+        estado (dict): Estado generado por `crear_estado_barrido` (se modifica).
+        cambios (dict or list): Nuevos estados por G3E_FID, como diccionario {G3E_FID: 'OPEN'/'CLOSED'}
+                                o lista de tuplas (G3E_FID, estado).
+        verbose (bool, optional): Si es True, imprime los anillos encontrados. Por defecto False.
+
+    Retorna:
+        tuple: (df_final_elementos_corte, df_final_lineas, df_final_trafos, circuitos_afectados),
+               donde circuitos_afectados es la lista de circuitos re-barridos.
+    """
+    pares_cambio = list(cambios.items()) if isinstance(cambios, dict) else list(cambios)
+    df_ecs, ecs = estado['df_ecs'], estado['modelo_red']['ecs']
+
+    # 1. Aplicar los nuevos estados al DataFrame y al modelo codificado
+    posiciones_cambiadas = []
+    for fid, nuevo_estado in pares_cambio:
+        posiciones = estado['indice_fids_ecs'].get_indexer_for([str(fid)])
+        posiciones = posiciones[posiciones >= 0]
+        if len(posiciones) == 0:
+            print(f"⚠️ Advertencia: El EC con G3E_FID '{fid}' no existe en la red. Cambio ignorado.")
+            continue
+        df_ecs.iloc[posiciones, df_ecs.columns.get_loc('EST_ESTABLE')] = nuevo_estado
+        estado_normalizado = str(nuevo_estado).strip().upper()
+        ecs['estado'][posiciones] = pd.Categorical([estado_normalizado], categories=ESTADOS_EC).codes[0]
+        posiciones_cambiadas.extend(posiciones.tolist())
+
+    # 2. Circuitos cuyo barrido alcanzó alguno de los ECs modificados
+    indice_pos_ecs = estado['circuitos_por_clave']['pos_ecs']
+    afectados = sorted(set().union(*(indice_pos_ecs.get(pos, ()) for pos in posiciones_cambiadas)))
+    circuitos_afectados = [estado['circuitos'][i] for i in afectados]
+
+    # 3. Re-barrer solo esos circuitos y recalcular las filas finales de las claves que tocan
+    if afectados:
+        claves_tocadas = {tabla: set() for tabla in CLAVES_DEDUPLICACION}
+        for i in afectados:
+            for tabla, claves in _barrer_circuito_estado(estado, i).items():
+                if tabla in claves_tocadas:
+                    claves_tocadas[tabla] |= claves
+        _actualizar_resultados_finales(estado, claves_tocadas, verbose)
+    print(f"🔁 Barrido incremental: {len(circuitos_afectados)} de {len(estado['circuitos'])} circuitos re-barridos.")
+
+    df_final_elementos_corte, df_final_lineas, df_final_trafos = resultados_estado_barrido(estado)
+    return df_final_elementos_corte, df_final_lineas, df_final_trafos, circuitos_afectados
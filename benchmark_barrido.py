@@ -0,0 +1,299 @@
+# benchmark_barrido.py
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+from Data_process import cargar_datos
+from barrido_electrico import generar_dfs_resultados_finales, summarize_by_circuito
+from visualizacion_grafos import construir_grafo_circuito, generar_grafo_circuito
+
+# ----------------------------------------------------------
+# Generación de Redes de Distribución Sintéticas
+# ----------------------------------------------------------
+
+# Tipos de EC (TIPO → G3E_FNO) con el mismo esquema de Data/CSV/elementos_corte.csv
+_FNO_POR_TIPO = {'I': '18800', 'S': '19300', 'C': '19400', 'P': '19700', 'R': '19800'}
+_TIPOS_EC_INTERMEDIOS = np.array(['S', 'C', 'R', 'P'])
+_PROB_TIPOS_EC_INTERMEDIOS = np.array([0.55, 0.35, 0.08, 0.02])
+_CAPACIDADES_TRAFO = np.array(['5', '10', '15', '25', '30', '37,5', '45', '75', '112,5'])
+
+
+def generar_red_sintetica(n_circuitos=20, lineas_por_circuito=500, densidad_ecs=0.1, puntos_abiertos=3,
+                          densidad_trafos=0.25, semilla=0):
+    """
+    Genera una red de distribución sintética con el esquema de los archivos de Data/CSV.
+
+    Cada circuito es un alimentador radial que parte de su interruptor de cabecera (TIPO 'I',
+    CODIGO_OPERATIVO igual al circuito). Cada tramo nuevo cuelga de uno de los nodos creados
+    recientemente (alimentadores largos con ramales cortos) y es un EC 'CLOSED' con probabilidad
+    `densidad_ecs` o una línea en caso contrario. Además, cada circuito tiene `puntos_abiertos`
+    ECs 'OPEN' que lo enlazan con el circuito siguiente (anillos), y los trafos cuelgan de
+    nodos aleatorios del alimentador.
+
+    Parámetros:
+        n_circuitos (int, optional): Cantidad de circuitos. Por defecto 20.
+        lineas_por_circuito (int, optional): Líneas por circuito. Por defecto 500.
+        densidad_ecs (float, optional): Fracción de tramos que son ECs en lugar de líneas. Por defecto 0.1.
+        puntos_abiertos (int, optional): ECs 'OPEN' de enlace por circuito. Por defecto 3.
+        densidad_trafos (float, optional): Trafos por línea. Por defecto 0.25.
+        semilla (int, optional): Semilla del generador aleatorio. Por defecto 0.
+
+    Retorna:
+        dict: DataFrames 'circuitos', 'elementos_corte', 'lineas' y 'transformadores' (columnas de texto).
+    """
+    rng = np.random.default_rng(semilla)
+    circuitos = np.array([f"{100 + i // 8}-{20 + i % 8}-" for i in range(n_circuitos)])
+    n_ecs_tramo = int(round(lineas_por_circuito * densidad_ecs / max(1e-9, 1 - densidad_ecs)))
+    n_tramos = lineas_por_circuito + n_ecs_tramo
+    ventana = 20  # Un tramo nuevo cuelga de alguno de los últimos `ventana` nodos
+
+    ecs, lineas, trafos = [], [], []
+    siguiente_nodo = 1_000_000
+    nodos_por_circuito = []
+    for i_circuito, circuito in enumerate(circuitos):
+        # Nodos del alimentador: 0 es la barra de la subestación, 1 la salida del interruptor
+        nodos = np.arange(siguiente_nodo, siguiente_nodo + n_tramos + 2)
+        siguiente_nodo += n_tramos + 2
+        nodos_por_circuito.append(nodos)
+        hijos = np.arange(2, n_tramos + 2)
+        padres = hijos - rng.integers(1, np.minimum(hijos - 1, ventana) + 1)
+
+        # Los tramos que son EC se eligen al azar; el resto son líneas
+        es_ec = np.zeros(n_tramos, dtype=bool)
+        es_ec[rng.choice(n_tramos, size=n_ecs_tramo, replace=False)] = True
+        ecs.append(pd.DataFrame({
+            'NODO1_ID': np.concatenate([[nodos[0]], nodos[padres[es_ec]]]),
+            'NODO2_ID': np.concatenate([[nodos[1]], nodos[hijos[es_ec]]]),
+            'CIRCUITO': circuito,
+            'CODIGO_OPERATIVO': None,
+            'EST_ESTABLE': 'CLOSED',
+            'TIPO': np.concatenate([['I'], rng.choice(_TIPOS_EC_INTERMEDIOS, size=n_ecs_tramo, p=_PROB_TIPOS_EC_INTERMEDIOS)]),
+        }))
+        ecs[-1].loc[0, 'CODIGO_OPERATIVO'] = circuito
+        lineas.append(pd.DataFrame({
+            'NODO1_ID': nodos[padres[~es_ec]], 'NODO2_ID': nodos[hijos[~es_ec]], 'CIRCUITO': circuito,
+        }))
+
+        # Trafos: cada uno conecta un nodo del alimentador con su propio nodo secundario
+        n_trafos = int(round(lineas_por_circuito * densidad_trafos))
+        trafos.append(pd.DataFrame({
+            'NODO1_ID': rng.choice(nodos[1:], size=n_trafos),
+            'NODO2_ID': np.arange(siguiente_nodo, siguiente_nodo + n_trafos),
+            'CIRCUITO': circuito,
+            'CAPACIDAD_NOMINAL': rng.choice(_CAPACIDADES_TRAFO, size=n_trafos),
+            'PROPIETARIO_1': rng.choice(np.array(['EDEQ', 'PARTICULAR']), size=n_trafos, p=[0.6, 0.4]),
+        }))
+        siguiente_nodo += n_trafos
+
+    # ECs 'OPEN' de enlace con el circuito siguiente
+    if n_circuitos > 1:
+        for i_circuito, circuito in enumerate(circuitos):
+            nodos_vecino = nodos_por_circuito[(i_circuito + 1) % n_circuitos]
+            ecs.append(pd.DataFrame({
+                'NODO1_ID': rng.choice(nodos_por_circuito[i_circuito][2:], size=puntos_abiertos),
+                'NODO2_ID': rng.choice(nodos_vecino[2:], size=puntos_abiertos),
+                'CIRCUITO': circuito,
+                'CODIGO_OPERATIVO': None,
+                'EST_ESTABLE': 'OPEN',
+                'TIPO': rng.choice(_TIPOS_EC_INTERMEDIOS, size=puntos_abiertos, p=_PROB_TIPOS_EC_INTERMEDIOS),
+            }))
+
+    df_ecs = pd.concat(ecs, ignore_index=True)
+    sin_co = df_ecs['CODIGO_OPERATIVO'].isna()
+    df_ecs.loc[sin_co, 'CODIGO_OPERATIVO'] = df_ecs.loc[sin_co, 'TIPO'] + '-' + pd.Series(
+        np.arange(sin_co.sum()), index=df_ecs.index[sin_co]).astype(str).str.zfill(5)
+    df_ecs.insert(0, 'G3E_FID', np.arange(30_000_000, 30_000_000 + len(df_ecs)))
+    df_ecs['G3E_FNO'] = df_ecs['TIPO'].map(_FNO_POR_TIPO)
+    df_ecs = df_ecs[['G3E_FID', 'NODO1_ID', 'NODO2_ID', 'CIRCUITO', 'CODIGO_OPERATIVO', 'G3E_FNO', 'EST_ESTABLE', 'TIPO']]
+
+    df_lineas = pd.concat(lineas, ignore_index=True)
+    df_lineas.insert(0, 'G3E_FID', np.arange(40_000_000, 40_000_000 + len(df_lineas)))
+
+    df_trafos = pd.concat(trafos, ignore_index=True)
+    df_trafos.insert(0, 'G3E_FID', np.arange(50_000_000, 50_000_000 + len(df_trafos)))
+    df_trafos.insert(1, 'CODIGO', 'SINT' + pd.Series(np.arange(len(df_trafos))).astype(str).str.zfill(6))
+    df_trafos['TENSION'] = '13.2'
+    df_trafos['COOR_GPS_LON'] = np.char.replace(np.round(rng.uniform(-75.9, -75.5, len(df_trafos)), 8).astype(str), '.', ',')
+    df_trafos['COOR_GPS_LAT'] = np.char.replace(np.round(rng.uniform(4.2, 4.7, len(df_trafos)), 8).astype(str), '.', ',')
+    df_trafos = df_trafos[['G3E_FID', 'CODIGO', 'NODO1_ID', 'NODO2_ID', 'CIRCUITO', 'CAPACIDAD_NOMINAL',
+                           'PROPIETARIO_1', 'TENSION', 'COOR_GPS_LON', 'COOR_GPS_LAT']]
+
+    df_circuitos = pd.DataFrame({'Circuito': circuitos, 'Nombre Circuito ': [f"Sintético {i + 1}" for i in range(n_circuitos)]})
+    return {
+        'circuitos': df_circuitos,
+        'elementos_corte': df_ecs.astype(str),
+        'lineas': df_lineas.astype(str),
+        'transformadores': df_trafos.astype(str),
+    }
+
+
+def escribir_red_sintetica(red, carpeta):
+    """
+    Escribe una red sintética como CSV (delimitador ';', como los archivos de Data/CSV).
+
+    Parámetros:
+        red (dict): Red generada por `generar_red_sintetica`.
+        carpeta (str): Carpeta de destino (se crea si no existe).
+
+    Retorna:
+        dict: Ruta del CSV de cada tabla.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    rutas = {}
+    for nombre, df in red.items():
+        rutas[nombre] = os.path.join(carpeta, f"{nombre}.csv")
+        df.to_csv(rutas[nombre], sep=';', index=False, encoding='utf-8-sig')
+    return rutas
+
+
+# ----------------------------------------------------------
+# Medición de Etapas
+# ----------------------------------------------------------
+
+def _medir(funcion, *args, medir_memoria=True, silencioso=True, **kwargs):
+    """
+    Ejecuta `funcion` y mide su duración y, opcionalmente, su pico de memoria.
+
+    La duración se toma de una ejecución sin tracemalloc; el pico de memoria, de una segunda
+    ejecución con tracemalloc activo (que la hace más lenta), para que no distorsione el tiempo.
+
+    Retorna:
+        tuple: (resultado, segundos, pico_mb), con pico_mb None si no se midió la memoria.
+    """
+    salida = io.StringIO() if silencioso else None
+    with contextlib.redirect_stdout(salida) if silencioso else contextlib.nullcontext():
+        inicio = time.perf_counter()
+        resultado = funcion(*args, **kwargs)
+        segundos = time.perf_counter() - inicio
+        pico_mb = None
+        if medir_memoria:
+            tracemalloc.start()
+            try:
+                funcion(*args, **kwargs)
+                pico_mb = tracemalloc.get_traced_memory()[1] / 2**20
+            finally:
+                tracemalloc.stop()
+    return resultado, segundos, pico_mb
+
+
+def benchmark_escala(n_circuitos, lineas_por_circuito, motor='dfs', max_grafos=5, medir_memoria=True,
+                     carpeta_trabajo=None, **parametros_red):
+    """
+    Genera una red sintética de una escala dada y mide las etapas principales del proceso.
+
+    Se miden `cargar_datos` (desde los CSV generados, sin caché), `generar_dfs_resultados_finales`,
+    `summarize_by_circuito` y `generar_grafo_circuito` sobre los `max_grafos` circuitos con más
+    ECs. Si el ejecutable 'dot' de Graphviz no está disponible, se mide solo la construcción de
+    la fuente DOT (`construir_grafo_circuito`).
+
+    Parámetros:
+        n_circuitos (int): Cantidad de circuitos de la red sintética.
+        lineas_por_circuito (int): Líneas por circuito.
+        motor (str, optional): Motor de `generar_dfs_resultados_finales`. Por defecto 'dfs'.
+        max_grafos (int, optional): Circuitos cuyo grafo se genera. Por defecto 5.
+        medir_memoria (bool, optional): Si es True, mide el pico de memoria de cada etapa. Por defecto True.
+        carpeta_trabajo (str, optional): Carpeta para los CSV y SVG. Si es None se usa una carpeta temporal.
+        **parametros_red: Parámetros adicionales de `generar_red_sintetica`.
+
+    Retorna:
+        list: Un diccionario por etapa con 'etapa', 'elementos', 'segundos', 'elementos_por_s' y 'pico_mb'.
+    """
+    carpeta_temporal = None
+    if carpeta_trabajo is None:
+        carpeta_temporal = tempfile.mkdtemp(prefix='benchmark_barrido_')
+        carpeta_trabajo = carpeta_temporal
+    try:
+        red = generar_red_sintetica(n_circuitos, lineas_por_circuito, **parametros_red)
+        rutas = escribir_red_sintetica(red, os.path.join(carpeta_trabajo, 'datos'))
+        n_elementos = sum(len(red[t]) for t in ('elementos_corte', 'lineas', 'transformadores'))
+        filas = []
+
+        def registrar(etapa, elementos, segundos, pico_mb):
+            filas.append({
+                'circuitos': n_circuitos, 'lineas_por_circuito': lineas_por_circuito, 'motor': motor,
+                'etapa': etapa, 'elementos': elementos, 'segundos': round(segundos, 4),
+                'elementos_por_s': round(elementos / segundos) if segundos > 0 else None,
+                'pico_mb': None if pico_mb is None else round(pico_mb, 1),
+            })
+
+        datos, segundos, pico = _medir(
+            cargar_datos, rutas['circuitos'], rutas['elementos_corte'], rutas['lineas'], rutas['transformadores'],
+            ['csv'] * 4, medir_memoria=medir_memoria
+        )
+        registrar('cargar_datos', n_elementos, segundos, pico)
+
+        (df_res_ecs, df_res_lineas, df_res_trafos), segundos, pico = _medir(
+            generar_dfs_resultados_finales, *datos, motor=motor, medir_memoria=medir_memoria
+        )
+        registrar('generar_dfs_resultados_finales', n_elementos, segundos, pico)
+
+        _, segundos, pico = _medir(
+            summarize_by_circuito, df_res_ecs, df_res_lineas, df_res_trafos, medir_memoria=medir_memoria
+        )
+        registrar('summarize_by_circuito', len(df_res_ecs) + len(df_res_lineas) + len(df_res_trafos), segundos, pico)
+
+        # Grafos de los circuitos con más ECs
+        circuitos_grafo = df_res_ecs['Circuito_Origen_Barrido'].value_counts().index[:max_grafos]
+        grupos = [g for c, g in df_res_ecs.groupby('Circuito_Origen_Barrido', sort=False) if c in set(circuitos_grafo)]
+        carpeta_grafos = os.path.join(carpeta_trabajo, 'grafos')
+        if shutil.which('dot'):
+            def generar_grafos():
+                for df_circuito in grupos:
+                    generar_grafo_circuito(df_circuito, df_circuito['Circuito_Origen_Barrido'].iat[0],
+                                           carpeta_grafos, usar_cache=False)
+            etapa_grafos = 'generar_grafo_circuito'
+        else:
+            def generar_grafos():
+                for df_circuito in grupos:
+                    construir_grafo_circuito(df_circuito, df_circuito['Circuito_Origen_Barrido'].iat[0])
+            etapa_grafos = 'construir_grafo_circuito (sin Graphviz)'
+        _, segundos, pico = _medir(generar_grafos, medir_memoria=medir_memoria)
+        registrar(etapa_grafos, sum(len(g) for g in grupos), segundos, pico)
+        return filas
+    finally:
+        if carpeta_temporal is not None:
+            shutil.rmtree(carpeta_temporal, ignore_errors=True)
+
+
+def ejecutar_benchmark(escalas, motores=('dfs',), **opciones):
+    """
+    Ejecuta `benchmark_escala` para cada combinación de escala y motor.
+
+    Parámetros:
+        escalas (list): Tuplas (n_circuitos, lineas_por_circuito).
+        motores (tuple, optional): Motores de barrido a medir. Por defecto ('dfs',).
+        **opciones: Parámetros adicionales de `benchmark_escala` y `generar_red_sintetica`.
+
+    Retorna:
+        pd.DataFrame: Una fila por escala, motor y etapa.
+    """
+    filas = []
+    for n_circuitos, lineas_por_circuito in escalas:
+        for motor in motores:
+            print(f"⏱️ Escala {n_circuitos} circuitos x {lineas_por_circuito} líneas (motor '{motor}')...")
+            filas.extend(benchmark_escala(n_circuitos, lineas_por_circuito, motor=motor, **opciones))
+    return pd.DataFrame(filas)
+
+
+# ----------------------------------------------------------
+# Configuración y Ejecución del Benchmark
+# ----------------------------------------------------------
+if __name__ == "__main__":
+    # Escalas (circuitos, líneas por circuito); EDEQ tiene ~65 circuitos y ~40.000 líneas
+    escalas_benchmark = [(10, 500), (65, 600), (100, 2000)]
+    motores_benchmark = ('dfs', 'bfs')
+    medir_memoria_benchmark = True # Repite cada etapa con tracemalloc para medir su pico de memoria
+    ruta_resultados_benchmark = "Reports/benchmark_barrido.csv"
+
+    df_benchmark = ejecutar_benchmark(escalas_benchmark, motores_benchmark, medir_memoria=medir_memoria_benchmark)
+    with pd.option_context('display.max_rows', None, 'display.width', 200):
+        print(df_benchmark)
+    os.makedirs(os.path.dirname(ruta_resultados_benchmark), exist_ok=True)
+    df_benchmark.to_csv(ruta_resultados_benchmark, sep=';', index=False)
+    print(f"✅ Resultados del benchmark guardados en '{ruta_resultados_benchmark}'.")
@@ -0,0 +1,196 @@
+# contingencias_n1.py
+import concurrent.futures
+import multiprocessing
+import os
+import numpy as np
+import pandas as pd
+
+from barrido_electrico import _capacidad_nominal_kva
+from indice_aguas_abajo import construir_indice_aguas_abajo
+
+# ----------------------------------------------------------
+# Análisis de Contingencias N-1 (Apertura de un EC)
+# ----------------------------------------------------------
+#
+# Todas las contingencias se calculan sobre un solo barrido: al abrir un EC 'CLOSED' quedan sin
+# servicio los elementos de su subárbol, que en el índice de intervalos (`indice_aguas_abajo.py`)
+# son un bloque contiguo. Cada enlace 'OPEN' con anillo une el nodo del que cuelga el EC abierto
+# con el nodo aguas arriba del EC que cierra el anillo ('Elementos_Aguas_Arriba_anillo'), y puede
+# restablecer el subárbol si exactamente uno de esos dos nodos queda dentro de él.
+
+def _enlaces_anillo(df_final_elementos_corte, indice):
+    """
+    Extrae los enlaces 'OPEN' con anillo y los ordena por la marca de entrada de cada extremo.
+
+    Un extremo sin nodo en el árbol recibe la marca -1, que queda fuera de todo subárbol.
+    """
+    con_anillo = (df_final_elementos_corte['EST_ESTABLE'] == 'OPEN').to_numpy() & \
+        df_final_elementos_corte['Equipo_anillo'].notna().to_numpy() & \
+        df_final_elementos_corte['Elementos_Aguas_Arriba_anillo'].notna().to_numpy()
+    nodo_cercano = indice['ecs']['nodo_filas']
+    filas = np.flatnonzero(con_anillo & (nodo_cercano >= 0))
+    nodo_lejano = np.array([
+        indice['posicion_nodos'].get(camino, -1)
+        for camino in df_final_elementos_corte['Elementos_Aguas_Arriba_anillo'].iloc[filas].astype(str).tolist()
+    ], dtype=np.int64)
+
+    entrada = indice['entrada']
+    entrada_cercana = entrada[nodo_cercano[filas]]
+    entrada_lejana = np.where(nodo_lejano >= 0, entrada[np.maximum(nodo_lejano, 0)], -1)
+    orden_cercano = np.argsort(entrada_cercana, kind='stable')
+    orden_lejano = np.argsort(entrada_lejana, kind='stable')
+    return {
+        'filas': filas,
+        'entrada_cercana': entrada_cercana,
+        'entrada_lejana': entrada_lejana,
+        'orden_cercano': orden_cercano,
+        'cercanas_ordenadas': entrada_cercana[orden_cercano],
+        'orden_lejano': orden_lejano,
+        'lejanas_ordenadas': entrada_lejana[orden_lejano],
+    }
+
+
+def _enlaces_restauracion(enlaces, entradas, salidas):
+    """
+    Busca, para cada intervalo [entrada, salida] de un subárbol, los enlaces con un solo extremo dentro.
+
+    Retorna:
+        list: Por cada subárbol, una tupla (enlaces_lado_cercano, enlaces_lado_lejano) de posiciones en
+              `enlaces['filas']`: en los primeros el EC 'OPEN' queda sin servicio y la fuente alterna es el
+              circuito del anillo; en los segundos es al revés.
+    """
+    resultado = []
+    for inicio_sub, fin_sub in zip(entradas.tolist(), salidas.tolist()):
+        por_lado = []
+        for llave_orden, llave_ordenadas, llave_otro in (('orden_cercano', 'cercanas_ordenadas', 'entrada_lejana'),
+                                                         ('orden_lejano', 'lejanas_ordenadas', 'entrada_cercana')):
+            ordenadas = enlaces[llave_ordenadas]
+            inicio = np.searchsorted(ordenadas, inicio_sub, side='left')
+            fin = np.searchsorted(ordenadas, fin_sub, side='right')
+            candidatos = enlaces[llave_orden][inicio:fin]
+            otro_extremo = enlaces[llave_otro][candidatos]
+            por_lado.append(np.sort(candidatos[(otro_extremo < inicio_sub) | (otro_extremo > fin_sub)]))
+        resultado.append(tuple(por_lado))
+    return resultado
+
+
+# Enlaces de anillo disponibles en cada proceso trabajador del análisis en paralelo
+_ENLACES_WORKER = None
+
+def _inicializar_worker_contingencias(enlaces):
+    """Guarda los enlaces de anillo en el proceso trabajador (se hereda sin copia con 'fork')."""
+    global _ENLACES_WORKER
+    _ENLACES_WORKER = enlaces
+
+
+def _enlaces_restauracion_worker(lote):
+    """Resuelve un lote (entradas, salidas) de subárboles en un proceso trabajador."""
+    return _enlaces_restauracion(_ENLACES_WORKER, *lote)
+
+
+def analizar_contingencias_n1(df_final_elementos_corte, df_final_lineas, df_final_trafos, indice=None,
+                              n_procesos=1, incluir_fids_trafos=False):
+    """
+    Calcula, para cada EC 'CLOSED' de los resultados, el efecto de abrirlo y si un anillo puede restablecerlo.
+
+    Reutiliza el árbol y los anillos de un solo barrido (`generar_dfs_resultados_finales`): los elementos
+    sin servicio se cuentan con búsquedas binarias y sumas acumuladas sobre el índice de intervalos, y los
+    enlaces de restauración de cada EC se filtran del bloque de enlaces de su subárbol. No se tiene en
+    cuenta la capacidad del circuito que recibe la carga.
+
+    Para el interruptor de cabecera (CODIGO_OPERATIVO igual al circuito) se cuenta todo el circuito sin
+    servicio, aunque un nuevo barrido con ese EC 'OPEN' no pierda nada: el barrido siempre arranca en el
+    NODO2 de la cabecera sin mirar su estado.
+
+    Parámetros:
+        df_final_elementos_corte (pd.DataFrame): Resultados del barrido para ECs (con las columnas de anillos).
+        df_final_lineas (pd.DataFrame): Resultados del barrido para líneas.
+        df_final_trafos (pd.DataFrame): Resultados del barrido para transformadores.
+        indice (dict, optional): Índice de `construir_indice_aguas_abajo` sobre los mismos resultados.
+                                 Si es None se construye aquí.
+        n_procesos (int, optional): Procesos para buscar los enlaces de restauración: 1 = secuencial,
+                                    None = todos los núcleos disponibles. Por defecto 1.
+        incluir_fids_trafos (bool, optional): Si es True, agrega 'Trafos_Afectados' con los G3E_FID de los
+                                              trafos sin servicio separados por coma. Por defecto False.
+
+    Retorna:
+        pd.DataFrame: Una fila por EC 'CLOSED' con 'CODIGO_OPERATIVO', 'G3E_FID', 'Circuito_Origen_Barrido',
+                      'Lineas_Sin_Servicio', 'Trafos_Sin_Servicio', 'Capacidad_Nominal_Sin_Servicio',
+                      'Enlaces_Restauracion' y 'Circuitos_Restauracion' (separados por coma), 'Restaurable'
+                      y 'Trafos_Sin_Restauracion' (trafos sin servicio si no hay enlace de restauración).
+    """
+    if indice is None:
+        indice = construir_indice_aguas_abajo(df_final_elementos_corte, df_final_lineas, df_final_trafos)
+
+    # 1. ECs 'CLOSED' y el intervalo de su subárbol (los que no originan un nodo no afectan elementos)
+    filas_closed = np.flatnonzero((df_final_elementos_corte['EST_ESTABLE'] == 'CLOSED').to_numpy())
+    df_closed = df_final_elementos_corte.iloc[filas_closed]
+    nodos = indice['nodo_cos'][filas_closed]
+    con_nodo = nodos >= 0
+    entradas = np.where(con_nodo, indice['entrada'][np.maximum(nodos, 0)], 0)
+    salidas = np.where(con_nodo, indice['salida'][np.maximum(nodos, 0)], -1)  # Intervalo vacío sin nodo
+
+    # 2. Elementos sin servicio: bloques del índice, contados con búsquedas binarias en bloque
+    def rangos(tabla):
+        ordenadas = indice[tabla]['entradas_ordenadas']
+        inicio = np.searchsorted(ordenadas, entradas, side='left')
+        fin = np.maximum(np.searchsorted(ordenadas, salidas, side='right'), inicio)
+        return inicio, fin
+
+    inicio_lineas, fin_lineas = rangos('lineas')
+    inicio_trafos, fin_trafos = rangos('trafos')
+    capacidad_acumulada = np.zeros(len(indice['trafos']['orden']) + 1, dtype=np.float64)
+    if 'CAPACIDAD_NOMINAL' in df_final_trafos.columns:
+        capacidades = _capacidad_nominal_kva(df_final_trafos['CAPACIDAD_NOMINAL'])
+        np.cumsum(capacidades[indice['trafos']['orden']], out=capacidad_acumulada[1:])
+
+    # 3. Enlaces de restauración, por lotes de ECs (en paralelo si se pide)
+    enlaces = _enlaces_anillo(df_final_elementos_corte, indice)
+    n_procesos = n_procesos or os.cpu_count() or 1
+    if n_procesos > 1 and len(filas_closed) > 0:
+        limites = np.linspace(0, len(filas_closed), 4 * n_procesos + 1).astype(np.int64)
+        lotes = [(entradas[a:b], salidas[a:b]) for a, b in zip(limites[:-1], limites[1:])]
+        metodos_inicio = multiprocessing.get_all_start_methods()
+        contexto = multiprocessing.get_context('fork' if 'fork' in metodos_inicio else None)
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=n_procesos,
+            mp_context=contexto,
+            initializer=_inicializar_worker_contingencias,
+            initargs=(enlaces,)
+        ) as executor:
+            enlaces_por_ec = [par for lote in executor.map(_enlaces_restauracion_worker, lotes) for par in lote]
+    else:
+        enlaces_por_ec = _enlaces_restauracion(enlaces, entradas, salidas)
+
+    # 4. Tabla de resultados
+    filas_enlaces = enlaces['filas']
+    cos_enlaces = df_final_elementos_corte['CODIGO_OPERATIVO'].astype(str).to_numpy(dtype=object)[filas_enlaces]
+    circuitos_anillo = df_final_elementos_corte['Circuito_anillo'].astype(str).to_numpy(dtype=object)[filas_enlaces]
+    circuitos_origen = df_final_elementos_corte['Circuito_Origen_Barrido'].astype(str).to_numpy(dtype=object)[filas_enlaces]
+    enlaces_restauracion, circuitos_restauracion = [], []
+    for lado_cercano, lado_lejano in enlaces_por_ec:
+        posiciones = np.concatenate([lado_cercano, lado_lejano])
+        orden = np.argsort(posiciones, kind='stable')
+        alternos = np.concatenate([circuitos_anillo[lado_cercano], circuitos_origen[lado_lejano]])[orden]
+        enlaces_restauracion.append(','.join(cos_enlaces[posiciones[orden]].tolist()))
+        circuitos_restauracion.append(','.join(pd.unique(alternos).tolist()))
+
+    trafos_sin_servicio = fin_trafos - inicio_trafos
+    restaurable = np.array([len(enlaces_ec) > 0 for enlaces_ec in enlaces_restauracion], dtype=bool)
+    resultado = pd.DataFrame({
+        'CODIGO_OPERATIVO': df_closed['CODIGO_OPERATIVO'].to_numpy(),
+        'G3E_FID': df_closed['G3E_FID'].to_numpy(),
+        'Circuito_Origen_Barrido': df_closed['Circuito_Origen_Barrido'].to_numpy(),
+        'Lineas_Sin_Servicio': (fin_lineas - inicio_lineas).astype(np.int64),
+        'Trafos_Sin_Servicio': trafos_sin_servicio.astype(np.int64),
+        'Capacidad_Nominal_Sin_Servicio': capacidad_acumulada[fin_trafos] - capacidad_acumulada[inicio_trafos],
+        'Enlaces_Restauracion': enlaces_restauracion,
+        'Circuitos_Restauracion': circuitos_restauracion,
+        'Restaurable': restaurable,
+        'Trafos_Sin_Restauracion': np.where(restaurable, 0, trafos_sin_servicio).astype(np.int64),
+    }, index=df_closed.index)
+    if incluir_fids_trafos:
+        fids_ordenados = indice['trafos']['fids_ordenados']
+        resultado['Trafos_Afectados'] = [','.join(fids_ordenados[a:b].tolist())
+                                         for a, b in zip(inicio_trafos.tolist(), fin_trafos.tolist())]
+    return resultado
@@ -0,0 +1,189 @@
+# indice_aguas_abajo.py
+import numpy as np
+
+from barrido_electrico import arbol_ecs_desde_resultados
+
+# Tablas de resultados indexadas (llaves de `arbol_ecs_desde_resultados`: 'nodo_<tabla>')
+TABLAS_INDICE = ('ecs', 'lineas', 'trafos')
+
+# ----------------------------------------------------------
+# Índice de Intervalos (Recorrido de Euler) sobre el Árbol de ECs
+# ----------------------------------------------------------
+#
+# Cada nodo del árbol de ECs recibe una marca de entrada (`entrada`, su posición en preorden) y
+# de salida (`salida`, la mayor entrada de su subárbol). Un nodo v está aguas abajo de u si y solo
+# si entrada[u] <= entrada[v] <= salida[u], y los elementos de cada tabla, ordenados por la entrada
+# del nodo del que cuelgan, forman para cada EC un bloque contiguo que se ubica con dos búsquedas
+# binarias.
+
+def _posiciones_por_valor(valores):
+    """Diccionario valor → posición de su primera fila (las consultas no pasan por pandas)."""
+    return dict(zip(valores[::-1], range(len(valores) - 1, -1, -1)))
+
+
+def _marcas_euler(padre):
+    """Calcula las marcas de entrada (preorden) y salida (mayor entrada del subárbol) de cada nodo."""
+    n_nodos = len(padre)
+    entrada = np.full(n_nodos, -1, dtype=np.int64)
+    if n_nodos == 0:
+        return entrada, entrada.copy()
+
+    # Hijos de cada nodo en formato CSR (los hijos conservan el orden de aparición)
+    es_hijo = padre >= 0
+    hijos = np.flatnonzero(es_hijo)
+    hijos = hijos[np.argsort(padre[hijos], kind='stable')]
+    inicio_hijos = np.zeros(n_nodos + 1, dtype=np.int64)
+    np.cumsum(np.bincount(padre[es_hijo], minlength=n_nodos), out=inicio_hijos[1:])
+
+    # Recorrido en preorden iterativo desde cada raíz
+    siguiente = 0
+    pila = np.flatnonzero(~es_hijo)[::-1].tolist()
+    while pila:
+        nodo = pila.pop()
+        entrada[nodo] = siguiente
+        siguiente += 1
+        pila.extend(hijos[inicio_hijos[nodo]:inicio_hijos[nodo + 1]][::-1].tolist())
+
+    # Salida: de hojas a raíz, cada nodo propaga a su padre la mayor entrada de su subárbol
+    salida = entrada.copy()
+    orden = np.argsort(entrada)[::-1]
+    salida_lista, padre_lista = salida.tolist(), padre.tolist()
+    for nodo in orden.tolist():
+        p = padre_lista[nodo]
+        if p >= 0 and salida_lista[nodo] > salida_lista[p]:
+            salida_lista[p] = salida_lista[nodo]
+    return entrada, np.asarray(salida_lista, dtype=np.int64)
+
+
+def construir_indice_aguas_abajo(df_final_elementos_corte, df_final_lineas, df_final_trafos):
+    """
+    Construye el índice de intervalos para consultar elementos aguas abajo de un EC.
+
+    Parámetros:
+        df_final_elementos_corte (pd.DataFrame): Resultados del barrido para ECs.
+        df_final_lineas (pd.DataFrame): Resultados del barrido para líneas.
+        df_final_trafos (pd.DataFrame): Resultados del barrido para transformadores.
+
+    Retorna:
+        dict: Índice con las llaves:
+              - 'entrada', 'salida' (np.ndarray): Marcas de cada nodo del árbol.
+              - 'nodos' (list) y 'posicion_nodos' (dict camino → nodo): Camino ('Elementos_Aguas_Arriba')
+                de cada nodo.
+              - 'posicion_cos' (dict CO → fila) y 'nodo_cos' (np.ndarray): Nodo que origina cada EC.
+              - Por cada tabla de `TABLAS_INDICE`, un dict con 'posicion_fids' (dict G3E_FID → fila), 'nodo_filas',
+                'orden' (posiciones de las filas ordenadas por la entrada de su nodo),
+                'entradas_ordenadas' y 'fids_ordenados'.
+    """
+    arbol = arbol_ecs_desde_resultados(df_final_elementos_corte, df_final_lineas, df_final_trafos)
+    entrada, salida = _marcas_euler(arbol['padre'])
+    indice = {
+        'entrada': entrada,
+        'salida': salida,
+        'nodos': arbol['nodos'],
+        'posicion_nodos': dict(zip(arbol['nodos'], range(len(arbol['nodos'])))),
+        'posicion_cos': _posiciones_por_valor(df_final_elementos_corte['CODIGO_OPERATIVO'].astype(str).tolist()),
+        'nodo_cos': arbol['nodo_propio_ecs'],
+    }
+    dfs_tablas = {'ecs': df_final_elementos_corte, 'lineas': df_final_lineas, 'trafos': df_final_trafos}
+    for tabla in TABLAS_INDICE:
+        nodo_filas = arbol[f'nodo_{tabla}']
+        fids = dfs_tablas[tabla]['G3E_FID'].astype(str).to_numpy(dtype=object)
+        filas_con_nodo = np.flatnonzero(nodo_filas >= 0)
+        entradas_filas = entrada[nodo_filas[filas_con_nodo]]
+        orden = filas_con_nodo[np.argsort(entradas_filas, kind='stable')]
+        indice[tabla] = {
+            'posicion_fids': _posiciones_por_valor(fids.tolist()),
+            'nodo_filas': nodo_filas,
+            'orden': orden,
+            'entradas_ordenadas': entrada[nodo_filas[orden]],
+            'fids_ordenados': fids[orden],
+        }
+    return indice
+
+
+def _nodo_ec(indice, codigo_operativo):
+    """Retorna el nodo del árbol que origina el EC, o -1 si el CO no existe o el barrido no lo atravesó."""
+    posicion = indice['posicion_cos'].get(str(codigo_operativo), -1)
+    return int(indice['nodo_cos'][posicion]) if posicion >= 0 else -1
+
+
+def rango_aguas_abajo(indice, codigo_operativo, tabla='trafos'):
+    """
+    Ubica el bloque de elementos de una tabla que están aguas abajo de un EC.
+
+    Parámetros:
+        indice (dict): Índice generado por `construir_indice_aguas_abajo`.
+        codigo_operativo (str): CO del EC.
+        tabla (str, optional): 'ecs', 'lineas' o 'trafos'. Por defecto 'trafos'.
+
+    Retorna:
+        tuple: (inicio, fin) dentro de indice[tabla]['orden'] / ['fids_ordenados']; (0, 0) si el EC
+               no existe o no origina un nodo del árbol (ej. un EC abierto).
+    """
+    nodo = _nodo_ec(indice, codigo_operativo)
+    if nodo < 0:
+        return 0, 0
+    entradas = indice[tabla]['entradas_ordenadas']
+    inicio = int(np.searchsorted(entradas, indice['entrada'][nodo], side='left'))
+    fin = int(np.searchsorted(entradas, indice['salida'][nodo], side='right'))
+    return inicio, fin
+
+
+def elementos_aguas_abajo(indice, codigo_operativo, tabla='trafos'):
+    """
+    Retorna los G3E_FID de los elementos de una tabla aguas abajo de un EC.
+
+    El resultado es una vista (sin copia) de indice[tabla]['fids_ordenados']. Para obtener las filas
+    de los resultados, use `posiciones_aguas_abajo` con `DataFrame.iloc`.
+
+    Parámetros:
+        indice (dict): Índice generado por `construir_indice_aguas_abajo`.
+        codigo_operativo (str): CO del EC.
+        tabla (str, optional): 'ecs', 'lineas' o 'trafos'. Por defecto 'trafos'.
+
+    Retorna:
+        np.ndarray: G3E_FID (texto) de los elementos aguas abajo.
+    """
+    inicio, fin = rango_aguas_abajo(indice, codigo_operativo, tabla)
+    return indice[tabla]['fids_ordenados'][inicio:fin]
+
+
+def posiciones_aguas_abajo(indice, codigo_operativo, tabla='trafos'):
+    """
+    Retorna las posiciones (para `iloc`) de las filas de los resultados aguas abajo de un EC.
+
+    Parámetros:
+        indice (dict): Índice generado por `construir_indice_aguas_abajo`.
+        codigo_operativo (str): CO del EC.
+        tabla (str, optional): 'ecs', 'lineas' o 'trafos'. Por defecto 'trafos'.
+
+    Retorna:
+        np.ndarray: Posiciones de las filas en el DataFrame de resultados de la tabla.
+    """
+    inicio, fin = rango_aguas_abajo(indice, codigo_operativo, tabla)
+    return indice[tabla]['orden'][inicio:fin]
+
+
+def esta_aguas_abajo(indice, fid, codigo_operativo, tabla='trafos'):
+    """
+    Indica si un elemento se alimenta a través de un EC (está en su subárbol).
+
+    Un EC no está aguas abajo de sí mismo.
+
+    Parámetros:
+        indice (dict): Índice generado por `construir_indice_aguas_abajo`.
+        fid (str): G3E_FID del elemento.
+        codigo_operativo (str): CO del EC.
+        tabla (str, optional): Tabla del elemento: 'ecs', 'lineas' o 'trafos'. Por defecto 'trafos'.
+
+    Retorna:
+        bool: True si el elemento está aguas abajo del EC.
+    """
+    nodo = _nodo_ec(indice, codigo_operativo)
+    posicion = indice[tabla]['posicion_fids'].get(str(fid), -1)
+    if nodo < 0 or posicion < 0:
+        return False
+    nodo_elemento = indice[tabla]['nodo_filas'][posicion]
+    if nodo_elemento < 0:
+        return False
+    return bool(indice['entrada'][nodo] <= indice['entrada'][nodo_elemento] <= indice['salida'][nodo])
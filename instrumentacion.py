@@ -0,0 +1,203 @@
+# instrumentacion.py
+import contextlib
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+# ----------------------------------------------------------
+# Instrumentación de Etapas del Proceso
+# ----------------------------------------------------------
+#
+# Las funciones del proceso reciben un parámetro opcional `instrumentacion` (None por defecto).
+# Con None, `medir_etapa` y las demás funciones no hacen nada, así que el costo sin instrumentar
+# es despreciable.
+
+def crear_instrumentacion(perfil_cpu=False, perfil_memoria=False, lineas_perfil=30):
+    """
+    Crea el registro de instrumentación de una ejecución.
+
+    Parámetros:
+        perfil_cpu (bool, optional): Si es True, `iniciar_perfiles` activa cProfile. Por defecto False.
+        perfil_memoria (bool, optional): Si es True, `iniciar_perfiles` activa tracemalloc
+                                         (pico de memoria y principales asignaciones). Por defecto False.
+        lineas_perfil (int, optional): Funciones (o líneas de asignación) incluidas en el reporte
+                                       de cada perfil. Por defecto 30.
+
+    Retorna:
+        dict: Registro para `medir_etapa`, `registrar_circuito` y `guardar_reporte_instrumentacion`.
+    """
+    return {
+        'inicio': time.perf_counter(),
+        'etapas': [],
+        'contadores': {},
+        'circuitos': {},
+        'bloqueo': threading.Lock(),  # Las cargas de fuentes y los renders corren en hilos
+        'perfil_cpu': cProfile.Profile() if perfil_cpu else None,
+        'perfil_memoria': perfil_memoria,
+        'lineas_perfil': lineas_perfil,
+        'perfiles': {},
+    }
+
+
+def registrar_etapa(instrumentacion, nombre, segundos, **detalles):
+    """
+    Registra la duración de una etapa. Los nombres jerárquicos usan '/' (ej. 'carga/lineas/lectura').
+
+    Parámetros:
+        instrumentacion (dict): Registro de `crear_instrumentacion`, o None.
+        nombre (str): Nombre de la etapa.
+        segundos (float): Duración de la etapa.
+        **detalles: Valores adicionales serializables a JSON (ej. filas=1000).
+    """
+    if instrumentacion is None:
+        return
+    etapa = {'etapa': nombre, 'segundos': round(segundos, 6), **detalles}
+    with instrumentacion['bloqueo']:
+        instrumentacion['etapas'].append(etapa)
+
+
+@contextlib.contextmanager
+def medir_etapa(instrumentacion, nombre, **detalles):
+    """
+    Mide la duración del bloque `with` y la registra como una etapa (ver `registrar_etapa`).
+
+    Parámetros:
+        instrumentacion (dict): Registro de `crear_instrumentacion`, o None para no medir.
+        nombre (str): Nombre de la etapa.
+        **detalles: Valores adicionales de la etapa.
+    """
+    if instrumentacion is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar_etapa(instrumentacion, nombre, time.perf_counter() - inicio, **detalles)
+
+
+def _acumular(destino, valores):
+    """Suma los valores en el destino; las llaves que empiezan por 'max_' conservan el máximo."""
+    for llave, valor in valores.items():
+        if llave.startswith('max_'):
+            destino[llave] = max(destino.get(llave, valor), valor)
+        else:
+            destino[llave] = destino.get(llave, 0) + valor
+
+
+def registrar_circuito(instrumentacion, circuito, **valores):
+    """
+    Acumula tiempos y contadores de un circuito, y los suma también a los contadores globales.
+
+    Parámetros:
+        instrumentacion (dict): Registro de `crear_instrumentacion`, o None.
+        circuito (str): Código del circuito.
+        **valores: Nombre → valor numérico (ej. barrido_s=0.01, nodos_explorados=120).
+    """
+    if instrumentacion is None:
+        return
+    with instrumentacion['bloqueo']:
+        _acumular(instrumentacion['circuitos'].setdefault(str(circuito), {}), valores)
+        _acumular(instrumentacion['contadores'], {k: v for k, v in valores.items() if not k.endswith('_s')})
+
+
+# ----------------------------------------------------------
+# Perfiles de CPU (cProfile) y Memoria (tracemalloc)
+# ----------------------------------------------------------
+
+def iniciar_perfiles(instrumentacion):
+    """Activa los perfiles pedidos en `crear_instrumentacion` (no hace nada con None)."""
+    if instrumentacion is None:
+        return
+    if instrumentacion['perfil_memoria'] and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if instrumentacion['perfil_cpu'] is not None:
+        instrumentacion['perfil_cpu'].enable()
+
+
+def detener_perfiles(instrumentacion):
+    """
+    Detiene los perfiles activos y guarda su resumen en el registro.
+
+    El perfil de CPU solo cubre el hilo que llamó `iniciar_perfiles`; el trabajo hecho en hilos
+    o procesos auxiliares aparece en el perfil como esperas.
+    """
+    if instrumentacion is None:
+        return
+    n_lineas = instrumentacion['lineas_perfil']
+    perfil_cpu = instrumentacion['perfil_cpu']
+    if perfil_cpu is not None:
+        perfil_cpu.disable()
+        salida = io.StringIO()
+        pstats.Stats(perfil_cpu, stream=salida).sort_stats('cumulative').print_stats(n_lineas)
+        instrumentacion['perfiles']['cpu'] = salida.getvalue().splitlines()
+    if instrumentacion['perfil_memoria'] and tracemalloc.is_tracing():
+        actual, pico = tracemalloc.get_traced_memory()
+        principales = tracemalloc.take_snapshot().statistics('lineno')[:n_lineas]
+        tracemalloc.stop()
+        instrumentacion['perfiles']['memoria'] = {
+            'actual_mb': round(actual / 2**20, 2),
+            'pico_mb': round(pico / 2**20, 2),
+            'principales_asignaciones': [str(estadistica) for estadistica in principales],
+        }
+
+
+# ----------------------------------------------------------
+# Reporte
+# ----------------------------------------------------------
+
+def reporte_instrumentacion(instrumentacion, circuitos_mas_lentos=20):
+    """
+    Construye el reporte de la ejecución.
+
+    Parámetros:
+        instrumentacion (dict): Registro de `crear_instrumentacion`.
+        circuitos_mas_lentos (int, optional): Circuitos listados en 'circuitos_mas_lentos', ordenados
+                                              por su tiempo de barrido. Por defecto 20.
+
+    Retorna:
+        dict: Reporte con 'total_s', 'etapas', 'contadores', 'circuitos', 'circuitos_mas_lentos' y 'perfiles'.
+    """
+    with instrumentacion['bloqueo']:
+        circuitos = {c: dict(v) for c, v in instrumentacion['circuitos'].items()}
+        reporte = {
+            'total_s': round(time.perf_counter() - instrumentacion['inicio'], 6),
+            'etapas': list(instrumentacion['etapas']),
+            'contadores': dict(instrumentacion['contadores']),
+            'circuitos': circuitos,
+            'perfiles': dict(instrumentacion['perfiles']),
+        }
+    reporte['circuitos_mas_lentos'] = sorted(
+        circuitos, key=lambda c: circuitos[c].get('barrido_s', 0), reverse=True
+    )[:circuitos_mas_lentos]
+    return reporte
+
+
+def guardar_reporte_instrumentacion(instrumentacion, ruta='Reports/instrumentacion_barrido.json'):
+    """
+    Guarda el reporte de `reporte_instrumentacion` como JSON.
+
+    Parámetros:
+        instrumentacion (dict): Registro de `crear_instrumentacion`, o None (no se guarda nada).
+        ruta (str, optional): Ruta del archivo. Por defecto 'Reports/instrumentacion_barrido.json'.
+
+    Retorna:
+        str: Ruta escrita, o None si no había instrumentación o hubo un error.
+    """
+    if instrumentacion is None:
+        return None
+    try:
+        carpeta = os.path.dirname(ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(reporte_instrumentacion(instrumentacion), f, ensure_ascii=False, indent=2, default=str)
+    except Exception as e:
+        print(f"❌ Error al guardar el reporte de instrumentación: {e}")
+        return None
+    return ruta
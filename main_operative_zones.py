@@ -1,11 +1,16 @@
 # main.py
-import pandas as pd
 import time
 
 # ---- Importar funciones del core del barrido y otras dependencias ----
-from barrido_electrico import generar_dfs_resultados_finales, summarize_by_circuito
+from barrido_electrico import generar_dfs_resultados_finales, summarize_by_circuito, agregar_carga_aguas_abajo
 from Data_process import cargar_datos 
-from visualizacion_grafos import generar_grafo_circuito 
+from salida_resultados import crear_sumidero_resultados, escribir_resultado, cerrar_sumidero_resultados
+from visualizacion_grafos import generar_grafos_circuitos
+from topologia_red import exportar_topologia_red
+from contingencias_n1 import analizar_contingencias_n1
+from instrumentacion import (
+    crear_instrumentacion, medir_etapa, iniciar_perfiles, detener_perfiles, guardar_reporte_instrumentacion
+)
 
 # ----------------------------------------------------------
 # Configuración Principal y Ejecución
@@ -15,6 +20,16 @@ if __name__ == "__main__":
     # Tipo de carga de datos: "CSV" o "oracle"
     DATA_LOAD_METHOD = "oracle" 
     Guardar_resultados = True
+    # Formato de los resultados: 'parquet' (requiere pyarrow; si no está se usa CSV), 'csv' o 'excel'
+    formato_resultados = 'parquet'
+    carpeta_resultados = "Reports"
+    resumen_en_excel = True # Guarda además el resumen 'TD' en Reports/resultados_barrido_electrico.xlsx
+    # Exporta la topología recorrida (arreglos .npy con memory-map) para herramientas externas
+    exportar_topologia = True
+    carpeta_topologia = "Reports/topologia_red"
+    # Contingencias N-1: trafos sin servicio al abrir cada EC 'CLOSED' y enlaces 'OPEN' que lo restablecen
+    analizar_contingencias = True
+    n_procesos_contingencias = 1 # 1 = secuencial, None = todos los núcleos disponibles
 
     # Rutas a los archivos de datos (ajustar según DATA_LOAD_METHOD)
     if DATA_LOAD_METHOD == "CSV":
@@ -34,15 +49,38 @@ if __name__ == "__main__":
 
     # Parámetros para la generación de grafos
     output_folder_grafos = "grafos_circuitos_ecs"
+    hilos_render_grafos = None # Renders de Graphviz simultáneos (None = cantidad de núcleos)
     # Puedes definir aquí más parámetros de personalización para generar_grafo_circuito si es necesario
     # ej: grafo_font_size = 8, grafo_default_color = 'lightskyblue', etc.
 
     # Parámetro de verbosidad para los barridos (controla prints detallados)
     verbose_mode = False # Cambiar a True para más detalles durante el análisis de anillos
 
+    # Procesos para el barrido principal: 1 = secuencial, None = todos los núcleos disponibles
+    n_procesos_barrido = 1
+    # Motor del barrido principal: 'dfs' (un barrido por circuito) o 'bfs' (frentes vectorizados de varios circuitos a la vez)
+    motor_barrido = 'dfs'
+    # Snapshot del modelo codificado de la red (None = sin snapshot). Si los datos no cambiaron, el
+    # modelo se reabre con memory-map en lugar de reconstruirse; los procesos del barrido lo comparten
+    carpeta_snapshot_modelo = "Data/cache/modelo_red"
+
+    # Caché en disco de los datos cargados y preprocesados (ver cargar_datos en Data_process.py)
+    usar_cache_datos = True
+    forzar_recarga_datos = False # Cambiar a True para ignorar el caché y volver a leer las fuentes
+    # Cargar solo las columnas que usa el barrido (reduce memoria, pero los reportes pierden las demás columnas)
+    solo_columnas_barrido = False
+
+    # Instrumentación: tiempos por etapa y por circuito, contadores del barrido y perfiles opcionales (JSON)
+    instrumentar = True
+    perfil_cpu = False # cProfile del proceso principal
+    perfil_memoria = False # tracemalloc (pico de memoria y principales asignaciones; hace más lento el proceso)
+    ruta_reporte_instrumentacion = "Reports/instrumentacion_barrido.json"
+
     # --- Inicio del Proceso ---
     start_total_time = time.time()
     print("🔌 Proceso de barrido iterativo de conectividad eléctrica - EDEQ ")
+    instrumentacion = crear_instrumentacion(perfil_cpu, perfil_memoria) if instrumentar else None
+    iniciar_perfiles(instrumentacion)
 
     # 1. Carga de Datos
     df_circuitos_data, df_ecs_data, df_lins_data, df_trafos_data = cargar_datos(
@@ -50,7 +88,11 @@ if __name__ == "__main__":
         file_elementos_corte_location=path_archivo_elementos_corte,
         file_lineas_location=path_archivo_lineas,
         file_trafos_location=path_archivo_trafos,
-        source_types=data_source_types_list
+        source_types=data_source_types_list,
+        usar_cache=usar_cache_datos,
+        forzar_recarga=forzar_recarga_datos,
+        solo_columnas_barrido=solo_columnas_barrido,
+        instrumentacion=instrumentacion
     )
 
     if df_circuitos_data is not None and df_ecs_data is not None and \
@@ -62,33 +104,56 @@ if __name__ == "__main__":
             df_ecs_data, 
             df_lins_data, 
             df_trafos_data, 
-            verbose=verbose_mode
+            verbose=verbose_mode,
+            n_procesos=n_procesos_barrido,
+            motor=motor_barrido,
+            carpeta_snapshot_modelo=carpeta_snapshot_modelo,
+            instrumentacion=instrumentacion
         )
         
         if df_res_ecs is not None and df_res_lins is not None and df_res_trafos is not None:
             print(f"🎉 ¡Barridos completados (incluyendo análisis de anillos y trafos)!")
+
+            # Opcional: Guardar cada DataFrame de resultados apenas está listo
+            sumidero_resultados = None
+            if Guardar_resultados:
+                sumidero_resultados = crear_sumidero_resultados(
+                    formato_resultados, carpeta_resultados, resumen_en_excel=resumen_en_excel
+                )
+            if sumidero_resultados is not None:
+                with medir_etapa(instrumentacion, 'exportacion/resultados'):
+                    escribir_resultado(sumidero_resultados, 'Elementos_Corte', df_res_ecs)
+                    escribir_resultado(sumidero_resultados, 'Lineas', df_res_lins)
+                    escribir_resultado(sumidero_resultados, 'Transformadores', df_res_trafos)
+            if exportar_topologia:
+                with medir_etapa(instrumentacion, 'exportacion/topologia'):
+                    exportar_topologia_red(df_res_ecs, df_res_lins, df_res_trafos, carpeta=carpeta_topologia)
             
-            summary_df = summarize_by_circuito(df_res_ecs, df_res_lins, df_res_trafos)
-            summary_df_original = summarize_by_circuito(df_ecs_data, df_lins_data, df_trafos_data, Equipo_Padre_bandera=False)
+            with medir_etapa(instrumentacion, 'resumen'):
+                summary_df = summarize_by_circuito(df_res_ecs, df_res_lins, df_res_trafos)
+                summary_df_original = summarize_by_circuito(df_ecs_data, df_lins_data, df_trafos_data, Equipo_Padre_bandera=False)
+            # Líneas, trafos, ECs y capacidad nominal aguas abajo de cada EC
+            with medir_etapa(instrumentacion, 'resumen/carga_aguas_abajo'):
+                df_carga_ecs = agregar_carga_aguas_abajo(df_res_ecs, df_res_lins, df_res_trafos)
+            df_contingencias = None
+            if analizar_contingencias:
+                with medir_etapa(instrumentacion, 'resumen/contingencias_n1'):
+                    df_contingencias = analizar_contingencias_n1(
+                        df_res_ecs, df_res_lins, df_res_trafos, n_procesos=n_procesos_contingencias
+                    )
+                print(f"🔌 Contingencias N-1: {int(df_contingencias['Restaurable'].sum())} de "
+                      f"{len(df_contingencias)} ECs 'CLOSED' con enlace de restauración.")
             print(f" \n📊 Resultados del proceso del barrido iterativo por circuito:")
             print(summary_df)
             
-            #Opcional: Guardar resultados en archivos Excel
-            if Guardar_resultados:
-                try:
-                    output_excel_file = "Reports/resultados_barrido_electrico.xlsx"
-                    with pd.ExcelWriter(output_excel_file) as writer:
-                        if not df_res_ecs.empty:
-                            df_res_ecs.to_excel(writer, sheet_name='Elementos_Corte', index=False)
-                        if not df_res_lins.empty:
-                            df_res_lins.to_excel(writer, sheet_name='Lineas', index=False)
-                        if not df_res_trafos.empty:
-                            df_res_trafos.to_excel(writer, sheet_name='Transformadores', index=False)
-                        if not summary_df.empty:
-                            summary_df.to_excel(writer, sheet_name='TD', index=False)
-                    print(f"✅ Resultados guardados en '{output_excel_file}'")
-                except Exception as e:
-                    print(f"❌ Error al guardar resultados en Excel: {e}")
+            # Opcional: el resumen 'TD' se agrega al sumidero y se cierra (guarda el libro Excel si aplica)
+            if sumidero_resultados is not None:
+                with medir_etapa(instrumentacion, 'exportacion/resumen'):
+                    escribir_resultado(sumidero_resultados, 'Carga_ECs', df_carga_ecs)
+                    escribir_resultado(sumidero_resultados, 'Contingencias_N1', df_contingencias)
+                    escribir_resultado(sumidero_resultados, 'TD', summary_df, es_resumen=True)
+                    rutas_resultados = cerrar_sumidero_resultados(sumidero_resultados)
+                print(f"✅ Resultados guardados: {sorted(set(rutas_resultados.values()))}")
 
 
             # 3. Generación de Grafos (si hay resultados de ECs)
@@ -97,29 +162,20 @@ if __name__ == "__main__":
                 
                 # Asegurarse que la columna para identificar circuitos únicos exista
                 if 'Circuito_Origen_Barrido' in df_res_ecs.columns:
-                    circuitos_unicos_en_resultados = df_res_ecs['Circuito_Origen_Barrido'].dropna().unique()
-                    
-                    total_grafos_a_generar = len(circuitos_unicos_en_resultados)
                     start_time_generacion_grafos = time.time()
-                    
-                    for i, circuito_co_actual in enumerate(circuitos_unicos_en_resultados):
-                        print(f"  Generando grafo para el circuito: {circuito_co_actual} ({i+1}/{total_grafos_a_generar})...")
-                        
-                        df_datos_circuito_actual = df_res_ecs[
-                            df_res_ecs['Circuito_Origen_Barrido'] == circuito_co_actual
-                        ].copy()
-
-                        if not df_datos_circuito_actual.empty:
-                            # Llamada a la función de visualización_grafos.py
-                            generar_grafo_circuito(
-                                df_datos_circuito=df_datos_circuito_actual,
-                                circuito_co_origen=circuito_co_actual,
-                                output_folder=output_folder_grafos
-                                # Se pueden pasar aquí los parámetros de personalización definidos arriba
-                                # font_size=grafo_font_size, etc.
-                            )
-                        else:
-                            print(f"    ℹ️ No hay datos de Elementos de Corte para el circuito {circuito_co_actual} para generar grafo.")
+                    # Las fuentes DOT se construyen aquí y los renders de Graphviz corren en paralelo
+                    rutas_grafos, fallos_grafos = generar_grafos_circuitos(
+                        df_res_ecs,
+                        output_folder=output_folder_grafos,
+                        max_hilos=hilos_render_grafos,
+                        instrumentacion=instrumentacion
+                        # Se pueden pasar aquí los parámetros de personalización definidos arriba
+                        # font_size=grafo_font_size, etc.
+                    )
+                    print(f"  ✅ {len(rutas_grafos)} grafos generados en "
+                          f"{time.time() - start_time_generacion_grafos:.1f} s.")
+                    for circuito_fallido, error_grafo in fallos_grafos.items():
+                        print(f"    ❌ Grafo del circuito {circuito_fallido}: {error_grafo}")
                 else:
                     print("    ⚠️ No se encontró la columna 'Circuito_Origen_Barrido' en los resultados de Elementos de Corte. No se pueden generar grafos por circuito.")
             else:
@@ -133,4 +189,10 @@ if __name__ == "__main__":
     end_total_time = time.time()
     total_execution_time_seconds = end_total_time - start_total_time
     total_execution_time_formatted = time.strftime("%H:%M:%S", time.gmtime(total_execution_time_seconds))
-    print(f"\n🏁 Proceso completo. Tiempo total de ejecución: {total_execution_time_formatted}")
\ No newline at end of file
+    print(f"\n🏁 Proceso completo. Tiempo total de ejecución: {total_execution_time_formatted}")
+
+    # Reporte de instrumentación (etapas, circuitos más lentos, contadores y perfiles)
+    detener_perfiles(instrumentacion)
+    ruta_reporte = guardar_reporte_instrumentacion(instrumentacion, ruta_reporte_instrumentacion)
+    if ruta_reporte is not None:
+        print(f"⏱️ Reporte de instrumentación guardado en '{ruta_reporte}'.")
\ No newline at end of file
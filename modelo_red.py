@@ -0,0 +1,342 @@
+# modelo_red.py
+import numpy as np
+import pandas as pd
+
+# ----------------------------------------------------------
+# Modelo Codificado de la Red
+# ----------------------------------------------------------
+
+# Códigos fijos para EST_ESTABLE de los elementos de corte.
+# Cualquier otro valor (vacío, 'NAN', estados desconocidos) se codifica como EST_OTRO.
+ESTADOS_EC = ('CLOSED', 'OPEN')
+EST_OTRO = -1
+EST_CERRADO = 0
+EST_ABIERTO = 1
+
+# Centinela único para nodos nulos en los arreglos codificados
+NODO_NULO = -1
+
+# Textos que `astype(str)` produce para valores nulos y que no representan un nodo real
+_TEXTOS_NODO_NULO = {'nan', 'none', '<na>', ''}
+
+
+def _es_nodo_nulo(serie_nodos):
+    """
+    Identifica los valores de una columna de nodos que deben tratarse como nulos.
+
+    Parámetros:
+        serie_nodos (pd.Series): Columna 'NODO1_ID' o 'NODO2_ID'.
+
+    Retorna:
+        np.ndarray: Máscara booleana, True donde el nodo es nulo.
+    """
+    return (serie_nodos.isna() | serie_nodos.astype(str).str.strip().str.lower().isin(_TEXTOS_NODO_NULO)).to_numpy()
+
+
+def _adyacencia_csr(nodos1, nodos2, n_nodos):
+    """
+    Construye la adyacencia nodo → posiciones de elementos en formato CSR.
+
+    Un elemento con NODO1_ID == NODO2_ID se indexa una sola vez en ese nodo y los nodos
+    nulos no se indexan. Las posiciones de cada nodo quedan en orden ascendente, es decir,
+    en el mismo orden de las filas del DataFrame original.
+
+    Parámetros:
+        nodos1 (np.ndarray): Códigos de NODO1_ID de cada elemento.
+        nodos2 (np.ndarray): Códigos de NODO2_ID de cada elemento.
+        n_nodos (int): Cantidad total de nodos codificados.
+
+    Retorna:
+        tuple: (indptr, indices), donde las posiciones de los elementos del nodo `v`
+               son `indices[indptr[v]:indptr[v + 1]]`.
+    """
+    posiciones = np.arange(len(nodos1), dtype=np.int32)
+    mascara_nodo2 = nodos2 != nodos1
+    nodos = np.concatenate([nodos1, nodos2[mascara_nodo2]])
+    posiciones_incidencia = np.concatenate([posiciones, posiciones[mascara_nodo2]])
+
+    validos = nodos != NODO_NULO
+    nodos = nodos[validos]
+    posiciones_incidencia = posiciones_incidencia[validos]
+
+    orden = np.lexsort((posiciones_incidencia, nodos))
+    indices = posiciones_incidencia[orden]
+    indptr = np.zeros(n_nodos + 1, dtype=np.int64)
+    np.cumsum(np.bincount(nodos, minlength=n_nodos), out=indptr[1:])
+    return indptr, indices
+
+
+def _codificar_columna(serie):
+    """
+    Factoriza una columna a códigos enteros compactos.
+
+    Parámetros:
+        serie (pd.Series): Columna a codificar.
+
+    Retorna:
+        tuple: (codigos (np.ndarray int32), categorias (np.ndarray)).
+    """
+    codigos, categorias = pd.factorize(serie, use_na_sentinel=False)
+    return codigos.astype(np.int32), np.asarray(categorias, dtype=object)
+
+
+def construir_modelo_red(df_elementos_corte, df_lineas, df_trafos=None, df_circuitos=None):
+    """
+    Construye el modelo codificado de la red a partir de los DataFrames cargados.
+
+    Los IDs de nodo de todas las tablas se factorizan a un único espacio de códigos int32
+    (con NODO_NULO como centinela para 'nan', 'None', '<NA>' o vacío), los G3E_FID se
+    factorizan por tabla y 'TIPO', 'EST_ESTABLE' y 'CIRCUITO' de los elementos de corte se
+    convierten en categorías. Para cada tabla se construye además la adyacencia
+    nodo → elementos en formato CSR, de modo que el barrido consulta los elementos
+    incidentes a un nodo en O(grado) sin comparar strings.
+
+    Parámetros:
+        df_elementos_corte (pd.DataFrame): DataFrame con todos los elementos de corte.
+        df_lineas (pd.DataFrame): DataFrame con todas las líneas.
+        df_trafos (pd.DataFrame, optional): DataFrame con todos los transformadores.
+                                            Si es None, el modelo no incluye transformadores.
+        df_circuitos (pd.DataFrame, optional): DataFrame de circuitos (columna 'Circuito'). Sus
+                                               códigos se agregan a las categorías de circuito.
+
+    Retorna:
+        dict: Modelo con las llaves:
+              - 'nodos' (np.ndarray): ID original de cada código de nodo.
+              - 'indice_nodos' (pd.Index): Índice hash para traducir ID de nodo → código.
+              - 'circuitos' (np.ndarray) y 'indice_circuitos' (pd.Index): Categorías de circuito.
+              - 'ecs', 'lineas', 'trafos' (dict): Arreglos por tabla con 'nodo1', 'nodo2',
+                'fid', 'indptr' e 'indices'. 'ecs' incluye además 'estado', 'tipo', 'tipos',
+                'circuito', 'co' (CODIGO_OPERATIVO) y el índice 'indice_co' / 'pos_primera_co'
+                usado por `posicion_ec_por_co`.
+    """
+    tablas = {'ecs': df_elementos_corte, 'lineas': df_lineas}
+    if df_trafos is not None:
+        tablas['trafos'] = df_trafos
+    else:
+        tablas['trafos'] = pd.DataFrame({'G3E_FID': [], 'NODO1_ID': [], 'NODO2_ID': []}, dtype=object)
+
+    # 1. Espacio único de códigos de nodo para todas las tablas
+    columnas_nodos = []
+    for df in tablas.values():
+        for col in ('NODO1_ID', 'NODO2_ID'):
+            serie = df[col].astype(object).where(~_es_nodo_nulo(df[col]), None)
+            columnas_nodos.append(serie.to_numpy())
+    codigos_nodos, nodos = pd.factorize(np.concatenate(columnas_nodos), use_na_sentinel=True)
+    codigos_nodos = codigos_nodos.astype(np.int32)  # factorize ya usa -1 (NODO_NULO) para nulos
+    n_nodos = len(nodos)
+
+    # 2. Categorías de circuito (ECs + lista de circuitos a barrer)
+    valores_circuito = [df_elementos_corte['CIRCUITO'].astype(str).to_numpy()]
+    if df_circuitos is not None and 'Circuito' in df_circuitos.columns:
+        valores_circuito.append(df_circuitos['Circuito'].astype(str).to_numpy())
+    circuitos = pd.unique(np.concatenate(valores_circuito))
+    indice_circuitos = pd.Index(circuitos)
+
+    modelo = {
+        'nodos': np.asarray(nodos, dtype=object),
+        'indice_nodos': pd.Index(nodos),
+        'circuitos': np.asarray(circuitos, dtype=object),
+        'indice_circuitos': indice_circuitos,
+    }
+
+    inicio = 0
+    for nombre, df in tablas.items():
+        n_filas = len(df)
+        nodos1 = codigos_nodos[inicio:inicio + n_filas]
+        nodos2 = codigos_nodos[inicio + n_filas:inicio + 2 * n_filas]
+        inicio += 2 * n_filas
+
+        fids, _ = _codificar_columna(df['G3E_FID'].astype(str))
+        indptr, indices = _adyacencia_csr(nodos1, nodos2, n_nodos)
+        modelo[nombre] = {
+            'nodo1': nodos1,
+            'nodo2': nodos2,
+            'fid': fids,
+            'indptr': indptr,
+            'indices': indices,
+        }
+
+    # 3. Atributos categóricos de los elementos de corte
+    ecs = modelo['ecs']
+    estados = df_elementos_corte['EST_ESTABLE'].astype(str).str.strip().str.upper()
+    ecs['estado'] = pd.Categorical(estados, categories=ESTADOS_EC).codes.astype(np.int8)
+    ecs['tipo'], ecs['tipos'] = _codificar_columna(df_elementos_corte['TIPO'].astype(str))
+    ecs['circuito'] = indice_circuitos.get_indexer(df_elementos_corte['CIRCUITO'].astype(str)).astype(np.int32)
+    ecs['co'] = df_elementos_corte['CODIGO_OPERATIVO'].astype(str).to_numpy(dtype=object)
+
+    # 4. Índice hash CODIGO_OPERATIVO → primera fila del EC con ese código
+    codigos_co, cos_unicos = pd.factorize(ecs['co'])
+    ecs['indice_co'] = pd.Index(cos_unicos)
+    ecs['pos_primera_co'] = np.unique(codigos_co, return_index=True)[1].astype(np.int32)
+
+    return modelo
+
+
+def codigo_nodo(modelo_red, nodo_id):
+    """
+    Traduce un ID de nodo original a su código en el modelo.
+
+    Parámetros:
+        modelo_red (dict): Modelo generado por `construir_modelo_red`.
+        nodo_id (str): ID original del nodo.
+
+    Retorna:
+        int: Código del nodo, o NODO_NULO si el nodo es nulo o no existe en la red.
+    """
+    if pd.isna(nodo_id):
+        return NODO_NULO
+    codigo = modelo_red['indice_nodos'].get_indexer([str(nodo_id)])[0]
+    return int(codigo)
+
+
+def codigo_circuito(modelo_red, circuito):
+    """
+    Traduce un código de circuito a su código categórico en el modelo.
+
+    Parámetros:
+        modelo_red (dict): Modelo generado por `construir_modelo_red`.
+        circuito (str): Código del circuito (ej. '101-22-').
+
+    Retorna:
+        int: Código del circuito, o -1 si ningún elemento de corte pertenece a él.
+    """
+    return int(modelo_red['indice_circuitos'].get_indexer([str(circuito)])[0])
+
+
+def posicion_ec_por_co(modelo_red, co):
+    """
+    Busca la fila del primer EC con un CODIGO_OPERATIVO dado mediante el índice hash del modelo.
+
+    Parámetros:
+        modelo_red (dict): Modelo generado por `construir_modelo_red`.
+        co (str): CODIGO_OPERATIVO a buscar.
+
+    Retorna:
+        int: Posición (iloc) del primer EC con ese código, o -1 si no existe.
+    """
+    ecs = modelo_red['ecs']
+    codigo = ecs['indice_co'].get_indexer([str(co)])[0]
+    return int(ecs['pos_primera_co'][codigo]) if codigo >= 0 else -1
+
+
+def posiciones_en_nodo(elementos, nodo):
+    """
+    Devuelve las posiciones (iloc) de los elementos incidentes a un nodo codificado.
+
+    Parámetros:
+        elementos (dict): Una de las tablas del modelo ('ecs', 'lineas' o 'trafos').
+        nodo (int): Código del nodo a consultar.
+
+    Retorna:
+        np.ndarray: Posiciones de los elementos en orden de fila; vacío si no hay elementos.
+    """
+    indptr = elementos['indptr']
+    return elementos['indices'][indptr[nodo]:indptr[nodo + 1]]
+
+
+def posiciones_en_nodos(elementos, nodos):
+    """
+    Devuelve en bloque las posiciones de los elementos incidentes a varios nodos codificados.
+
+    Equivale a concatenar `posiciones_en_nodo` para cada nodo, en el orden de `nodos`, sin
+    un bucle de Python.
+
+    Parámetros:
+        elementos (dict): Una de las tablas del modelo ('ecs', 'lineas' o 'trafos').
+        nodos (np.ndarray): Códigos de los nodos a consultar (sin NODO_NULO).
+
+    Retorna:
+        tuple: (posiciones, origen), donde origen[i] es el índice en `nodos` del nodo
+               del que proviene posiciones[i].
+    """
+    indptr = elementos['indptr']
+    inicios = indptr[nodos]
+    conteos = indptr[nodos + 1] - inicios
+    origen = np.repeat(np.arange(len(nodos), dtype=np.int64), conteos)
+    # Desplazamiento de cada posición dentro del bloque de su nodo
+    desplazamientos = np.arange(len(origen), dtype=np.int64) - np.repeat(np.cumsum(conteos) - conteos, conteos)
+    return elementos['indices'][inicios[origen] + desplazamientos], origen
+
+
+# ----------------------------------------------------------
+# Secciones de Líneas entre Elementos de Corte
+# ----------------------------------------------------------
+
+def construir_secciones_lineas(modelo_red):
+    """
+    Agrupa las líneas de la red en secciones conexas delimitadas por elementos de corte.
+
+    Un nodo es terminal si algún EC (en cualquier estado) incide en él. Dos líneas pertenecen a
+    la misma sección si comparten un nodo no terminal; los nodos terminales no unen secciones y
+    forman su frontera. Las componentes se calculan una sola vez con union-find sobre los nodos
+    no terminales, de modo que el análisis de anillos resuelve el lado lejano de todos los ECs
+    'OPEN' consultando secciones en lugar de repetir un DFS de líneas por cada EC.
+
+    Parámetros:
+        modelo_red (dict): Modelo generado por `construir_modelo_red`.
+
+    Retorna:
+        dict: Diccionario con las llaves:
+              - 'es_terminal' (np.ndarray bool): True para los nodos con al menos un EC.
+              - 'seccion_linea' (np.ndarray int32): Sección de cada línea (-1 si no tiene nodos válidos).
+              - 'frontera_indptr', 'frontera_nodos' (np.ndarray): Nodos terminales de la frontera de
+                cada sección en formato CSR.
+    """
+    n_nodos = len(modelo_red['nodos'])
+    ecs, lineas = modelo_red['ecs'], modelo_red['lineas']
+
+    es_terminal = np.zeros(n_nodos, dtype=bool)
+    for nodos_ec in (ecs['nodo1'], ecs['nodo2']):
+        es_terminal[nodos_ec[nodos_ec != NODO_NULO]] = True
+
+    nodo1, nodo2 = lineas['nodo1'], lineas['nodo2']
+    libre1 = (nodo1 != NODO_NULO) & ~es_terminal[np.maximum(nodo1, 0)]
+    libre2 = (nodo2 != NODO_NULO) & ~es_terminal[np.maximum(nodo2, 0)]
+
+    # Union-find sobre nodos no terminales: cada línea entre dos de ellos los une
+    padre = list(range(n_nodos))
+    def raiz(x):
+        while padre[x] != x:
+            padre[x] = padre[padre[x]]
+            x = padre[x]
+        return x
+    for a, b in zip(nodo1[libre1 & libre2].tolist(), nodo2[libre1 & libre2].tolist()):
+        ra, rb = raiz(a), raiz(b)
+        if ra != rb:
+            padre[rb] = ra
+
+    # Sección de cada línea: la raíz de su nodo no terminal; una línea entre dos terminales es
+    # una sección por sí misma (identificada como n_nodos + posición de la línea)
+    n_lineas = len(nodo1)
+    seccion = np.full(n_lineas, -1, dtype=np.int64)
+    for i in np.flatnonzero(libre1).tolist():
+        seccion[i] = raiz(int(nodo1[i]))
+    solo_libre2 = libre2 & ~libre1
+    for i in np.flatnonzero(solo_libre2).tolist():
+        seccion[i] = raiz(int(nodo2[i]))
+    con_nodo = (nodo1 != NODO_NULO) | (nodo2 != NODO_NULO)
+    entre_terminales = con_nodo & ~libre1 & ~libre2
+    seccion[entre_terminales] = n_nodos + np.flatnonzero(entre_terminales)
+
+    # Compactar los identificadores de sección a 0..k-1
+    con_seccion = seccion >= 0
+    seccion_linea = np.full(n_lineas, -1, dtype=np.int32)
+    ids_compactos, seccion_linea[con_seccion] = np.unique(seccion[con_seccion], return_inverse=True)
+    n_secciones = len(ids_compactos)
+
+    # Frontera: pares (sección, nodo terminal) únicos a partir de los extremos terminales de cada línea
+    pares_seccion, pares_nodo = [], []
+    for nodos_linea, libre in ((nodo1, libre1), (nodo2, libre2)):
+        frontera = con_seccion & (nodos_linea != NODO_NULO) & ~libre
+        pares_seccion.append(seccion_linea[frontera])
+        pares_nodo.append(nodos_linea[frontera])
+    pares = np.unique(np.stack([np.concatenate(pares_seccion), np.concatenate(pares_nodo)]), axis=1)
+    frontera_indptr = np.zeros(n_secciones + 1, dtype=np.int64)
+    np.cumsum(np.bincount(pares[0], minlength=n_secciones), out=frontera_indptr[1:])
+
+    return {
+        'es_terminal': es_terminal,
+        'seccion_linea': seccion_linea,
+        'frontera_indptr': frontera_indptr,
+        'frontera_nodos': pares[1].astype(np.int32),
+    }
@@ -0,0 +1,133 @@
+# salida_resultados.py
+import os
+import pandas as pd
+
+# ---- Dependencia opcional para Parquet ----
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_DISPONIBLE = True
+except ImportError:
+    PARQUET_DISPONIBLE = False
+
+# Filas por bloque al escribir CSV, para no convertir todo el DataFrame a texto de una vez
+FILAS_POR_BLOQUE_CSV = 50000
+
+# ----------------------------------------------------------
+# Sumidero de Resultados del Barrido
+# ----------------------------------------------------------
+
+def _escribir_csv(sumidero, nombre, df):
+    """Escribe un DataFrame como CSV (delimitador ';', igual que los datos de entrada) por bloques."""
+    ruta = os.path.join(sumidero['carpeta'], f"{sumidero['nombre_base']}_{nombre}.csv")
+    df.to_csv(ruta, sep=';', index=False, chunksize=FILAS_POR_BLOQUE_CSV)
+    return ruta
+
+
+def _escribir_parquet(sumidero, nombre, df):
+    """Escribe un DataFrame como Parquet; las columnas de tipo mixto se guardan como texto."""
+    ruta = os.path.join(sumidero['carpeta'], f"{sumidero['nombre_base']}_{nombre}.parquet")
+    columnas_objeto = df.select_dtypes(include='object').columns
+    df_parquet = df.astype({col: 'string' for col in columnas_objeto}) if len(columnas_objeto) else df
+    df_parquet.to_parquet(ruta, index=False)
+    return ruta
+
+
+def _escribir_excel(sumidero, nombre, df):
+    """Agrega un DataFrame como hoja del libro Excel del sumidero (se abre al escribir la primera hoja)."""
+    ruta_excel = os.path.join(sumidero['carpeta'], f"{sumidero['nombre_base']}.xlsx")
+    if sumidero['excel_writer'] is None:
+        sumidero['excel_writer'] = pd.ExcelWriter(ruta_excel)
+    df.to_excel(sumidero['excel_writer'], sheet_name=nombre, index=False)
+    return ruta_excel
+
+
+# Registro de formatos de salida: nombre → función escritora f(sumidero, nombre, df) que retorna la ruta escrita
+ESCRITORES_RESULTADOS = {
+    'csv': _escribir_csv,
+    'parquet': _escribir_parquet,
+    'excel': _escribir_excel,
+}
+
+
+def crear_sumidero_resultados(formato='parquet', carpeta='Reports', nombre_base='resultados_barrido_electrico',
+                              resumen_en_excel=True):
+    """
+    Crea un sumidero de resultados, que escribe cada DataFrame apenas está listo.
+
+    Parámetros:
+        formato (str, optional): Formato de los DataFrames de resultados: una llave de
+                                 `ESCRITORES_RESULTADOS` ('parquet', 'csv' o 'excel'). Si se pide
+                                 'parquet' y pyarrow no está instalado, se usa 'csv'. Por defecto 'parquet'.
+        carpeta (str, optional): Carpeta de salida (se crea si no existe). Por defecto 'Reports'.
+        nombre_base (str, optional): Prefijo de los archivos generados.
+        resumen_en_excel (bool, optional): Si es True, las tablas de resumen (ver `escribir_resultado`)
+                                           se escriben además como hojas de un libro Excel. Por defecto True.
+
+    Retorna:
+        dict: Sumidero para `escribir_resultado` y `cerrar_sumidero_resultados`, o None si el formato no es válido.
+    """
+    if formato not in ESCRITORES_RESULTADOS:
+        print(f"❌ Error: Formato de resultados '{formato}' no es válido. Use uno de {list(ESCRITORES_RESULTADOS)}.")
+        return None
+    if formato == 'parquet' and not PARQUET_DISPONIBLE:
+        print("⚠️ Advertencia: La librería 'pyarrow' no está instalada. Los resultados se guardarán en CSV.")
+        formato = 'csv'
+    os.makedirs(carpeta, exist_ok=True)
+    return {
+        'formato': formato,
+        'carpeta': carpeta,
+        'nombre_base': nombre_base,
+        'resumen_en_excel': resumen_en_excel,
+        'excel_writer': None,
+        'rutas': {},
+    }
+
+
+def escribir_resultado(sumidero, nombre, df, es_resumen=False):
+    """
+    Escribe un DataFrame de resultados con el formato del sumidero.
+
+    Un error al escribir se informa sin interrumpir el proceso. Los DataFrames vacíos se omiten.
+
+    Parámetros:
+        sumidero (dict): Sumidero creado con `crear_sumidero_resultados`.
+        nombre (str): Nombre del resultado (sufijo del archivo u hoja de Excel, ej. 'Lineas').
+        df (pd.DataFrame): DataFrame a escribir.
+        es_resumen (bool, optional): Si es True y el sumidero tiene `resumen_en_excel`, el DataFrame
+                                     se escribe también como hoja del libro Excel. Por defecto False.
+
+    Retorna:
+        bool: True si se escribió correctamente.
+    """
+    if df is None or df.empty:
+        return False
+    formatos = [sumidero['formato']]
+    if es_resumen and sumidero['resumen_en_excel'] and 'excel' not in formatos:
+        formatos.append('excel')
+    try:
+        for formato in formatos:
+            sumidero['rutas'][(nombre, formato)] = ESCRITORES_RESULTADOS[formato](sumidero, nombre, df)
+        print(f"  💾 Resultado '{nombre}' guardado ({', '.join(formatos)}).")
+        return True
+    except Exception as e:
+        print(f"❌ Error al guardar el resultado '{nombre}': {e}")
+        return False
+
+
+def cerrar_sumidero_resultados(sumidero):
+    """
+    Cierra el sumidero, guardando el libro Excel si se escribió alguna hoja.
+
+    Parámetros:
+        sumidero (dict): Sumidero creado con `crear_sumidero_resultados`.
+
+    Retorna:
+        dict: Rutas escritas por (nombre, formato).
+    """
+    if sumidero['excel_writer'] is not None:
+        try:
+            sumidero['excel_writer'].close()
+        except Exception as e:
+            print(f"❌ Error al guardar el libro Excel de resultados: {e}")
+        sumidero['excel_writer'] = None
+    return sumidero['rutas']
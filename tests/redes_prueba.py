@@ -0,0 +1,82 @@
+# tests/redes_prueba.py
+import numpy as np
+import pandas as pd
+
+from barrido_electrico import generar_dfs_resultados_finales
+from benchmark_barrido import generar_red_sintetica
+
+# ----------------------------------------------------------
+# Redes de Prueba y Comparación de Resultados
+# ----------------------------------------------------------
+#
+# Cada red es una tupla (df_circuitos, df_elementos_corte, df_lineas, df_trafos) con el esquema
+# de Data/CSV, lista para `generar_dfs_resultados_finales`.
+
+
+def red_sintetica(semilla, n_circuitos=4, lineas_por_circuito=60):
+    """Red radial de `benchmark_barrido.generar_red_sintetica` (circuitos enlazados por ECs 'OPEN')."""
+    red = generar_red_sintetica(n_circuitos, lineas_por_circuito, semilla=semilla)
+    return red['circuitos'], red['elementos_corte'], red['lineas'], red['transformadores']
+
+
+def red_aleatoria(semilla, n_circuitos=3, n_nodos=14, n_lineas=14, n_ecs=6, n_trafos=6):
+    """
+    Red pequeña sin estructura: líneas, ECs y trafos entre nodos al azar y de circuitos al azar.
+
+    Produce mallas, líneas que cruzan de un circuito a otro, ECs con ambos lados alcanzados y
+    trafos conectados a dos nodos del alimentador, que no aparecen en las redes sintéticas radiales.
+    """
+    rng = np.random.default_rng(semilla)
+    circuitos = [f"C{i}" for i in range(n_circuitos)]
+
+    def nodo():
+        return f"N{rng.integers(n_nodos)}"
+
+    ecs = [{'G3E_FID': str(100 + i), 'NODO1_ID': f"S{i}", 'NODO2_ID': nodo(), 'CIRCUITO': circuito,
+            'CODIGO_OPERATIVO': circuito, 'EST_ESTABLE': 'CLOSED', 'TIPO': 'I'}
+           for i, circuito in enumerate(circuitos)]
+    ecs += [{'G3E_FID': str(200 + i), 'NODO1_ID': nodo(), 'NODO2_ID': nodo(), 'CIRCUITO': str(rng.choice(circuitos)),
+             'CODIGO_OPERATIVO': f"S-{i:03d}", 'EST_ESTABLE': str(rng.choice(['CLOSED', 'OPEN'])), 'TIPO': 'S'}
+            for i in range(n_ecs)]
+    lineas = [{'G3E_FID': str(300 + i), 'NODO1_ID': nodo(), 'NODO2_ID': nodo(), 'CIRCUITO': str(rng.choice(circuitos))}
+              for i in range(n_lineas)]
+    trafos = [{'G3E_FID': str(400 + i), 'NODO1_ID': nodo(), 'NODO2_ID': nodo() if rng.random() < 0.3 else f"T{i}",
+               'CIRCUITO': str(rng.choice(circuitos)), 'CAPACIDAD_NOMINAL': '10'}
+              for i in range(n_trafos)]
+    return pd.DataFrame({'Circuito': circuitos}), pd.DataFrame(ecs), pd.DataFrame(lineas), pd.DataFrame(trafos)
+
+
+def red_paso_compartido():
+    """
+    Dos circuitos donde B solo llega a sus elementos atravesando una línea de A.
+
+    Cabeceras A (N0→N1) y B (M0→N3); líneas 10 (A, N1–N2), 11 (A, N3–N2) y 12 (B, N2–N4);
+    trafo 20 (B) en N4. La línea 12 y el trafo 20 son de B.
+    """
+    df_ecs = pd.DataFrame({
+        'G3E_FID': ['1', '2'], 'NODO1_ID': ['N0', 'M0'], 'NODO2_ID': ['N1', 'N3'], 'CIRCUITO': ['A', 'B'],
+        'CODIGO_OPERATIVO': ['A', 'B'], 'EST_ESTABLE': ['CLOSED', 'CLOSED'], 'TIPO': ['I', 'I'],
+    })
+    df_lineas = pd.DataFrame({
+        'G3E_FID': ['10', '11', '12'], 'NODO1_ID': ['N1', 'N3', 'N2'], 'NODO2_ID': ['N2', 'N2', 'N4'],
+        'CIRCUITO': ['A', 'A', 'B'],
+    })
+    df_trafos = pd.DataFrame({
+        'G3E_FID': ['20'], 'NODO1_ID': ['N4'], 'NODO2_ID': ['S20'], 'CIRCUITO': ['B'], 'CAPACIDAD_NOMINAL': ['10'],
+    })
+    return pd.DataFrame({'Circuito': ['A', 'B']}), df_ecs, df_lineas, df_trafos
+
+
+def barrer(red, motor='dfs', **opciones):
+    """Ejecuta `generar_dfs_resultados_finales` sobre una red de prueba."""
+    return generar_dfs_resultados_finales(*red, motor=motor, **opciones)
+
+
+def como_conjunto(df):
+    """Filas de un DataFrame de resultados como conjunto (el orden de las filas no importa)."""
+    return set(map(tuple, df.astype(str).itertuples(index=False)))
+
+
+def resultados_como_conjuntos(resultados):
+    """Convierte (ecs, lineas, trafos) de resultados en una tupla de conjuntos de filas."""
+    return tuple(como_conjunto(df) for df in resultados)
@@ -0,0 +1,55 @@
+# tests/test_barrido_incremental.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from barrido_incremental import actualizar_barrido_incremental, crear_estado_barrido
+from redes_prueba import barrer, red_aleatoria, red_sintetica, resultados_como_conjuntos
+
+REDES = [pytest.param(lambda s=s: red_sintetica(s, n_circuitos=3, lineas_por_circuito=40), id=f"sintetica-{s}")
+         for s in range(3)] + \
+        [pytest.param(lambda s=s: red_aleatoria(s), id=f"aleatoria-{s}") for s in range(30)]
+
+
+def _cambios_aleatorios(df_ecs, rng, n_cambios):
+    """Invierte el estado de algunos ECs al azar: {G3E_FID: nuevo estado}."""
+    filas = rng.choice(len(df_ecs), size=min(n_cambios, len(df_ecs)), replace=False)
+    return {str(df_ecs['G3E_FID'].iat[i]): 'OPEN' if df_ecs['EST_ESTABLE'].iat[i] == 'CLOSED' else 'CLOSED'
+            for i in filas}
+
+
+def _aplicar_cambios(red, cambios):
+    """Red con los nuevos estados, para el barrido completo de referencia."""
+    df_circuitos, df_ecs, df_lineas, df_trafos = red
+    df_ecs = df_ecs.copy()
+    fids = df_ecs['G3E_FID'].astype(str)
+    cambiados = fids.isin(list(cambios))
+    df_ecs.loc[cambiados, 'EST_ESTABLE'] = fids[cambiados].map(cambios)
+    return df_circuitos, df_ecs, df_lineas, df_trafos
+
+
+@pytest.mark.parametrize('construir_red', REDES)
+def test_actualizacion_incremental_igual_a_barrido_completo(construir_red):
+    red = construir_red()
+    rng = np.random.default_rng(len(red[1]))
+    estado = crear_estado_barrido(*red)
+    # Dos actualizaciones seguidas: la segunda parte del estado ya modificado
+    for _ in range(2):
+        cambios = _cambios_aleatorios(estado['df_ecs'], rng, 3)
+        red = _aplicar_cambios(red, cambios)
+        df_ecs, df_lineas, df_trafos, _ = actualizar_barrido_incremental(estado, cambios)
+        assert resultados_como_conjuntos((df_ecs, df_lineas, df_trafos)) == resultados_como_conjuntos(barrer(red))
+
+
+@pytest.mark.parametrize('construir_red', REDES[:10])
+def test_actualizacion_incremental_conserva_orden_e_indice(construir_red):
+    # Solo se recalculan las filas de las claves tocadas; el resto se empalma en el orden del barrido completo
+    red = construir_red()
+    rng = np.random.default_rng(len(red[1]) + 1)
+    estado = crear_estado_barrido(*red)
+    for _ in range(4):
+        cambios = _cambios_aleatorios(estado['df_ecs'], rng, 2)
+        red = _aplicar_cambios(red, cambios)
+        resultados = actualizar_barrido_incremental(estado, cambios)[:3]
+        for df_incremental, df_completo in zip(resultados, barrer(red)):
+            pd.testing.assert_frame_equal(df_incremental, df_completo)
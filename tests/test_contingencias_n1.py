@@ -0,0 +1,33 @@
+# tests/test_contingencias_n1.py
+import pytest
+
+from barrido_incremental import actualizar_barrido_incremental, crear_estado_barrido, resultados_estado_barrido
+from contingencias_n1 import analizar_contingencias_n1
+from redes_prueba import red_sintetica
+
+
+def _trafos_del_circuito(df_trafos, circuito):
+    return set(df_trafos.loc[df_trafos['Circuito_Origen_Barrido'] == circuito, 'G3E_FID'].astype(str))
+
+
+@pytest.mark.parametrize('semilla', range(3))
+def test_trafos_sin_servicio_igual_a_nuevo_barrido(semilla):
+    # Cada EC 'CLOSED' se abre en un barrido incremental y se vuelve a cerrar antes del siguiente
+    estado = crear_estado_barrido(*red_sintetica(semilla, n_circuitos=3, lineas_por_circuito=40))
+    df_ecs, df_lineas, df_trafos = resultados_estado_barrido(estado)
+    tabla = analizar_contingencias_n1(df_ecs, df_lineas, df_trafos)
+    assert len(tabla) > 0
+
+    for _, fila in tabla.iterrows():
+        circuito = fila['Circuito_Origen_Barrido']
+        antes = _trafos_del_circuito(df_trafos, circuito)
+        _, _, df_trafos_abierto, _ = actualizar_barrido_incremental(estado, {fila['G3E_FID']: 'OPEN'})
+        actualizar_barrido_incremental(estado, {fila['G3E_FID']: 'CLOSED'})
+        perdidos = antes - _trafos_del_circuito(df_trafos_abierto, circuito)
+
+        if fila['CODIGO_OPERATIVO'] == circuito:
+            # Cabecera: el barrido arranca igual, pero la tabla cuenta el circuito completo
+            assert not perdidos
+            assert fila['Trafos_Sin_Servicio'] == len(antes)
+        else:
+            assert fila['Trafos_Sin_Servicio'] == len(perdidos)
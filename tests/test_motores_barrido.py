@@ -0,0 +1,44 @@
+# tests/test_motores_barrido.py
+import pytest
+
+from barrido_electrico import (
+    barrido_conectividad_frontera, barrido_conectividad_por_circuito, crear_resultados_barrido,
+    materializar_resultados_barrido,
+)
+from modelo_red import construir_modelo_red
+from redes_prueba import barrer, red_aleatoria, red_paso_compartido, red_sintetica, resultados_como_conjuntos
+
+# El motor 'bfs' debe producir las mismas filas que el barrido independiente por circuito ('dfs')
+REDES = [pytest.param(lambda s=s: red_sintetica(s), id=f"sintetica-{s}") for s in range(3)] + \
+        [pytest.param(lambda s=s: red_aleatoria(s), id=f"aleatoria-{s}") for s in range(60)]
+
+
+def test_bfs_circuito_que_atraviesa_linea_de_otro():
+    red = red_paso_compartido()
+    assert resultados_como_conjuntos(barrer(red, motor='bfs')) == resultados_como_conjuntos(barrer(red))
+
+
+@pytest.mark.parametrize('construir_red', REDES)
+def test_bfs_igual_a_dfs(construir_red):
+    red = construir_red()
+    assert resultados_como_conjuntos(barrer(red, motor='bfs')) == resultados_como_conjuntos(barrer(red))
+
+
+@pytest.mark.parametrize('circuitos_por_lote', [1, 2])
+@pytest.mark.parametrize('construir_red', REDES[:10])
+def test_frontera_por_lotes_igual_a_dfs_por_circuito(construir_red, circuitos_por_lote):
+    # Filas sin deduplicar: el frente de cada lote debe registrar lo mismo que el DFS de cada circuito
+    df_circuitos, df_ecs, df_lineas, df_trafos = construir_red()
+    circuitos = df_circuitos['Circuito'].tolist()
+    modelo = construir_modelo_red(df_ecs, df_lineas, df_trafos, df_circuitos)
+
+    resultados_frontera = crear_resultados_barrido()
+    barrido_conectividad_frontera(circuitos, df_ecs, df_lineas, df_trafos, resultados_frontera, modelo,
+                                  circuitos_por_lote=circuitos_por_lote)
+    resultados_dfs = crear_resultados_barrido()
+    for circuito in circuitos:
+        barrido_conectividad_por_circuito(circuito, df_ecs, df_lineas, df_trafos, resultados_dfs, modelo)
+
+    frontera = materializar_resultados_barrido(resultados_frontera, df_ecs, df_lineas, df_trafos)
+    dfs = materializar_resultados_barrido(resultados_dfs, df_ecs, df_lineas, df_trafos)
+    assert resultados_como_conjuntos(frontera) == resultados_como_conjuntos(dfs)
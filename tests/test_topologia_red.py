@@ -0,0 +1,62 @@
+# tests/test_topologia_red.py
+import os
+
+import numpy as np
+import pytest
+
+import topologia_red
+from barrido_electrico import (
+    barrer_circuitos_en_paralelo, barrido_conectividad_por_circuito, crear_resultados_barrido,
+    materializar_resultados_barrido,
+)
+from modelo_red import construir_modelo_red
+from redes_prueba import red_sintetica, resultados_como_conjuntos
+from topologia_red import abrir_arreglos, abrir_snapshot_modelo_red, guardar_arreglos, guardar_snapshot_modelo_red
+
+
+def test_reescritura_no_modifica_arreglos_abiertos(tmp_path):
+    guardar_arreglos(str(tmp_path), {'a': np.arange(5)})
+    anteriores, _ = abrir_arreglos(str(tmp_path))
+    guardar_arreglos(str(tmp_path), {'a': np.arange(5) * 10})
+
+    assert anteriores['a'].tolist() == [0, 1, 2, 3, 4]
+    assert abrir_arreglos(str(tmp_path))[0]['a'].tolist() == [0, 10, 20, 30, 40]
+    # Solo quedan los archivos del JSON vigente
+    assert len([archivo for archivo in os.listdir(tmp_path) if archivo.endswith('.npy')]) == 1
+
+
+def test_escritura_incompleta_conserva_la_anterior(tmp_path, monkeypatch):
+    guardar_arreglos(str(tmp_path), {'a': np.arange(3), 'b': np.arange(3)}, {'huella': 'vieja'})
+    guardar_original = np.save
+
+    def falla_en_b(ruta, arreglo, **opciones):
+        if os.path.basename(ruta).startswith('b.'):
+            raise OSError("disco lleno")
+        guardar_original(ruta, arreglo, **opciones)
+
+    monkeypatch.setattr(topologia_red.np, 'save', falla_en_b)
+    with pytest.raises(OSError):
+        guardar_arreglos(str(tmp_path), {'a': np.arange(3) + 7, 'b': np.arange(3) + 7}, {'huella': 'nueva'})
+
+    arreglos, metadatos = abrir_arreglos(str(tmp_path))
+    assert metadatos['huella'] == 'vieja'
+    assert arreglos['a'].tolist() == [0, 1, 2] and arreglos['b'].tolist() == [0, 1, 2]
+
+
+def test_barrido_en_paralelo_con_snapshot_cambiado(tmp_path):
+    df_circuitos, df_ecs, df_lineas, df_trafos = red_sintetica(0, n_circuitos=3, lineas_por_circuito=20)
+    circuitos = df_circuitos['Circuito'].tolist()
+    modelo = construir_modelo_red(df_ecs, df_lineas, df_trafos, df_circuitos)
+    guardar_snapshot_modelo_red(modelo, str(tmp_path), huella='otra')
+    assert abrir_snapshot_modelo_red(str(tmp_path), 'validada')[0] is None
+
+    # Los procesos no aceptan un snapshot con otra huella: el barrido se repite con el modelo en memoria
+    resultados_paralelo = crear_resultados_barrido()
+    barrer_circuitos_en_paralelo(circuitos, modelo, resultados_paralelo, n_procesos=2,
+                                 carpeta_snapshot=str(tmp_path), huella_snapshot='validada')
+    resultados_secuencial = crear_resultados_barrido()
+    for circuito in circuitos:
+        barrido_conectividad_por_circuito(circuito, df_ecs, df_lineas, df_trafos, resultados_secuencial, modelo)
+
+    assert resultados_como_conjuntos(materializar_resultados_barrido(resultados_paralelo, df_ecs, df_lineas, df_trafos)) == \
+        resultados_como_conjuntos(materializar_resultados_barrido(resultados_secuencial, df_ecs, df_lineas, df_trafos))
@@ -0,0 +1,427 @@
+# topologia_red.py
+import json
+import os
+import uuid
+import numpy as np
+import pandas as pd
+
+from modelo_red import ESTADOS_EC, _adyacencia_csr, _es_nodo_nulo
+
+# Versión del formato de la carpeta de topología (se guarda en los metadatos)
+VERSION_FORMATO_TOPOLOGIA = 1
+NOMBRE_METADATOS_TOPOLOGIA = 'metadatos.json'
+
+# Tipos de elemento de la adyacencia global: el elemento global `g` es la fila
+# `g - offset[tipo]` de la tabla del tipo correspondiente
+TIPOS_ELEMENTO = ('ecs', 'lineas', 'trafos')
+
+# ----------------------------------------------------------
+# Arreglos en Carpeta (un .npy por arreglo)
+# ----------------------------------------------------------
+
+def _a_texto_fijo(valores):
+    """
+    Convierte valores a un arreglo de texto de ancho fijo ('U'), que a diferencia de los
+    arreglos de objetos sí se puede abrir con memory-map. Los nulos se guardan como ''.
+    """
+    serie = pd.Series(valores, dtype=object)
+    return serie.where(serie.notna(), '').astype(str).to_numpy(dtype=str)
+
+
+def guardar_arreglos(carpeta, arreglos, metadatos=None):
+    """
+    Guarda un diccionario de arreglos NumPy como una carpeta con un archivo .npy por arreglo.
+
+    Cada archivo se puede abrir después con `np.load(..., mmap_mode='r')` sin copiar los datos.
+    Los archivos de cada escritura llevan un sufijo nuevo (`<nombre>.<sufijo>.npy`), así que nunca
+    se sobrescribe un archivo que otro proceso pueda tener abierto con memory-map. El JSON de
+    metadatos, que indica qué archivo corresponde a cada arreglo, se reemplaza al final de forma
+    atómica: los lectores ven la escritura anterior completa o la nueva completa, y si la escritura
+    falla a mitad de camino el JSON anterior sigue apuntando a sus propios archivos. Después se
+    borran los .npy que el JSON vigente ya no referencia.
+
+    Parámetros:
+        carpeta (str): Carpeta de destino (se crea si no existe).
+        arreglos (dict): Nombre → np.ndarray. No se admiten arreglos de objetos.
+        metadatos (dict, optional): Información adicional serializable a JSON.
+
+    Retorna:
+        str: Ruta del archivo de metadatos.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    sufijo = uuid.uuid4().hex[:12]
+    archivos = {nombre: f"{nombre}.{sufijo}.npy" for nombre in arreglos}
+    for nombre, arreglo in arreglos.items():
+        np.save(os.path.join(carpeta, archivos[nombre]), np.ascontiguousarray(arreglo), allow_pickle=False)
+    contenido = dict(metadatos or {})
+    contenido['arreglos'] = sorted(arreglos)
+    contenido['archivos'] = archivos
+    ruta_metadatos = os.path.join(carpeta, NOMBRE_METADATOS_TOPOLOGIA)
+    ruta_temporal = f"{ruta_metadatos}.{sufijo}.tmp"
+    with open(ruta_temporal, 'w', encoding='utf-8') as f:
+        json.dump(contenido, f, ensure_ascii=False, indent=2)
+    os.replace(ruta_temporal, ruta_metadatos)
+    _borrar_arreglos_no_referenciados(carpeta)
+    return ruta_metadatos
+
+
+def _archivo_arreglo(metadatos, nombre):
+    """Archivo .npy de un arreglo (las carpetas escritas antes de los sufijos usan '<nombre>.npy')."""
+    return metadatos.get('archivos', {}).get(nombre, f"{nombre}.npy")
+
+
+def _borrar_arreglos_no_referenciados(carpeta):
+    """
+    Borra los .npy de la carpeta que el JSON de metadatos vigente no referencia.
+
+    Si otro proceso escribió la carpeta después, su JSON es el vigente y se conservan sus archivos.
+    Un archivo que otro proceso tiene abierto con memory-map sigue siendo válido para él después de
+    borrarlo (POSIX); donde el sistema no permite borrarlo (Windows) queda para la próxima escritura.
+    """
+    try:
+        with open(os.path.join(carpeta, NOMBRE_METADATOS_TOPOLOGIA), encoding='utf-8') as f:
+            metadatos = json.load(f)
+    except (OSError, ValueError):
+        return
+    vigentes = {_archivo_arreglo(metadatos, nombre) for nombre in metadatos.get('arreglos', [])}
+    for archivo in os.listdir(carpeta):
+        if archivo.endswith('.npy') and archivo not in vigentes:
+            try:
+                os.remove(os.path.join(carpeta, archivo))
+            except OSError:
+                pass
+
+
+def abrir_arreglos(carpeta, mmap=True):
+    """
+    Abre una carpeta escrita con `guardar_arreglos`.
+
+    Parámetros:
+        carpeta (str): Carpeta de origen.
+        mmap (bool, optional): Si es True, los arreglos se abren con memory-map de solo lectura
+                               (sin copiar a memoria); si es False se leen completos. Por defecto True.
+
+    Retorna:
+        tuple: (arreglos (dict nombre → np.ndarray), metadatos (dict)).
+    """
+    with open(os.path.join(carpeta, NOMBRE_METADATOS_TOPOLOGIA), encoding='utf-8') as f:
+        metadatos = json.load(f)
+    modo = 'r' if mmap else None
+    # np.asarray deja una vista ndarray sobre el mismo mapeo (sin copia): indexar un np.memmap
+    # elemento por elemento es mucho más lento que indexar un ndarray
+    arreglos = {
+        nombre: np.asarray(np.load(os.path.join(carpeta, _archivo_arreglo(metadatos, nombre)), mmap_mode=modo,
+                                   allow_pickle=False))
+        for nombre in metadatos['arreglos']
+    }
+    return arreglos, metadatos
+
+
+# ----------------------------------------------------------
+# Exportación de la Topología Recorrida por el Barrido
+# ----------------------------------------------------------
+
+def _filas_padre(equipos_padre, circuitos_origen, filas_por_co_circuito, filas_por_co):
+    """
+    Traduce el CO del equipo padre de cada fila a la fila del EC padre en la tabla 'ecs' exportada.
+
+    Se busca primero el EC con ese CO barrido en el mismo circuito y, si no existe (por ejemplo
+    porque la deduplicación lo dejó en otro circuito), el primer EC con ese CO. -1 si no hay padre.
+    """
+    padres = equipos_padre.astype(str)
+    en_circuito = filas_por_co_circuito.index.get_indexer(
+        pd.MultiIndex.from_arrays([padres, circuitos_origen.astype(str)]))
+    por_co = filas_por_co.index.get_indexer(padres)
+    filas = np.where(en_circuito >= 0, filas_por_co_circuito.to_numpy()[en_circuito],
+                     np.where(por_co >= 0, filas_por_co.to_numpy()[por_co], -1))
+    filas[equipos_padre.isna().to_numpy()] = -1
+    return filas.astype(np.int32)
+
+
+def construir_topologia_red(df_res_ecs, df_res_lineas, df_res_trafos):
+    """
+    Construye la topología de la red recorrida por el barrido como arreglos NumPy.
+
+    Los nodos de las tres tablas se factorizan a un único espacio de códigos int32 (NODO_NULO
+    para nulos) y se construye la adyacencia nodo → elementos en formato CSR sobre un índice
+    global de elementos (ECs, luego líneas, luego trafos). Cada tabla guarda además su circuito
+    de origen y el puntero a su EC padre (fila en la tabla 'ecs'), de modo que el árbol del
+    barrido se reconstruye sin leer 'Elementos_Aguas_Arriba'.
+
+    Parámetros:
+        df_res_ecs (pd.DataFrame): Resultados del barrido para ECs.
+        df_res_lineas (pd.DataFrame): Resultados del barrido para líneas.
+        df_res_trafos (pd.DataFrame): Resultados del barrido para transformadores.
+
+    Retorna:
+        tuple: (arreglos, metadatos), donde arreglos tiene las llaves:
+               - 'nodos' (U): ID original de cada código de nodo; 'circuitos' (U): códigos de circuito.
+               - 'adyacencia_indptr' (int64), 'adyacencia_elementos' (int32): elementos globales
+                 incidentes a cada nodo en formato CSR.
+               - '<tabla>_fid' (U), '<tabla>_nodo1', '<tabla>_nodo2', '<tabla>_circuito' y
+                 '<tabla>_padre' (int32) para 'ecs', 'lineas' y 'trafos'.
+               - 'ecs_co' (U), 'ecs_estado' (int8, códigos de ESTADOS_EC) y
+                 'trafos_linea_conexion' (int32, fila de la línea de conexión, -1 si no se encontró).
+               metadatos incluye la cantidad de filas y el offset global de cada tabla.
+    """
+    tablas = {'ecs': df_res_ecs, 'lineas': df_res_lineas, 'trafos': df_res_trafos}
+    columnas_padre = {'ecs': 'Equipo_Padre', 'lineas': 'Equipo_Padre', 'trafos': 'Equipo_Padre_Linea'}
+
+    # 1. Espacio único de códigos de nodo
+    columnas_nodos = []
+    for df in tablas.values():
+        for col in ('NODO1_ID', 'NODO2_ID'):
+            serie = df[col].astype(object).where(~_es_nodo_nulo(df[col]), None)
+            columnas_nodos.append(serie.astype(object).to_numpy())
+    codigos_nodos, nodos = pd.factorize(np.concatenate(columnas_nodos), use_na_sentinel=True)
+    codigos_nodos = codigos_nodos.astype(np.int32)
+    n_nodos = len(nodos)
+
+    # 2. Circuitos de origen y búsqueda de ECs padre por (CO, circuito)
+    circuitos = pd.unique(np.concatenate([
+        df['Circuito_Origen_Barrido'].astype(str).to_numpy() for df in tablas.values()
+    ]))
+    indice_circuitos = pd.Index(circuitos)
+    cos_ecs = df_res_ecs['CODIGO_OPERATIVO'].astype(str)
+    circuitos_ecs = df_res_ecs['Circuito_Origen_Barrido'].astype(str)
+    claves_ecs = pd.MultiIndex.from_arrays([cos_ecs, circuitos_ecs])
+    primeras_clave = ~claves_ecs.duplicated()
+    filas_por_co_circuito = pd.Series(np.flatnonzero(primeras_clave), index=claves_ecs[primeras_clave])
+    primeras_co = ~cos_ecs.duplicated().to_numpy()
+    filas_por_co = pd.Series(np.flatnonzero(primeras_co), index=pd.Index(cos_ecs[primeras_co]))
+
+    arreglos = {
+        'nodos': _a_texto_fijo(nodos),
+        'circuitos': _a_texto_fijo(circuitos),
+    }
+    metadatos = {'version': VERSION_FORMATO_TOPOLOGIA, 'n_nodos': n_nodos, 'tablas': {}}
+
+    inicio, offset = 0, 0
+    nodos1_global, nodos2_global = [], []
+    for nombre, df in tablas.items():
+        n_filas = len(df)
+        nodos1 = codigos_nodos[inicio:inicio + n_filas]
+        nodos2 = codigos_nodos[inicio + n_filas:inicio + 2 * n_filas]
+        inicio += 2 * n_filas
+        nodos1_global.append(nodos1)
+        nodos2_global.append(nodos2)
+
+        filas_padre = _filas_padre(df[columnas_padre[nombre]], df['Circuito_Origen_Barrido'],
+                                   filas_por_co_circuito, filas_por_co)
+        arreglos[f'{nombre}_fid'] = _a_texto_fijo(df['G3E_FID'].to_numpy(dtype=object))
+        arreglos[f'{nombre}_nodo1'] = nodos1
+        arreglos[f'{nombre}_nodo2'] = nodos2
+        arreglos[f'{nombre}_circuito'] = indice_circuitos.get_indexer(df['Circuito_Origen_Barrido'].astype(str)).astype(np.int32)
+        arreglos[f'{nombre}_padre'] = filas_padre
+        metadatos['tablas'][nombre] = {'filas': n_filas, 'offset': offset}
+        offset += n_filas
+
+    # 3. Atributos propios de ECs y trafos
+    estados = df_res_ecs['EST_ESTABLE'].astype(str).str.strip().str.upper()
+    arreglos['ecs_co'] = _a_texto_fijo(cos_ecs.to_numpy(dtype=object))
+    arreglos['ecs_estado'] = pd.Categorical(estados, categories=ESTADOS_EC).codes.astype(np.int8)
+    indice_fids_lineas = pd.Index(df_res_lineas['G3E_FID'].astype(str))
+    if 'Linea_Conexion_FID' in df_res_trafos.columns:
+        arreglos['trafos_linea_conexion'] = indice_fids_lineas.get_indexer(
+            df_res_trafos['Linea_Conexion_FID'].astype(str)).astype(np.int32)
+    else:
+        arreglos['trafos_linea_conexion'] = np.full(len(df_res_trafos), -1, dtype=np.int32)
+
+    # 4. Adyacencia global nodo → elementos (ECs, líneas y trafos en un solo índice)
+    indptr, indices = _adyacencia_csr(np.concatenate(nodos1_global), np.concatenate(nodos2_global), n_nodos)
+    arreglos['adyacencia_indptr'] = indptr
+    arreglos['adyacencia_elementos'] = indices
+    metadatos['tipos_elemento'] = list(TIPOS_ELEMENTO)
+    metadatos['estados_ec'] = list(ESTADOS_EC)
+    return arreglos, metadatos
+
+
+def exportar_topologia_red(df_res_ecs, df_res_lineas, df_res_trafos, carpeta='Reports/topologia_red'):
+    """
+    Exporta la topología recorrida por el barrido a una carpeta de arreglos .npy.
+
+    Las herramientas externas (contingencias, planeamiento) pueden abrirla con
+    `abrir_topologia_red` usando memory-map, sin reconstruir la conectividad desde los
+    reportes de resultados.
+
+    Parámetros:
+        df_res_ecs (pd.DataFrame): Resultados del barrido para ECs.
+        df_res_lineas (pd.DataFrame): Resultados del barrido para líneas.
+        df_res_trafos (pd.DataFrame): Resultados del barrido para transformadores.
+        carpeta (str, optional): Carpeta de destino. Por defecto 'Reports/topologia_red'.
+
+    Retorna:
+        str: Carpeta escrita, o None si ocurrió un error.
+    """
+    try:
+        arreglos, metadatos = construir_topologia_red(df_res_ecs, df_res_lineas, df_res_trafos)
+        guardar_arreglos(carpeta, arreglos, metadatos)
+    except Exception as e:
+        print(f"❌ Error al exportar la topología de la red: {e}")
+        return None
+    print(f"  🧭 Topología exportada en '{carpeta}' ({metadatos['n_nodos']} nodos, "
+          f"{sum(t['filas'] for t in metadatos['tablas'].values())} elementos).")
+    return carpeta
+
+
+def abrir_topologia_red(carpeta='Reports/topologia_red', mmap=True):
+    """
+    Abre una topología exportada con `exportar_topologia_red`.
+
+    Parámetros:
+        carpeta (str, optional): Carpeta de la topología. Por defecto 'Reports/topologia_red'.
+        mmap (bool, optional): Si es True, los arreglos se abren con memory-map de solo lectura.
+                               Por defecto True.
+
+    Retorna:
+        tuple: (arreglos, metadatos), con las llaves descritas en `construir_topologia_red`.
+    """
+    arreglos, metadatos = abrir_arreglos(carpeta, mmap)
+    if metadatos.get('version') != VERSION_FORMATO_TOPOLOGIA:
+        raise ValueError(f"Versión de topología no soportada: {metadatos.get('version')}")
+    return arreglos, metadatos
+
+
+def elementos_en_nodo(topologia, nodo):
+    """
+    Devuelve los elementos incidentes a un nodo de una topología exportada.
+
+    Parámetros:
+        topologia (dict): Arreglos retornados por `abrir_topologia_red` o `construir_topologia_red`.
+        nodo (int): Código del nodo.
+
+    Retorna:
+        list: Tuplas (tabla, fila), con tabla en TIPOS_ELEMENTO, en orden de índice global.
+    """
+    indptr = topologia['adyacencia_indptr']
+    elementos = topologia['adyacencia_elementos'][indptr[nodo]:indptr[nodo + 1]]
+    limites = np.cumsum([len(topologia[f'{tabla}_fid']) for tabla in TIPOS_ELEMENTO])
+    tipos = np.searchsorted(limites, elementos, side='right')
+    offsets = np.concatenate([[0], limites[:-1]])
+    return [(TIPOS_ELEMENTO[t], int(g - offsets[t])) for t, g in zip(tipos, elementos)]
+
+
+# ----------------------------------------------------------
+# Snapshot del Modelo Codificado de la Red
+# ----------------------------------------------------------
+
+VERSION_SNAPSHOT_MODELO = 1
+
+# Columnas que usa `construir_modelo_red`; la huella del snapshot solo depende de ellas
+_COLUMNAS_MODELO = {
+    'ecs': ['G3E_FID', 'NODO1_ID', 'NODO2_ID', 'CIRCUITO', 'EST_ESTABLE', 'TIPO', 'CODIGO_OPERATIVO'],
+    'lineas': ['G3E_FID', 'NODO1_ID', 'NODO2_ID'],
+    'trafos': ['G3E_FID', 'NODO1_ID', 'NODO2_ID'],
+    'circuitos': ['Circuito'],
+}
+# Arreglos de texto de las tablas del modelo: se guardan como 'U' y se restauran como objetos al abrir
+_TEXTOS_MODELO = {('ecs', 'co'), ('ecs', 'tipos')}
+
+
+def huella_datos_modelo_red(df_elementos_corte, df_lineas, df_trafos, df_circuitos=None):
+    """
+    Calcula una huella de las columnas de entrada del modelo codificado de la red.
+
+    Dos conjuntos de DataFrames con la misma huella producen el mismo modelo, así que un
+    snapshot guardado con esa huella se puede reutilizar. Un cambio de EST_ESTABLE cambia la huella.
+
+    Parámetros:
+        df_elementos_corte (pd.DataFrame): DataFrame con todos los elementos de corte.
+        df_lineas (pd.DataFrame): DataFrame con todas las líneas.
+        df_trafos (pd.DataFrame): DataFrame con todos los transformadores.
+        df_circuitos (pd.DataFrame, optional): DataFrame de circuitos.
+
+    Retorna:
+        str: Huella hexadecimal.
+    """
+    tablas = {'ecs': df_elementos_corte, 'lineas': df_lineas, 'trafos': df_trafos, 'circuitos': df_circuitos}
+    partes = []
+    for nombre, df in tablas.items():
+        if df is None:
+            partes.append(f"{nombre}:-")
+            continue
+        columnas = [col for col in _COLUMNAS_MODELO[nombre] if col in df.columns]
+        valores = pd.util.hash_pandas_object(df[columnas].astype(str), index=False).to_numpy()
+        # Se combina con la posición para que el orden de las filas también cuente
+        suma = int((valores * np.arange(1, len(valores) + 1, dtype=np.uint64)).sum())
+        partes.append(f"{nombre}:{len(df)}:{suma:x}")
+    return '|'.join(partes)
+
+
+def guardar_snapshot_modelo_red(modelo_red, carpeta, secciones_lineas=None, huella=None):
+    """
+    Guarda el modelo codificado de la red (y opcionalmente sus secciones de líneas) como una
+    carpeta de arreglos .npy, para reabrirlo después sin reconstruirlo desde los DataFrames.
+
+    Parámetros:
+        modelo_red (dict): Modelo generado por `construir_modelo_red`.
+        carpeta (str): Carpeta de destino.
+        secciones_lineas (dict, optional): Secciones generadas por `construir_secciones_lineas`.
+        huella (str, optional): Huella de los datos de entrada (`huella_datos_modelo_red`).
+
+    Retorna:
+        str: Carpeta escrita.
+    """
+    arreglos = {
+        'nodos': _a_texto_fijo(modelo_red['nodos']),
+        'circuitos': _a_texto_fijo(modelo_red['circuitos']),
+    }
+    for tabla in ('ecs', 'lineas', 'trafos'):
+        for llave, arreglo in modelo_red[tabla].items():
+            if isinstance(arreglo, pd.Index):
+                continue  # Los índices hash se reconstruyen al abrir
+            arreglos[f'{tabla}__{llave}'] = _a_texto_fijo(arreglo) if (tabla, llave) in _TEXTOS_MODELO else arreglo
+    arreglos['ecs__cos_unicos'] = _a_texto_fijo(modelo_red['ecs']['indice_co'])
+    if secciones_lineas is not None:
+        for llave, arreglo in secciones_lineas.items():
+            arreglos[f'secciones__{llave}'] = arreglo
+    metadatos = {'version': VERSION_SNAPSHOT_MODELO, 'huella': huella, 'n_nodos': len(modelo_red['nodos'])}
+    guardar_arreglos(carpeta, arreglos, metadatos)
+    return carpeta
+
+
+def abrir_snapshot_modelo_red(carpeta, huella=None, mmap=True):
+    """
+    Reabre un modelo codificado guardado con `guardar_snapshot_modelo_red`.
+
+    Los arreglos numéricos (códigos de nodo, adyacencias CSR, estados, secciones) se abren con
+    memory-map de solo lectura, así que varios procesos que abren el mismo snapshot comparten las
+    mismas páginas físicas. Solo los arreglos de texto (IDs de nodo, circuitos, CO, tipos) se
+    copian a objetos de Python y sus índices hash se reconstruyen.
+
+    Parámetros:
+        carpeta (str): Carpeta del snapshot.
+        huella (str, optional): Si se indica, el snapshot solo se abre si fue guardado con esa huella.
+        mmap (bool, optional): Si es False, los arreglos se leen completos en memoria. Por defecto True.
+
+    Retorna:
+        tuple: (modelo_red, secciones_lineas), o (None, None) si el snapshot no existe, es de otra
+               versión o su huella no coincide. secciones_lineas es None si no se guardaron.
+    """
+    try:
+        arreglos, metadatos = abrir_arreglos(carpeta, mmap)
+    except (OSError, ValueError, KeyError):
+        return None, None
+    if metadatos.get('version') != VERSION_SNAPSHOT_MODELO or (huella is not None and metadatos.get('huella') != huella):
+        return None, None
+
+    nodos = arreglos['nodos'].astype(object)
+    circuitos = arreglos['circuitos'].astype(object)
+    modelo_red = {
+        'nodos': nodos,
+        'indice_nodos': pd.Index(nodos),
+        'circuitos': circuitos,
+        'indice_circuitos': pd.Index(circuitos),
+        'ecs': {}, 'lineas': {}, 'trafos': {},
+    }
+    secciones_lineas = {}
+    for nombre, arreglo in arreglos.items():
+        if '__' not in nombre:
+            continue
+        grupo, llave = nombre.split('__', 1)
+        if grupo == 'secciones':
+            secciones_lineas[llave] = arreglo
+        elif llave != 'cos_unicos':
+            modelo_red[grupo][llave] = arreglo.astype(object) if (grupo, llave) in _TEXTOS_MODELO else arreglo
+    modelo_red['ecs']['indice_co'] = pd.Index(arreglos['ecs__cos_unicos'].astype(object))
+    return modelo_red, (secciones_lineas or None)
@@ -5,14 +5,19 @@ Created on Thu May 22 13:58:25 2025
 @author: alopagui
 """
 
+import concurrent.futures
+import hashlib
+import json
 import os
+import time
 import graphviz
 import pandas as pd
 
-def generar_grafo_circuito(
+from instrumentacion import medir_etapa, registrar_circuito, registrar_etapa
+
+def construir_grafo_circuito(
     df_datos_circuito,
     circuito_co_origen, 
-    output_folder,    
     # --- Parámetros de personalización ---
     font_size=10,
     line_thickness=1.0,
@@ -31,8 +36,11 @@ def generar_grafo_circuito(
     circuito_externo_node_color='lightpink' # Nuevo
     ):
     """
-    Genera un grafo orientado para un circuito específico, con formas y colores
-    basados en las columnas 'TIPO' y 'EST_ESTABLE', e indicando anillos.
+    Construye (sin renderizar) el grafo orientado de un circuito específico, con formas y
+    colores basados en las columnas 'TIPO' y 'EST_ESTABLE', e indicando anillos.
+
+    Retorna:
+        graphviz.Digraph: Grafo con la fuente DOT del circuito.
     """
     graph_name = f'Grafo_Circuito_{"".join(c if c.isalnum() else "_" for c in str(circuito_co_origen))}'
     dot = graphviz.Digraph(
@@ -65,37 +73,42 @@ def generar_grafo_circuito(
         'DEFAULT': 'box'    
     }
     
+    textos_nulos = ['nan', 'none', 'pd.na', '<na>']
+    circuito_origen_str = str(circuito_co_origen)
+    columnas = df_datos_circuito.columns
+    tiene_co = 'CODIGO_OPERATIVO' in columnas
+    tiene_padre = 'Equipo_Padre' in columnas
+    cos = df_datos_circuito['CODIGO_OPERATIVO'].astype(str) if tiene_co else None
+
+    # --- Atributos de cada nodo: primera fila de cada CODIGO_OPERATIVO ---
     atributos_nodos = {}
-    if 'CODIGO_OPERATIVO' in df_datos_circuito.columns:
-        df_nodos_unicos_atributos = df_datos_circuito.drop_duplicates(subset=['CODIGO_OPERATIVO'])
-        for _, row_nodo in df_nodos_unicos_atributos.iterrows():
-            co = str(row_nodo['CODIGO_OPERATIVO'])
-            atributos_nodos[co] = {
-                'TIPO': str(row_nodo.get('TIPO', 'DEFAULT')).upper(),
-                'EST_ESTABLE': str(row_nodo.get('EST_ESTABLE', 'DEFAULT')).upper()
-            }
+    if tiene_co:
+        primeras_filas = ~cos.duplicated()
+        cos_unicos = cos[primeras_filas]
+        tipos = df_datos_circuito['TIPO'][primeras_filas].astype(str).str.upper() if 'TIPO' in columnas \
+            else pd.Series('DEFAULT', index=cos_unicos.index)
+        estados = df_datos_circuito['EST_ESTABLE'][primeras_filas].astype(str).str.upper() if 'EST_ESTABLE' in columnas \
+            else pd.Series('DEFAULT', index=cos_unicos.index)
+        atributos_nodos = dict(zip(cos_unicos.tolist(), zip(tipos.tolist(), estados.tolist())))
 
     nodos_a_graficar = set()
-    if 'CODIGO_OPERATIVO' in df_datos_circuito.columns:
-        nodos_a_graficar.update(df_datos_circuito['CODIGO_OPERATIVO'].astype(str))
-    if 'Equipo_Padre' in df_datos_circuito.columns:
-        nodos_a_graficar.update(df_datos_circuito['Equipo_Padre'].dropna().astype(str))
+    if tiene_co:
+        nodos_a_graficar.update(cos.tolist())
+    if tiene_padre:
+        nodos_a_graficar.update(df_datos_circuito['Equipo_Padre'].dropna().astype(str).tolist())
     
-    nodos_a_graficar = {n for n in nodos_a_graficar if n.lower() not in ['nan', 'none', 'pd.na', '<na>']}
-
+    nodos_a_graficar = {n for n in nodos_a_graficar if n.lower() not in textos_nulos}
 
-    for co_nodo_str in nodos_a_graficar:
-        if pd.isna(co_nodo_str) or str(co_nodo_str).strip() == '': continue # Saltar nodos vacíos o NaN
-        label_nodo = co_nodo_str 
 
-        node_data = atributos_nodos.get(co_nodo_str, {'TIPO': 'DEFAULT', 'EST_ESTABLE': 'DEFAULT'})
-        tipo_actual = node_data['TIPO']
-        estado_actual = node_data['EST_ESTABLE'] # Ya está en mayúsculas desde la carga
+    # Orden fijo de los nodos: la misma entrada produce siempre la misma fuente DOT (ver caché de grafos)
+    for co_nodo_str in sorted(nodos_a_graficar):
+        if co_nodo_str.strip() == '': continue # Saltar nodos vacíos
+        tipo_actual, estado_actual = atributos_nodos.get(co_nodo_str, ('DEFAULT', 'DEFAULT'))
 
         forma_nodo = tipo_a_forma.get(tipo_actual, tipo_a_forma['DEFAULT'])
         color_relleno_nodo = default_node_color
 
-        if tipo_actual == 'I' and co_nodo_str == str(circuito_co_origen):
+        if tipo_actual == 'I' and co_nodo_str == circuito_origen_str:
             color_relleno_nodo = interruptor_principal_color
         else:
             if estado_actual == 'CLOSED':
@@ -103,50 +116,43 @@ def generar_grafo_circuito(
             elif estado_actual == 'OPEN':
                 color_relleno_nodo = estado_open_color
         
-        dot.node(name=co_nodo_str, label=label_nodo, shape=forma_nodo, fillcolor=color_relleno_nodo)
+        dot.node(name=co_nodo_str, label=co_nodo_str, shape=forma_nodo, fillcolor=color_relleno_nodo)
 
     # --- Añadir aristas (conexiones principales) ---
-    if 'Equipo_Padre' in df_datos_circuito.columns and 'CODIGO_OPERATIVO' in df_datos_circuito.columns:
-        for _, row in df_datos_circuito.iterrows():
-            hijo_co_str = str(row['CODIGO_OPERATIVO'])
-            padre_co_str = str(row['Equipo_Padre'])
-
-            if pd.notna(row['Equipo_Padre']) and padre_co_str.lower() not in ['nan', 'none', 'pd.na', '<na>'] and \
-               hijo_co_str.lower() not in ['nan', 'none', 'pd.na', '<na>']:
-                if padre_co_str in nodos_a_graficar and hijo_co_str in nodos_a_graficar:
-                    dot.edge(padre_co_str, hijo_co_str)
+    if tiene_padre and tiene_co:
+        padres = df_datos_circuito['Equipo_Padre']
+        padres_str = padres.astype(str)
+        validas = padres.notna() & ~padres_str.str.lower().isin(textos_nulos) & ~cos.str.lower().isin(textos_nulos) & \
+            padres_str.isin(nodos_a_graficar) & cos.isin(nodos_a_graficar)
+        for padre_co_str, hijo_co_str in zip(padres_str[validas].tolist(), cos[validas].tolist()):
+            dot.edge(padre_co_str, hijo_co_str)
     
     # --- Añadir aristas para ANILLOS (desde ECs 'OPEN') ---
     nodos_externos_creados = set() # Para no duplicar nodos de circuitos externos
-    if all(col in df_datos_circuito.columns for col in ['CODIGO_OPERATIVO', 'EST_ESTABLE', 'Equipo_anillo', 'Circuito_anillo', 'Circuito_Origen_Barrido']):
-        ecs_open_con_anillo = df_datos_circuito[
-            (df_datos_circuito['EST_ESTABLE'] == 'OPEN') &
-            (df_datos_circuito['Equipo_anillo'].notna())
-        ]
+    if all(col in columnas for col in ['CODIGO_OPERATIVO', 'EST_ESTABLE', 'Equipo_anillo', 'Circuito_anillo', 'Circuito_Origen_Barrido']):
+        con_anillo = (df_datos_circuito['EST_ESTABLE'] == 'OPEN') & df_datos_circuito['Equipo_anillo'].notna()
+        ecs_open_con_anillo = df_datos_circuito[con_anillo]
         
         # Crear el subgrafo una sola vez antes del bucle principal
         #subgrafo_sink = graphviz.Digraph(name="cluster_sink")
         #subgrafo_sink.attr(rank='sink')
 
-        for _, row_nodo_open in ecs_open_con_anillo.iterrows():
-            co_ec_open = str(row_nodo_open['CODIGO_OPERATIVO'])
-            equipo_anillo_co = str(row_nodo_open['Equipo_anillo'])
-            circuito_anillo_val = str(row_nodo_open.get('Circuito_anillo', 'N/A'))
-            # circuito_origen_actual = str(row_nodo_open.get('Circuito_Origen_Barrido', circuito_co_origen))
-            # Usar el circuito_co_origen de la función es más seguro para el contexto del grafo actual
-            circuito_origen_actual_grafo = str(circuito_co_origen)
-
-
+        for co_ec_open, equipo_anillo_co, circuito_anillo_val in zip(
+                cos[con_anillo].tolist(),
+                ecs_open_con_anillo['Equipo_anillo'].astype(str).tolist(),
+                ecs_open_con_anillo['Circuito_anillo'].astype(str).tolist()):
+            # Se usa el circuito_co_origen de la función como contexto del grafo actual
             if co_ec_open not in nodos_a_graficar: continue # El EC open debe existir
 
             # Anillo Interno
-            if circuito_anillo_val == circuito_origen_actual_grafo and equipo_anillo_co in nodos_a_graficar:
-                dot.edge(co_ec_open, equipo_anillo_co, 
-                         color=anillo_interno_color, 
-                         style='dashed', arrowhead='normal', constraint='false')
-                         #label=f"Anillo interno\na {equipo_anillo_co[:15]}") # Etiqueta opcional
+            if circuito_anillo_val == circuito_origen_str:
+                if equipo_anillo_co in nodos_a_graficar:
+                    dot.edge(co_ec_open, equipo_anillo_co, 
+                             color=anillo_interno_color, 
+                             style='dashed', arrowhead='normal', constraint='false')
+                             #label=f"Anillo interno\na {equipo_anillo_co[:15]}") # Etiqueta opcional
             # Anillo Externo
-            elif circuito_anillo_val != circuito_origen_actual_grafo and pd.notna(row_nodo_open['Equipo_anillo']):
+            else:
                 nodo_circuito_externo_label = f"Circuito:\n{circuito_anillo_val}"
                 nodo_circuito_externo_name = f"ext_circ_{''.join(c if c.isalnum() else '_' for c in circuito_anillo_val)}"              
 
@@ -164,17 +170,200 @@ def generar_grafo_circuito(
                          style='dashed', arrowhead='normal', constraint='true')
                          #label=f"Anillo a Cto.\n{circuito_anillo_val}") # Etiqueta opcional
         
-    os.makedirs(output_folder, exist_ok=True)
-    
+    return dot
+
+
+def _nombre_archivo_grafo(circuito_co_origen):
+    """Nombre base (sin extensión) del SVG de un circuito."""
     safe_circuito_co = "".join(c if c.isalnum() or c in ('_','-') else '_' for c in str(circuito_co_origen))
-    output_filename_base = f'circuito_ecs_{safe_circuito_co}'
-    
+    return f'circuito_ecs_{safe_circuito_co}'
+
+
+def _renderizar_grafo(dot, circuito_co_origen, output_folder, instrumentacion=None):
+    """Renderiza un grafo a SVG en `output_folder` (invoca el ejecutable 'dot') y retorna la ruta generada."""
+    os.makedirs(output_folder, exist_ok=True)
+    inicio = time.perf_counter()
+    ruta = dot.render(filename=_nombre_archivo_grafo(circuito_co_origen), directory=output_folder,
+                      format='svg', cleanup=True, quiet=True)
+    registrar_circuito(instrumentacion, circuito_co_origen, render_grafo_s=time.perf_counter() - inicio)
+    return ruta
+
+
+# Manifiesto con el hash de la fuente DOT de cada SVG generado en la carpeta de salida
+NOMBRE_MANIFIESTO_GRAFOS = 'manifiesto_grafos.json'
+
+
+def _hash_grafo(dot):
+    """Hash SHA-256 de la fuente DOT de un grafo (determina si su SVG debe regenerarse)."""
+    return hashlib.sha256(dot.source.encode('utf-8')).hexdigest()
+
+
+def _leer_manifiesto_grafos(output_folder):
+    """Lee el manifiesto de grafos de la carpeta; retorna un diccionario vacío si no existe o es inválido."""
+    try:
+        with open(os.path.join(output_folder, NOMBRE_MANIFIESTO_GRAFOS), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _guardar_manifiesto_grafos(output_folder, manifiesto):
+    """Guarda el manifiesto de grafos (escritura atómica con un archivo temporal)."""
+    os.makedirs(output_folder, exist_ok=True)
+    ruta = os.path.join(output_folder, NOMBRE_MANIFIESTO_GRAFOS)
+    with open(ruta + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, indent=1, sort_keys=True)
+    os.replace(ruta + '.tmp', ruta)
+
+
+def _svg_vigente(manifiesto, dot, circuito_co_origen, output_folder):
+    """True si el SVG del circuito existe y fue generado a partir de la misma fuente DOT."""
+    nombre = _nombre_archivo_grafo(circuito_co_origen)
+    return manifiesto.get(nombre) == _hash_grafo(dot) and \
+        os.path.exists(os.path.join(output_folder, f'{nombre}.svg'))
+
+
+def _informar_graphviz_no_encontrado():
+    print("❌ ERROR CRÍTICO: El ejecutable de Graphviz no se encontró.")
+    print("    Por favor, instala Graphviz desde https://graphviz.org/download/ y asegúrate")
+    print("    de que el directorio 'bin' de Graphviz esté en el PATH de tu sistema.")
+
+
+def generar_grafo_circuito(
+    df_datos_circuito,
+    circuito_co_origen, 
+    output_folder,    
+    # --- Parámetros de personalización ---
+    font_size=10,
+    line_thickness=1.0,
+    node_width=2.0, 
+    node_height=0.6,
+    rankdir='TB',
+    default_node_color='lightgrey', 
+    interruptor_principal_color='gold',
+    estado_closed_color='mediumseagreen',
+    estado_open_color='tomato',
+    edge_color='gray30',
+    font_name='Arial',
+    # Colores para anillos
+    anillo_interno_color='blue',
+    anillo_externo_color='darkorange',
+    circuito_externo_node_color='lightpink',
+    *,
+    usar_cache=True
+    ):
+    """
+    Genera y guarda como SVG el grafo orientado de un circuito específico, con formas y colores
+    basados en las columnas 'TIPO' y 'EST_ESTABLE', e indicando anillos.
+
+    Los parámetros de personalización son los de `construir_grafo_circuito`. Con `usar_cache`
+    (solo por nombre), si el SVG existente se generó a partir de la misma fuente DOT (según el
+    manifiesto de la carpeta de salida) no se vuelve a invocar Graphviz.
+    """
+    dot = construir_grafo_circuito(
+        df_datos_circuito, circuito_co_origen,
+        font_size=font_size,
+        line_thickness=line_thickness,
+        node_width=node_width,
+        node_height=node_height,
+        rankdir=rankdir,
+        default_node_color=default_node_color,
+        interruptor_principal_color=interruptor_principal_color,
+        estado_closed_color=estado_closed_color,
+        estado_open_color=estado_open_color,
+        edge_color=edge_color,
+        font_name=font_name,
+        anillo_interno_color=anillo_interno_color,
+        anillo_externo_color=anillo_externo_color,
+        circuito_externo_node_color=circuito_externo_node_color
+    )
+    manifiesto = _leer_manifiesto_grafos(output_folder) if usar_cache else {}
+    if usar_cache and _svg_vigente(manifiesto, dot, circuito_co_origen, output_folder):
+        return
     try:
-        filepath = dot.render(filename=output_filename_base, directory=output_folder, format='svg', cleanup=True, quiet=True)
+        filepath = _renderizar_grafo(dot, circuito_co_origen, output_folder)
+        if usar_cache:
+            manifiesto[_nombre_archivo_grafo(circuito_co_origen)] = _hash_grafo(dot)
+            _guardar_manifiesto_grafos(output_folder, manifiesto)
         #print(f"✅ Grafo para circuito {circuito_co_origen} guardado en: {filepath}")
     except graphviz.backend.execute.ExecutableNotFound:
-        print("❌ ERROR CRÍTICO: El ejecutable de Graphviz no se encontró.")
-        print("    Por favor, instala Graphviz desde https://graphviz.org/download/ y asegúrate")
-        print("    de que el directorio 'bin' de Graphviz esté en el PATH de tu sistema.")
+        _informar_graphviz_no_encontrado()
     except Exception as e:
-        print(f"❌ Error al generar o guardar el grafo para {circuito_co_origen}: {e}")
\ No newline at end of file
+        print(f"❌ Error al generar o guardar el grafo para {circuito_co_origen}: {e}")
+
+
+def generar_grafos_circuitos(df_res_ecs, output_folder, max_hilos=None, usar_cache=True, instrumentacion=None,
+                             **personalizacion):
+    """
+    Genera los grafos SVG de todos los circuitos de los resultados, renderizándolos en paralelo.
+
+    Las fuentes DOT se construyen en este proceso y cada render (un subproceso 'dot' de Graphviz)
+    se lanza desde un pool de hilos, de modo que varios renders corren a la vez. Un fallo en un
+    circuito se registra y no detiene el lote.
+
+    Con `usar_cache`, el hash de cada fuente DOT se compara con el manifiesto de la carpeta de
+    salida ('manifiesto_grafos.json'): los circuitos sin cambios conservan su SVG y no invocan
+    Graphviz. El manifiesto se actualiza con los grafos renderizados con éxito.
+
+    Parámetros:
+        df_res_ecs (pd.DataFrame): Resultados de ECs del barrido (con 'Circuito_Origen_Barrido').
+        output_folder (str): Carpeta de salida de los SVG.
+        max_hilos (int, optional): Renders simultáneos. Si es None se usa la cantidad de núcleos.
+        usar_cache (bool, optional): Si es True, omite los circuitos cuyo SVG está vigente. Por defecto True.
+        instrumentacion (dict, optional): Registro de `crear_instrumentacion` para las etapas de
+                                          construcción y render, y el tiempo de render por circuito.
+        **personalizacion: Parámetros de personalización de `construir_grafo_circuito`.
+
+    Retorna:
+        tuple: (rutas, fallos), diccionarios circuito → ruta del SVG generado y circuito → mensaje de error.
+    """
+    rutas, fallos = {}, {}
+    if df_res_ecs.empty or 'Circuito_Origen_Barrido' not in df_res_ecs.columns:
+        return rutas, fallos
+
+    # 1. Construir las fuentes DOT de cada circuito
+    # (un solo groupby en lugar de filtrar los resultados una vez por circuito)
+    grafos = {}
+    with medir_etapa(instrumentacion, 'grafos/construccion_dot'):
+        for circuito_co_actual, df_datos_circuito_actual in df_res_ecs.groupby('Circuito_Origen_Barrido', sort=False):
+            try:
+                grafos[circuito_co_actual] = construir_grafo_circuito(
+                    df_datos_circuito_actual, circuito_co_actual, **personalizacion
+                )
+            except Exception as e:
+                fallos[circuito_co_actual] = f"Error al construir el grafo: {e}"
+
+    # 2. Omitir los circuitos cuyo SVG se generó a partir de la misma fuente DOT
+    manifiesto = _leer_manifiesto_grafos(output_folder) if usar_cache else {}
+    if usar_cache:
+        for circuito, dot in list(grafos.items()):
+            if _svg_vigente(manifiesto, dot, circuito, output_folder):
+                rutas[circuito] = os.path.join(output_folder, f'{_nombre_archivo_grafo(circuito)}.svg')
+                del grafos[circuito]
+        print(f"  ♻️ {len(rutas)} grafos sin cambios (caché), {len(grafos)} por renderizar.")
+
+    # 3. Renderizar en paralelo; cada hilo espera a su propio subproceso de Graphviz
+    max_hilos = max_hilos or os.cpu_count() or 1
+    inicio_render = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_hilos) as executor:
+        futuros = {
+            executor.submit(_renderizar_grafo, dot, circuito, output_folder, instrumentacion): circuito
+            for circuito, dot in grafos.items()
+        }
+        for futuro in concurrent.futures.as_completed(futuros):
+            circuito = futuros[futuro]
+            try:
+                rutas[circuito] = futuro.result()
+                manifiesto[_nombre_archivo_grafo(circuito)] = _hash_grafo(grafos[circuito])
+            except graphviz.backend.execute.ExecutableNotFound:
+                fallos[circuito] = "Ejecutable de Graphviz no encontrado"
+            except Exception as e:
+                fallos[circuito] = str(e)
+    registrar_etapa(instrumentacion, 'grafos/render', time.perf_counter() - inicio_render,
+                    renderizados=len(grafos), hilos=max_hilos)
+
+    if usar_cache and grafos:
+        _guardar_manifiesto_grafos(output_folder, manifiesto)
+    if any(msg == "Ejecutable de Graphviz no encontrado" for msg in fallos.values()):
+        _informar_graphviz_no_encontrado()
+    return rutas, fallos